@@ -0,0 +1,265 @@
+"""
+Benchmarks of the hot paths of forte-fives.
+
+Every benchmark is timed with timeit, on inputs built from a fixed
+seed, and the results are written as JSON so that runs can be compared
+across commits:
+
+    python benchmarks/run.py -o before.json
+    ... change things ...
+    python benchmarks/run.py -o after.json --compare before.json
+
+Comparing exits with status 1 if any benchmark got slower than the
+threshold allows. The script runs from a source checkout as is, the
+forte_fives package next to this directory being imported.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from forte_fives import card
+from forte_fives import deck
+from forte_fives import game
+from forte_fives import hand
+from forte_fives import pimc
+from forte_fives import player
+from forte_fives import rules
+from forte_fives import state
+
+from argparse import ArgumentParser
+import json
+import platform
+import random
+import timeit
+
+
+SEED = 1234
+
+# Relative slowdown allowed before a benchmark counts as a regression.
+DEFAULT_THRESHOLD = 0.20
+
+DEFAULT_REPEAT = 5
+
+
+def bench_deck_init():
+    return lambda: deck.Deck()
+
+
+def bench_deck_shuffle():
+    d = deck.Deck(random.Random(SEED))
+    return d.shuffle
+
+
+def bench_deck_contains():
+    d = deck.Deck()
+    cards = list(card.CARDS)
+
+    def run():
+        for c in cards:
+            c in d
+    return run
+
+
+def bench_deck_insert_card():
+    d = deck.Deck(random.Random(SEED))
+
+    def run():
+        d.insert_card(d.pick_card())
+    return run
+
+
+def _tricks(n):
+    rng = random.Random(SEED)
+    return [(rng.choice(card.SUITS), rng.sample(card.CARDS, 4))
+            for x in range(n)]
+
+
+def bench_get_winning_card():
+    tricks = _tricks(100)
+
+    def run():
+        for suit, cards in tricks:
+            rules.get_winnind_card(suit, cards)
+    return run
+
+
+def bench_select_valid_cards():
+    rng = random.Random(SEED)
+    games = []
+    for suit, cards in _tricks(100):
+        h = hand.Hand()
+        for c in rng.sample([c for c in card.CARDS if c not in cards],
+                            rules.HAND_SIZE):
+            h.add_card(c)
+        games.append((suit, h, cards[:rng.randint(0, 3)]))
+
+    def run():
+        for suit, h, cards_played in games:
+            rules.select_valid_cards(suit, h, cards_played)
+    return run
+
+
+def bench_hand_get_cards_in_suit():
+    rng = random.Random(SEED)
+    hands = []
+    for x in range(100):
+        h = hand.Hand()
+        for c in rng.sample(card.CARDS, rules.HAND_SIZE):
+            h.add_card(c)
+        hands.append(h)
+
+    def run():
+        for h in hands:
+            for suit in card.SUITS:
+                h.get_cards_in_suit(suit)
+    return run
+
+
+def bench_game_play_round():
+    players = [player.Player('Player %d' % i) for i in range(4)]
+    g = game.Game(players, observers=[], rng=random.Random(SEED))
+    return g.play_round
+
+
+def bench_pimc_game():
+    def run():
+        players = ([player.Player('Player 0', pimc.PimcIntel)] +
+                   [player.Player('Player %d' % i) for i in range(1, 4)])
+        game.Game(players, observers=[], rng=random.Random(SEED)).start()
+    return run
+
+
+def bench_state_apply_undo():
+    rng = random.Random(SEED)
+    cards = list(range(len(card.CARDS)))
+    rng.shuffle(cards)
+    hands = [0] * 4
+    for x in range(4 * rules.HAND_SIZE):
+        hands[x % 4] |= 1 << cards[x]
+    s = state.GameState(card.SPADES, hands, 0)
+    # A whole round of valid moves, then taken back.
+    moves = []
+    while not s.is_over():
+        move = s.valid_moves()
+        move = (move & -move).bit_length() - 1
+        s.apply(move)
+        moves.append(move)
+    backwards = moves[::-1]
+    for move in backwards:
+        s.undo(move)
+
+    def run():
+        for move in moves:
+            s.apply(move)
+        for move in backwards:
+            s.undo(move)
+    return run
+
+
+BENCHMARKS = (
+    ('deck_init', bench_deck_init, 10000),
+    ('deck_shuffle', bench_deck_shuffle, 10000),
+    ('deck_contains', bench_deck_contains, 2000),
+    ('deck_insert_card', bench_deck_insert_card, 20000),
+    ('rules_get_winnind_card', bench_get_winning_card, 1000),
+    ('rules_select_valid_cards', bench_select_valid_cards, 1000),
+    ('hand_get_cards_in_suit', bench_hand_get_cards_in_suit, 1000),
+    ('game_play_round', bench_game_play_round, 500),
+    ('state_apply_undo', bench_state_apply_undo, 2000),
+    ('pimc_game', bench_pimc_game, 3),
+)
+
+
+def run_benchmarks(names=None, repeat=DEFAULT_REPEAT):
+    """
+    Runs the benchmarks, all of them or the ones of the given names,
+    and returns a dict of results. Every benchmark reports the best
+    and mean time per call, in seconds, out of repeat runs.
+    """
+    results = {}
+    for name, setup, number in BENCHMARKS:
+        if names and name not in names:
+            continue
+        times = timeit.repeat(setup(), repeat=repeat, number=number)
+        results[name] = {
+            'number': number,
+            'repeat': repeat,
+            'best': min(times) / number,
+            'mean': sum(times) / len(times) / number,
+        }
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'benchmarks': results,
+    }
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares the best times of results to the ones of baseline. Returns
+    a list of (name, baseline time, time, change) tuples, change being
+    relative, and the names of the benchmarks that regressed.
+    """
+    rows = []
+    regressions = []
+    for name in sorted(results['benchmarks']):
+        if name not in baseline['benchmarks']:
+            continue
+        before = baseline['benchmarks'][name]['best']
+        after = results['benchmarks'][name]['best']
+        change = (after - before) / before
+        rows.append((name, before, after, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def parse_args():
+
+    parser = ArgumentParser(
+            description='Benchmarks the hot paths of forte-fives')
+
+    parser.add_argument('names', nargs='*',
+            help='Benchmarks to run (default: all)')
+    parser.add_argument('-o', '--output',
+            help='JSON file to write the results to')
+    parser.add_argument('-c', '--compare',
+            help='JSON file of earlier results to compare with')
+    parser.add_argument('-t', '--threshold', type=float,
+            default=DEFAULT_THRESHOLD,
+            help='Slowdown allowed when comparing (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT,
+            help='Runs of every benchmark (default: %(default)s)')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_benchmarks(args.names, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if not args.compare:
+        for name in sorted(results['benchmarks']):
+            print('%-28s %12.2f us' % (
+                name, results['benchmarks'][name]['best'] * 1e6))
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(baseline, results, args.threshold)
+    for name, before, after, change in rows:
+        print('%-28s %12.2f us %12.2f us %+7.1f%%%s' % (
+            name, before * 1e6, after * 1e6, change * 100,
+            '  REGRESSION' if name in regressions else ''))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
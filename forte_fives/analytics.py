@@ -0,0 +1,245 @@
+"""
+Streaming analytics over record files.
+
+Records are read one at a time and only running totals are kept, so
+archives of any size are processed in bounded memory. Large archives
+are split into ranges of records, analyzed across a pool of processes,
+and the partial results merged.
+"""
+from forte_fives import card
+from forte_fives import record
+from forte_fives import rules
+
+from argparse import ArgumentParser
+import multiprocessing
+
+
+# Amount of records handed to a worker process at once.
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def _rate(part, total):
+    if not total:
+        return 0.0
+    return float(part) / total
+
+
+def highest_card(r):
+    """
+    Returns the index of the card that got the bonus for the highest
+    card in suit in the given record, or None if no card did.
+    """
+    in_suit = rules.IN_SUIT_STRENGTH[r.suit]
+    highest = None
+    for trick in r.tricks:
+        strength = rules.TRICK_STRENGTH[r.suit][card.CARDS[trick[0]].suit]
+        winning = max(trick, key=strength.__getitem__)
+        if in_suit[winning] >= 0 and (highest is None or
+                                      in_suit[winning] > in_suit[highest]):
+            highest = winning
+    return highest
+
+
+def card_label(suit, index):
+    """
+    Returns the name of the card of the given index within suit: its
+    rank if it is of that suit, 'AH' for the Ace of Hearts otherwise.
+    """
+    c = card.CARDS[index]
+    if c.suit != suit:
+        return 'AH'
+    return c.rank
+
+
+class RoundAggregates(object):
+    """
+    Running totals over records.
+
+    By bid level: rounds and bids made. By playing suit: rounds, bids
+    made and points of the bidding player. By seat: rounds, rounds as
+    the bidding player and points. And how many times each card in suit
+    got the bonus for the highest card, by card label.
+    """
+
+    def __init__(self):
+        self.rounds = 0
+        self.bids = dict((b, 0) for b in rules.BIDS)
+        self.bids_made = dict((b, 0) for b in rules.BIDS)
+        self.suits = dict((s, 0) for s in card.SUITS)
+        self.suits_made = dict((s, 0) for s in card.SUITS)
+        self.suit_points = dict((s, 0) for s in card.SUITS)
+        self.seats = []
+        self.seat_bids = []
+        self.seat_points = []
+        self.highest_cards = {}
+        self.no_highest_card = 0
+
+    def __str__(self):
+        """
+        String representation of RoundAggregates.
+        """
+        lines = ['%d rounds' % self.rounds]
+        for b in rules.BIDS:
+            lines.append('Bid %d: %d rounds, %.1f%% made'
+                         % (b, self.bids[b], 100 * self.bid_success_rate(b)))
+        for s in card.SUITS:
+            lines.append('Suit %s: %d rounds, %.1f%% made, %.2f points'
+                         % (s, self.suits[s], 100 * self.suit_success_rate(s),
+                            self.suit_average_points(s)))
+        for seat in range(len(self.seats)):
+            lines.append('Seat %d: %d bids, %.2f points per round'
+                         % (seat, self.seat_bids[seat],
+                            self.seat_average_points(seat)))
+        for label, count in sorted(self.highest_cards.items(),
+                                   key=lambda item: -item[1]):
+            lines.append('Highest card %s: %.1f%%'
+                         % (label, 100 * _rate(count, self.rounds)))
+        return '\n'.join(lines)
+
+    def _grow(self, seats):
+        while len(self.seats) < seats:
+            self.seats.append(0)
+            self.seat_bids.append(0)
+            self.seat_points.append(0)
+
+    def add(self, r):
+        """
+        Adds a RoundRecord to the totals.
+        """
+        self.rounds += 1
+        made = r.made
+        self.bids[r.bid] = self.bids.get(r.bid, 0) + 1
+        self.bids_made[r.bid] = self.bids_made.get(r.bid, 0) + made
+        self.suits[r.suit] += 1
+        self.suits_made[r.suit] += made
+        self.suit_points[r.suit] += r.points[r.bidder]
+
+        self._grow(r.players)
+        for seat, points in enumerate(r.points):
+            self.seats[seat] += 1
+            self.seat_points[seat] += points
+        self.seat_bids[r.bidder] += 1
+
+        highest = highest_card(r)
+        if highest is None:
+            self.no_highest_card += 1
+        else:
+            label = card_label(r.suit, highest)
+            self.highest_cards[label] = self.highest_cards.get(label, 0) + 1
+
+    def merge(self, other):
+        """
+        Adds the totals of other RoundAggregates to these ones.
+        """
+        self.rounds += other.rounds
+        for totals, others in ((self.bids, other.bids),
+                               (self.bids_made, other.bids_made),
+                               (self.suits, other.suits),
+                               (self.suits_made, other.suits_made),
+                               (self.suit_points, other.suit_points),
+                               (self.highest_cards, other.highest_cards)):
+            for key, value in others.items():
+                totals[key] = totals.get(key, 0) + value
+        self._grow(len(other.seats))
+        for seat in range(len(other.seats)):
+            self.seats[seat] += other.seats[seat]
+            self.seat_bids[seat] += other.seat_bids[seat]
+            self.seat_points[seat] += other.seat_points[seat]
+        self.no_highest_card += other.no_highest_card
+
+    def bid_success_rate(self, bid):
+        """
+        Returns how often a bid of the given level was made.
+        """
+        return _rate(self.bids_made.get(bid, 0), self.bids.get(bid, 0))
+
+    def suit_success_rate(self, suit):
+        """
+        Returns how often the bid was made when playing with suit.
+        """
+        return _rate(self.suits_made[suit], self.suits[suit])
+
+    def suit_average_points(self, suit):
+        """
+        Returns the average points of the bidding player when playing
+        with suit.
+        """
+        return _rate(self.suit_points[suit], self.suits[suit])
+
+    def seat_average_points(self, seat):
+        """
+        Returns the average points per round of the given seat.
+        """
+        return _rate(self.seat_points[seat], self.seats[seat])
+
+    def highest_card_rate(self, label):
+        """
+        Returns how often the card of the given label, see card_label,
+        got the bonus for the highest card.
+        """
+        return _rate(self.highest_cards.get(label, 0), self.rounds)
+
+
+def aggregate(records, aggregates=None):
+    """
+    Adds the records of the given iterable to aggregates, new
+    RoundAggregates by default, and returns them.
+    """
+    if aggregates is None:
+        aggregates = RoundAggregates()
+    for r in records:
+        aggregates.add(r)
+    return aggregates
+
+
+def _analyze_chunk(args):
+    """
+    Worker entry point, aggregates one range of records.
+    """
+    path, start, stop = args
+    return aggregate(record.read_records(path, start, stop))
+
+
+def analyze(path, processes=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Returns the RoundAggregates of the record file at path. The file is
+    split into ranges of chunk_size records, aggregated across a pool
+    of processes. processes defaults to the number of CPUs; with a
+    single process, no pool is used.
+    """
+    count = len(record.RecordReader(path))
+    chunks = [(path, start, min(start + chunk_size, count))
+              for start in range(0, count, chunk_size)]
+    if processes == 1 or len(chunks) <= 1:
+        return aggregate(record.read_records(path))
+
+    aggregates = RoundAggregates()
+    pool = multiprocessing.Pool(processes)
+    try:
+        for chunk in pool.imap_unordered(_analyze_chunk, chunks):
+            aggregates.merge(chunk)
+    finally:
+        pool.close()
+        pool.join()
+
+    return aggregates
+
+
+def parse_args():
+
+    parser = ArgumentParser(description='Analyzes a record file')
+
+    parser.add_argument('path', help='Record file to analyze')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+            help='Worker processes (default: number of CPUs)')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(analyze(args.path, args.processes))
+
+
+if __name__ == '__main__':
+    main()
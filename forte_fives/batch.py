@@ -0,0 +1,115 @@
+"""
+Vectorized rules, to evaluate many games at once with NumPy.
+
+These functions follow the ones in rules, but work on arrays where
+every row is a different game. Cards are encoded by index (see
+card.CARDS), suits by their position in card.SUITS, and hands as
+boolean arrays with a column per card index.
+
+NumPy is an optional dependency: install forte-fives[numpy].
+"""
+from forte_fives import card
+from forte_fives import rules
+
+import numpy
+
+
+# Position of every card within the card order of each suit, by suit
+# index and card index. Cards not in suit are -1.
+IN_SUIT_STRENGTH = numpy.array(
+    [rules.IN_SUIT_STRENGTH[s] for s in card.SUITS], dtype=numpy.int16)
+
+# How strong every card is in a turn, by playing suit index, suit index
+# of the first card played and card index.
+TRICK_STRENGTH = numpy.array(
+    [[rules.TRICK_STRENGTH[s][f] for f in card.SUITS] for s in card.SUITS],
+    dtype=numpy.int16)
+
+# Suit index of every card.
+CARD_SUITS = numpy.array([card.SUITS.index(c.suit) for c in card.CARDS],
+                         dtype=numpy.int8)
+
+_BITS = numpy.arange(len(card.CARDS), dtype=numpy.uint64)
+
+
+def encode_cards(cards):
+    """
+    Returns the array of the indexes of the given cards. cards may be
+    nested lists of cards, e.g. a list of tricks.
+    """
+    if isinstance(cards, card.Card):
+        return cards.index
+    return numpy.array([encode_cards(c) for c in cards], dtype=numpy.int8)
+
+
+def encode_suits(suits):
+    """
+    Returns the array of the suit indexes of the given suits.
+    """
+    return numpy.array([card.SUITS.index(s) for s in suits], dtype=numpy.int8)
+
+
+def masks_to_hands(masks):
+    """
+    Returns the hands of the given card masks (see cardset), as a
+    boolean array of shape (games, 52).
+    """
+    masks = numpy.asarray(masks, dtype=numpy.uint64)
+    return (masks[:, None] >> _BITS & numpy.uint64(1)).astype(bool)
+
+
+def hands_to_masks(hands):
+    """
+    Returns the card masks of the given boolean hands.
+    """
+    return (hands.astype(numpy.uint64) << _BITS).sum(axis=1,
+                                                     dtype=numpy.uint64)
+
+
+def get_winning_positions(tricks, suits):
+    """
+    Returns, for every game, the position of the card that wins the
+    turn, like rules.get_winnind_card does for a single turn.
+
+    tricks is an array of shape (games, players) of the card indexes
+    played in each game, in order. suits is the playing suit index of
+    every game, or a single suit index for all of them.
+    """
+    tricks = numpy.asarray(tricks)
+    suits = numpy.broadcast_to(numpy.asarray(suits), tricks.shape[:1])
+    first = CARD_SUITS[tricks[:, 0]]
+    strength = TRICK_STRENGTH[suits[:, None], first[:, None], tricks]
+    return strength.argmax(axis=1)
+
+
+def get_winning_cards(tricks, suits):
+    """
+    Returns, for every game, the index of the card that wins the turn.
+    Arguments are the same as for get_winning_positions.
+    """
+    tricks = numpy.asarray(tricks)
+    positions = get_winning_positions(tricks, suits)
+    return tricks[numpy.arange(len(tricks)), positions]
+
+
+def select_valid_cards(suits, hands, first_cards):
+    """
+    Returns, for every game, the cards the player is allowed to play,
+    following rules.select_valid_cards, as a boolean array of the same
+    shape as hands.
+
+    suits is the playing suit index of every game, or a single one.
+    hands is a boolean array of shape (games, 52). first_cards is the
+    index of the first card played in every game, -1 if none was.
+    """
+    hands = numpy.asarray(hands, dtype=bool)
+    first_cards = numpy.asarray(first_cards)
+    suits = numpy.broadcast_to(numpy.asarray(suits), first_cards.shape)
+
+    in_suit = hands & (IN_SUIT_STRENGTH[suits] >= 0)
+    # Only following a first card of the playing suit is restricted.
+    led = first_cards >= 0
+    restricted = led & (CARD_SUITS[numpy.where(led, first_cards, 0)] ==
+                        suits)
+    restricted &= in_suit.any(axis=1)
+    return numpy.where(restricted[:, None], in_suit, hands)
@@ -0,0 +1,70 @@
+"""
+Time and node budgets for decisions.
+
+A Game can give every decision of a player a Deadline. Intel
+implementations that search are expected to check it regularly and
+return the best answer found so far once it expires. The ones that
+can't come up with any answer in time raise DeadlineExceeded instead,
+and the Game falls back to a fast policy.
+"""
+import timeit
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline(object):
+    """
+    A budget of seconds, of search nodes, or both. A budget of None is
+    unlimited.
+    """
+
+    def __init__(self, seconds=None, nodes=None, timer=timeit.default_timer):
+        """
+        Starts the clock for a budget of the given seconds and nodes.
+        timer returns the current time, in seconds.
+        """
+        self.seconds = seconds
+        self.nodes = nodes
+        self.timer = timer
+        self.start = timer()
+        self.used = 0
+
+    def elapsed(self):
+        """
+        Returns the seconds spent since the deadline was set.
+        """
+        return self.timer() - self.start
+
+    def remaining(self):
+        """
+        Returns the seconds left, None if time is not limited.
+        """
+        if self.seconds is None:
+            return None
+        return max(0.0, self.seconds - self.elapsed())
+
+    def spend(self, nodes):
+        """
+        Counts nodes against the node budget.
+        """
+        self.used += nodes
+
+    def expired(self):
+        """
+        Returns whether or not the budget is spent.
+        """
+        if self.nodes is not None and self.used >= self.nodes:
+            return True
+        return self.seconds is not None and self.elapsed() >= self.seconds
+
+    def check(self, nodes=0):
+        """
+        Counts nodes against the node budget and raises DeadlineExceeded
+        if the budget is spent.
+        """
+        self.used += nodes
+        if self.expired():
+            raise DeadlineExceeded('Deadline exceeded after %.6f s and %d '
+                                   'nodes' % (self.elapsed(), self.used))
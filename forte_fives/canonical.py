@@ -0,0 +1,119 @@
+"""
+Suit isomorphism.
+
+Given the playing suit, some suits play exactly the same way and can
+be swapped without changing anything about a hand or a position. Clubs
+and spades, the black suits, are ordered the same way in suit and out
+of suit. When neither is the playing suit they can be swapped, and a
+position with spades as the playing suit is the same as the one with
+clubs and spades swapped and clubs as the playing suit. Hearts and
+diamonds can't be swapped: the Ace of Hearts is always in suit.
+
+Every hand or position thus has a canonical representative, which
+caches, strength tables and transposition tables key on. Clubs is the
+playing suit rather than spades, and when the playing suit is red, the
+black suits are swapped if that makes the masks smaller. The functions
+below return the representative along with the permutation of suits
+that leads to it, to map answers back with the inverse permutation.
+
+A permutation is a tuple giving, for every suit index, the index of the
+suit it becomes.
+"""
+from forte_fives import card
+
+
+SUIT_BITS = len(card.RANKS)
+SUIT_MASK = (1 << SUIT_BITS) - 1
+
+IDENTITY = tuple(range(len(card.SUITS)))
+
+# Clubs and spades swapped.
+SWAP_BLACK = tuple(card.SUITS.index({card.CLUBS: card.SPADES,
+                                     card.SPADES: card.CLUBS}.get(s, s))
+                   for s in card.SUITS)
+
+
+def permute(mask, perm):
+    """
+    Returns the mask with the suits permuted.
+    """
+    if perm == IDENTITY:
+        return mask
+    result = 0
+    for s, t in enumerate(perm):
+        result |= (mask >> s * SUIT_BITS & SUIT_MASK) << t * SUIT_BITS
+    return result
+
+
+def permute_index(index, perm):
+    """
+    Returns the index of the card of the given index, suits permuted.
+    """
+    return perm[index // SUIT_BITS] * SUIT_BITS + index % SUIT_BITS
+
+
+def permute_suit(suit, perm):
+    return card.SUITS[perm[card.SUITS.index(suit)]]
+
+
+def inverse(perm):
+    """
+    Returns the permutation undoing perm.
+    """
+    result = [0] * len(perm)
+    for s, t in enumerate(perm):
+        result[t] = s
+    return tuple(result)
+
+
+def permutations(suit):
+    """
+    Returns the permutations leading to the canonical forms of the
+    positions with the given playing suit. Which one it is depends on
+    the position.
+    """
+    if suit == card.SPADES:
+        return (SWAP_BLACK,)
+    if suit == card.CLUBS:
+        return (IDENTITY,)
+    return (IDENTITY, SWAP_BLACK)
+
+
+def canonical_suit(suit):
+    """
+    Returns the playing suit of the canonical forms of the positions
+    with the given playing suit.
+    """
+    return permute_suit(suit, permutations(suit)[0])
+
+
+def canonical_hand(mask, suit):
+    """
+    Returns the canonical (mask, suit) of a hand, and the permutation
+    leading to it.
+    """
+    best = None
+    for perm in permutations(suit):
+        permuted = permute(mask, perm)
+        if best is None or permuted < best[0]:
+            best = (permuted, perm)
+    return best[0], permute_suit(suit, best[1]), best[1]
+
+
+def canonical_position(suit, hands, trick=(), highest=None):
+    """
+    Returns the canonical form of a position of the play phase, as a
+    (suit, hands, trick, highest, perm) tuple. hands holds the mask of
+    every seat, trick the card indexes of the current turn and highest
+    the (card index, seat) tuple of the highest card in suit won so
+    far, or None. perm is the permutation leading to the canonical form.
+    """
+    best = None
+    for perm in permutations(suit):
+        form = (tuple(permute(h, perm) for h in hands),
+                tuple(permute_index(c, perm) for c in trick),
+                highest and (permute_index(highest[0], perm), highest[1]))
+        if best is None or form < best[0]:
+            best = (form, perm)
+    (hands, trick, highest), perm = best
+    return permute_suit(suit, perm), list(hands), list(trick), highest, perm
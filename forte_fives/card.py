@@ -34,11 +34,30 @@ class BadRankException(ForteFivesException):
 
 
 class Card(object):
+    """
+    A playing card. There is a single instance of each of the 52 cards:
+    creating a card returns the already existing one, so cards can be
+    compared by identity.
 
-    def __init__(self, rank, suit):
+    Every card also has an index, from 0 to 51, which follows the order
+    of SUITS and RANKS. It is meant to be used as a key in lookup tables.
+    """
+
+    __slots__ = ('rank', 'suit', 'color', 'index')
+
+    # Existing cards, by (rank, suit).
+    _cards = {}
+
+    def __new__(cls, rank, suit):
         """
-        Initialize rank and suite of the card
+        Returns the card with the given rank and suite
         """
+        try:
+            return cls._cards[(rank, suit)]
+        except (KeyError, TypeError):
+            pass
+
+        self = object.__new__(cls)
         self.rank = rank
         self.suit = suit
 
@@ -48,6 +67,17 @@ class Card(object):
         # Assign card color.
         self.color = SUIT_COLOR[self.suit]
 
+        self.index = SUITS.index(suit) * len(RANKS) + RANKS.index(rank)
+
+        cls._cards[(rank, suit)] = self
+        return self
+
+    def __reduce__(self):
+        """
+        Unpickled cards are the existing card instances as well.
+        """
+        return (Card, (self.rank, self.suit))
+
     def __str__(self):
         """
         Defines how the card should be printed
@@ -90,3 +120,7 @@ class Card(object):
             raise BadRankException("Invalid rank: %s" % self.rank)
         if self.suit not in SUITS:
             raise BadSuitException("Invalid suit: %s" % self.suit)
+
+
+# All the cards, in the order of their index.
+CARDS = tuple(Card(rank, suit) for suit in SUITS for rank in RANKS)
@@ -0,0 +1,167 @@
+"""
+Sets of cards represented as bitmasks.
+
+Bit i of a mask stands for the card of index i (see card.CARDS), which
+makes any set of cards fit in a single 64-bit integer. Membership,
+union, intersection and counting are all single integer operations.
+"""
+from forte_fives import card
+
+
+EMPTY = 0
+
+FULL_MASK = (1 << len(card.CARDS)) - 1
+
+# Mask of every single card, by index.
+CARD_MASKS = tuple(1 << c.index for c in card.CARDS)
+
+ACE_OF_HEARTS_MASK = CARD_MASKS[card.Card('A', card.HEARTS).index]
+
+
+def mask_of(cards):
+    """
+    Returns the mask of the given cards.
+    """
+    mask = 0
+    for c in cards:
+        mask |= CARD_MASKS[c.index]
+    return mask
+
+
+def cards_of(mask):
+    """
+    Returns the cards of the given mask, in the order of their index.
+    """
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(card.CARDS[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+
+def indexes_of(mask):
+    """
+    Returns the indexes of the cards of the given mask, lowest first.
+    """
+    indexes = []
+    while mask:
+        low = mask & -mask
+        indexes.append(low.bit_length() - 1)
+        mask ^= low
+    return indexes
+
+
+def contains(mask, c):
+    """
+    Returns whether or not card c is in the given mask.
+    """
+    return bool(mask & CARD_MASKS[c.index])
+
+
+try:
+    popcount = int.bit_count
+except AttributeError:
+    def popcount(mask):
+        """
+        Returns how many cards are in the given mask.
+        """
+        return bin(mask).count('1')
+
+
+# Cards of each suit.
+SUIT_MASKS = dict((s, mask_of(c for c in card.CARDS if c.suit == s))
+                  for s in card.SUITS)
+
+# Cards considered in suit for each suit. Ace of Hearts is always in.
+IN_SUIT_MASKS = dict((s, SUIT_MASKS[s] | ACE_OF_HEARTS_MASK)
+                     for s in card.SUITS)
+
+# Cards NOT considered in suit for each suit.
+OUT_SUIT_MASKS = dict((s, FULL_MASK & ~IN_SUIT_MASKS[s])
+                      for s in card.SUITS)
+
+
+class CardList(list):
+    """
+    A list of cards which keeps the mask of its cards up to date.
+    It behaves like a regular list, but checking whether a card is in
+    it takes constant time. A card should not be in the list twice.
+    """
+
+    mask = 0
+
+    def __init__(self, cards=(), mask=None):
+        """
+        Initializes the list with the given cards. mask may be given
+        if it is already known.
+        """
+        list.__init__(self, cards)
+        self.mask = mask_of(self) if mask is None else mask
+
+    def __contains__(self, c):
+        """
+        Returns whether or not card c is in the list.
+        """
+        try:
+            return bool(self.mask & CARD_MASKS[c.index])
+        except (AttributeError, TypeError):
+            return list.__contains__(self, c)
+
+    def __setitem__(self, key, value):
+        # key is an index or a slice, value a card or cards.
+        list.__setitem__(self, key, value)
+        self.mask = mask_of(self)
+
+    def __delitem__(self, key):
+        list.__delitem__(self, key)
+        self.mask = mask_of(self)
+
+    if hasattr(list, '__setslice__'):
+        # Python 2 lists take simple slices through these rather than
+        # __setitem__ and __delitem__.
+        def __setslice__(self, i, j, cards):
+            self.__setitem__(slice(i, j), cards)
+
+        def __delslice__(self, i, j):
+            self.__delitem__(slice(i, j))
+
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+
+    def append(self, c):
+        list.append(self, c)
+        self.mask |= 1 << c.index
+
+    def extend(self, cards):
+        cards = list(cards)
+        list.extend(self, cards)
+        self.mask |= mask_of(cards)
+
+    def insert(self, i, c):
+        list.insert(self, i, c)
+        self.mask |= 1 << c.index
+
+    def _forget(self, c):
+        """
+        Clears card c, just taken out, from the mask, unless it is in
+        the list again.
+        """
+        # Unless the list held a card twice, it now holds one card less
+        # than the mask, and no need to look for c.
+        if (len(self) < popcount(self.mask) or
+                not list.__contains__(self, c)):
+            self.mask &= ~(1 << c.index)
+
+    def pop(self, *args):
+        c = list.pop(self, *args)
+        self._forget(c)
+        return c
+
+    def remove(self, c):
+        list.remove(self, c)
+        self._forget(c)
+
+    def clear(self):
+        del self[:]
@@ -0,0 +1,691 @@
+"""
+Counterfactual regret minimization of bidding and discarding.
+
+Bidding (Game.start_bidding) and discarding (Game.improve_cards) are
+trained offline with external sampling Monte Carlo CFR, over an
+abstraction of the round:
+
+* A hand is reduced to a bucket of hand strength features: how many
+  cards in suit it holds, and how many of those are top cards, for
+  the suit the hand is strongest in, see suit_features.
+* Bidding decisions are told apart by the current bid and the bucket.
+  The bidder selects the suit its hand is strongest in.
+* Discarding is reduced to how many cards to keep, the strongest
+  first, see kept_cards. Discard decisions are told apart by whether
+  the player holds the kiddie and the bucket for the playing suit.
+* The cards are then played out by a fast greedy policy, see playout,
+  and every player gets the points it would score in the round.
+
+Training runs batches of iterations across a pool of processes, each
+starting from the current regrets, and adds up what they learned. The
+state of the training is checkpointed after every batch, so it can be
+interrupted and resumed. The result is the average strategy, written
+as a compact policy file that CfrIntel looks decisions up in.
+"""
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import intel
+from forte_fives import rules
+from forte_fives import state
+
+from argparse import ArgumentParser
+import bisect
+import multiprocessing
+import os
+import pickle
+import random
+import struct
+import time
+
+
+MAGIC = b'FFCP'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHHI')
+
+CHECKPOINT_VERSION = 1
+
+# Policy used by CfrIntel, see load_default_policy.
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'cfr.bin')
+
+DEFAULT_ITERATIONS = 1000000
+
+# Iterations handed to a worker process at once.
+DEFAULT_CHUNK_SIZE = 2000
+
+# Cards dealt to the kiddie.
+KIDDIE_SIZE = 3
+
+# Kinds of decisions.
+BID = 0
+DISCARD = 1
+
+# Actions of bid decisions, a pass then every bid.
+BID_ACTIONS = (0,) + rules.BIDS
+# Actions of discard decisions, the amount of cards kept.
+KEEP_ACTIONS = tuple(range(rules.MINIMUM_KEEP, rules.HAND_SIZE + 1))
+MAX_ACTIONS = max(len(BID_ACTIONS), len(KEEP_ACTIONS))
+
+RECORD = struct.Struct('<I%dH' % MAX_ACTIONS)
+
+# Probabilities are stored as cumulative thresholds out of SCALE.
+SCALE = 0xffff
+
+# Cards in suit at least as strong as the Ace of Hearts are top cards.
+_TOP_STRENGTH = dict((s, rules.get_card_order_for_suit(s).index('AH'))
+                     for s in card.SUITS)
+_TOP_CARDS = len(rules.IN_SUIT_ORDER_RED) - _TOP_STRENGTH[card.HEARTS]
+
+
+try:
+    _replace = os.replace
+except AttributeError:
+    # Python 2 has no os.replace: rename only fails to replace an
+    # existing file on Windows.
+    _replace = os.rename
+
+
+class CfrException(Exception):
+    pass
+
+
+###############################################################################
+#
+# Abstraction
+#
+###############################################################################
+def suit_features(mask, suit):
+    """
+    Returns the (cards in suit, top cards in suit) tuple of the hand of
+    the given mask.
+    """
+    strength = rules.IN_SUIT_STRENGTH[suit]
+    top = _TOP_STRENGTH[suit]
+    count = tops = 0
+    for index in cardset.indexes_of(mask & cardset.IN_SUIT_MASKS[suit]):
+        count += 1
+        if strength[index] >= top:
+            tops += 1
+    return count, tops
+
+
+def best_suit(mask):
+    """
+    Returns the suit the hand of the given mask is strongest in: the
+    one with the most top cards, then the most cards in suit.
+    """
+    best = None
+    for suit in card.SUITS:
+        tops_count = suit_features(mask, suit)[::-1]
+        if best is None or tops_count > best[0]:
+            best = (tops_count, suit)
+    return best[1]
+
+
+def bucket(mask, suit):
+    """
+    Returns the bucket of the hand of the given mask, for suit.
+    """
+    count, tops = suit_features(mask, suit)
+    return count * (_TOP_CARDS + 1) + tops
+
+
+def bid_key(mask, current_bid):
+    """
+    Returns the key of the bid decision of the given hand, when
+    current_bid is the highest bid so far, None or 0 if none.
+    """
+    context = BID_ACTIONS.index(current_bid or 0)
+    return BID << 16 | context << 8 | bucket(mask, best_suit(mask))
+
+
+def discard_key(mask, suit):
+    """
+    Returns the key of the discard decision of the given hand, which
+    holds the kiddie if it has more than rules.HAND_SIZE cards.
+    """
+    context = 1 if cardset.popcount(mask) > rules.HAND_SIZE else 0
+    return DISCARD << 16 | context << 8 | bucket(mask, suit)
+
+
+def valid_bid_actions(current_bid):
+    """
+    Returns the indexes of the actions of BID_ACTIONS allowed when
+    current_bid is the highest bid so far.
+    """
+    current_bid = current_bid or 0
+    return [a for a, b in enumerate(BID_ACTIONS) if not b or b > current_bid]
+
+
+def kept_cards(mask, suit, keep):
+    """
+    Returns the mask of the keep strongest cards of the given hand: the
+    cards in suit, strongest first, then the others, the ones that are
+    strongest in their own suit first.
+    """
+    strength = rules.IN_SUIT_STRENGTH[suit]
+    trick_strength = rules.TRICK_STRENGTH[suit]
+    indexes = sorted(
+        cardset.indexes_of(mask),
+        key=lambda c: (strength[c],
+                       trick_strength[card.CARDS[c].suit][c], -c),
+        reverse=True)
+    kept = cardset.EMPTY
+    for index in indexes[:keep]:
+        kept |= 1 << index
+    return kept
+
+
+def playout(suit, hands, leader):
+    """
+    Plays the given hands (masks) out, starting with leader, and
+    returns the finished state.GameState. Every player leads its
+    strongest card, and otherwise plays the weakest card that wins
+    the turn so far, or its weakest card if none does.
+    """
+    s = state.GameState(suit, hands, leader)
+    trick_strength = rules.TRICK_STRENGTH[suit]
+    while not s.is_over():
+        moves = cardset.indexes_of(s.valid_moves())
+        if not s.trick_size:
+            move = max(moves,
+                       key=lambda c: trick_strength[card.CARDS[c].suit][c])
+        else:
+            strength = trick_strength[card.CARDS[s.trick[0]].suit]
+            winning = max(strength[c] for c in s.trick[:s.trick_size])
+            winners = [c for c in moves if strength[c] > winning]
+            move = min(winners or moves, key=strength.__getitem__)
+        s.apply(move)
+    return s
+
+
+###############################################################################
+#
+# Training
+#
+###############################################################################
+def _strategy(regrets, actions):
+    """
+    Returns the probabilities of the given actions by regret matching.
+    """
+    positive = [max(regrets[a], 0.0) for a in actions]
+    total = sum(positive)
+    if total > 0:
+        return [p / total for p in positive]
+    return [1.0 / len(actions)] * len(actions)
+
+
+def _sample(rng, probabilities):
+    """
+    Returns the position of an item of probabilities, drawn at random.
+    """
+    r = rng.random()
+    for i, p in enumerate(probabilities):
+        r -= p
+        if r < 0:
+            return i
+    return len(probabilities) - 1
+
+
+class Trainer(object):
+    """
+    External sampling Monte Carlo CFR over the abstraction of the round.
+
+    regrets and strategy map the key of every decision to the
+    cumulative regret and the cumulative probability of each of its
+    actions.
+    """
+
+    def __init__(self, players=4, regrets=None, strategy=None):
+        self.players = players
+        self.regrets = regrets if regrets is not None else {}
+        self.strategy = strategy if strategy is not None else {}
+        self.iterations = 0
+
+    def _tables(self, key, size):
+        regrets = self.regrets.get(key)
+        if regrets is None:
+            regrets = self.regrets[key] = [0.0] * size
+        strategy = self.strategy.get(key)
+        if strategy is None:
+            strategy = self.strategy[key] = [0.0] * size
+        return regrets, strategy
+
+    def train(self, iterations, rng):
+        """
+        Runs the given amount of iterations, dealing with rng. Every
+        iteration deals a round and traverses it once for every seat.
+        """
+        size = self.players * rules.HAND_SIZE + KIDDIE_SIZE
+        for x in range(iterations):
+            deck = list(range(len(card.CARDS)))
+            rng.shuffle(deck)
+            hands = []
+            for seat in range(self.players):
+                hand = cardset.EMPTY
+                for index in deck[seat * rules.HAND_SIZE:
+                                  (seat + 1) * rules.HAND_SIZE]:
+                    hand |= 1 << index
+                hands.append(hand)
+            kiddie = cardset.EMPTY
+            for index in deck[size - KIDDIE_SIZE:size]:
+                kiddie |= 1 << index
+            stock = deck[size:]
+            for traverser in range(self.players):
+                self._bid(rng, traverser, hands, kiddie, stock, 0, 0, None)
+            self.iterations += 1
+
+    def _bid(self, rng, traverser, hands, kiddie, stock, seat, bid, bidder):
+        """
+        Returns the value for traverser of the bid decision of seat.
+        """
+        if seat == self.players:
+            # If nobody bid, the dealer has to.
+            if bidder is None:
+                bidder, bid = 0, rules.BIDS[0]
+            suit = best_suit(hands[bidder])
+            hands = list(hands)
+            hands[bidder] |= kiddie
+            return self._discard(rng, traverser, hands, stock, 0, bidder, bid,
+                                 suit, 0)
+
+        actions = valid_bid_actions(bid)
+        if len(actions) == 1:
+            return self._bid(rng, traverser, hands, kiddie, stock, seat + 1,
+                             bid, bidder)
+
+        def follow(action):
+            new_bid = BID_ACTIONS[action]
+            if not new_bid:
+                return self._bid(rng, traverser, hands, kiddie, stock,
+                                 seat + 1, bid, bidder)
+            return self._bid(rng, traverser, hands, kiddie, stock, seat + 1,
+                             new_bid, seat)
+
+        key = bid_key(hands[seat], bid)
+        return self._decide(rng, traverser, seat, key, len(BID_ACTIONS),
+                            actions, follow)
+
+    def _discard(self, rng, traverser, hands, stock, drawn, bidder, bid, suit,
+                 position):
+        """
+        Returns the value for traverser of the discard decision of the
+        seat at the given position from the bidder.
+        """
+        if position == self.players:
+            s = playout(suit, hands, bidder)
+            points = s.score(traverser)
+            if traverser == bidder and points < bid:
+                return float(-bid)
+            return float(points)
+
+        seat = (bidder + position) % self.players
+        mask = hands[seat]
+
+        def follow(action):
+            keep = KEEP_ACTIONS[action]
+            hand = kept_cards(mask, suit, keep)
+            for index in stock[drawn:drawn + rules.HAND_SIZE - keep]:
+                hand |= 1 << index
+            new_hands = list(hands)
+            new_hands[seat] = hand
+            return self._discard(rng, traverser, new_hands, stock,
+                                 drawn + rules.HAND_SIZE - keep, bidder, bid,
+                                 suit, position + 1)
+
+        key = discard_key(mask, suit)
+        return self._decide(rng, traverser, seat, key, len(KEEP_ACTIONS),
+                            range(len(KEEP_ACTIONS)), follow)
+
+    def _decide(self, rng, traverser, seat, key, size, actions, follow):
+        """
+        Returns the value for traverser of the decision of seat with the
+        given key. follow returns the value of taking an action.
+        Decisions of the traverser try every action and update the
+        regrets. The other ones sample an action and update the
+        strategy.
+        """
+        actions = list(actions)
+        regrets, strategy = self._tables(key, size)
+        probabilities = _strategy(regrets, actions)
+        if seat != traverser:
+            for a, p in zip(actions, probabilities):
+                strategy[a] += p
+            return follow(actions[_sample(rng, probabilities)])
+
+        values = [follow(a) for a in actions]
+        value = sum(p * v for p, v in zip(probabilities, values))
+        for a, v in zip(actions, values):
+            regrets[a] += v - value
+        return value
+
+    def policy(self):
+        """
+        Returns the average strategy, as a dict of decision key to the
+        probability of each action.
+        """
+        policy = {}
+        for key, sums in self.strategy.items():
+            total = sum(sums)
+            if total > 0:
+                policy[key] = tuple(s / total for s in sums)
+        return policy
+
+
+def _copy(table):
+    return dict((key, list(values)) for key, values in table.items())
+
+
+def _add(table, other, base=None):
+    """
+    Adds the values of other to table, less those of base, if given.
+    """
+    for key, values in other.items():
+        old = base.get(key) if base is not None else None
+        target = table.get(key)
+        if target is None:
+            target = table[key] = [0.0] * len(values)
+        for a, v in enumerate(values):
+            target[a] += v - (old[a] if old is not None else 0.0)
+
+
+def _train_chunk(args):
+    """
+    Worker entry point, runs the iterations of one chunk from the given
+    regrets and returns what they added to the regrets and strategy.
+    """
+    regrets, players, iterations, seed = args
+    trainer = Trainer(players, _copy(regrets))
+    trainer.train(iterations, random.Random(seed))
+    deltas = {}
+    _add(deltas, trainer.regrets, regrets)
+    return deltas, trainer.strategy
+
+
+def chunk_seed(seed, chunk):
+    """
+    Returns the seed of the rng of the given chunk of a training.
+    """
+    return (seed or 0) << 32 | chunk
+
+
+def write_checkpoint(trainer, chunks, seed, path):
+    """
+    Writes the state of a training, after the given amount of chunks,
+    to the given file. The file is replaced at once, so an interrupted
+    write leaves the previous checkpoint in place.
+    """
+    data = {'version': CHECKPOINT_VERSION, 'players': trainer.players,
+            'iterations': trainer.iterations, 'chunks': chunks,
+            'seed': seed, 'regrets': trainer.regrets,
+            'strategy': trainer.strategy}
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        pickle.dump(data, f, 2)
+    _replace(temporary, path)
+
+
+def read_checkpoint(path):
+    """
+    Reads a checkpoint written by write_checkpoint and returns a
+    (trainer, chunks, seed) tuple.
+    """
+    with open(path, 'rb') as f:
+        try:
+            data = pickle.load(f)
+        except Exception:
+            raise CfrException('%s is not a checkpoint' % path)
+    if not isinstance(data, dict) or (
+            data.get('version') != CHECKPOINT_VERSION):
+        raise CfrException('%s is not a checkpoint' % path)
+    trainer = Trainer(data['players'], data['regrets'], data['strategy'])
+    trainer.iterations = data['iterations']
+    return trainer, data['chunks'], data['seed']
+
+
+def train(iterations=DEFAULT_ITERATIONS, players=4, seed=None,
+          processes=None, chunk_size=DEFAULT_CHUNK_SIZE, checkpoint=None,
+          seconds=None):
+    """
+    Trains across a pool of processes and returns the Trainer.
+
+    Each batch hands a chunk of chunk_size iterations to every process,
+    all starting from the regrets left by the batch before. If
+    checkpoint is given, the training resumes from that file if it
+    exists, and writes it after every batch. Training stops once the
+    given amount of iterations ran, or after the batch that ran out
+    of seconds. Given the seed and the amount of processes, the result
+    does not depend on how often the training was interrupted.
+    """
+    trainer = Trainer(players)
+    chunks = 0
+    if checkpoint is not None and os.path.exists(checkpoint):
+        trainer, chunks, seed = read_checkpoint(checkpoint)
+        if trainer.players != players:
+            raise CfrException('%s was trained for %d players'
+                               % (checkpoint, trainer.players))
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    end = time.time() + seconds if seconds is not None else None
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        while trainer.iterations < iterations:
+            if end is not None and time.time() >= end:
+                break
+            left = iterations - trainer.iterations
+            tasks = []
+            while left > 0 and len(tasks) < processes:
+                size = min(chunk_size, left)
+                tasks.append((trainer.regrets, players, size,
+                              chunk_seed(seed, chunks + len(tasks))))
+                left -= size
+            for (regrets, strategy), task in zip(
+                    pool.map(_train_chunk, tasks), tasks):
+                _add(trainer.regrets, regrets)
+                _add(trainer.strategy, strategy)
+                trainer.iterations += task[2]
+            chunks += len(tasks)
+            if checkpoint is not None:
+                write_checkpoint(trainer, chunks, seed, checkpoint)
+    finally:
+        pool.close()
+        pool.join()
+
+    return trainer
+
+
+###############################################################################
+#
+# Policy files
+#
+###############################################################################
+def write_policy(policy, path, players=4):
+    """
+    Writes a dict of decision key to action probabilities to the given
+    file.
+    """
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, players, len(policy)))
+        for key in sorted(policy):
+            thresholds = []
+            total = 0.0
+            for p in policy[key]:
+                total += p
+                thresholds.append(min(int(round(total * SCALE)), SCALE))
+            thresholds[-1] = SCALE
+            thresholds += [SCALE] * (MAX_ACTIONS - len(thresholds))
+            f.write(RECORD.pack(key, *thresholds))
+
+
+def read_policy(path):
+    """
+    Reads a policy written by write_policy and returns it as a Policy.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise CfrException('%s is not a policy' % path)
+    magic, version, players, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise CfrException('%s is not a policy' % path)
+    if len(data) != HEADER.size + count * RECORD.size:
+        raise CfrException('%s is truncated' % path)
+
+    thresholds = {}
+    for offset in range(HEADER.size, len(data), RECORD.size):
+        record = RECORD.unpack_from(data, offset)
+        thresholds[record[0]] = record[1:]
+    return Policy(thresholds, players)
+
+
+class Policy(object):
+    """
+    Trained strategy, as read from a policy file.
+    """
+
+    def __init__(self, thresholds, players=4):
+        """
+        Initializes the policy with a dict of decision key to the
+        cumulative thresholds of its actions, out of SCALE.
+        """
+        self.thresholds = thresholds
+        self.players = players
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def probabilities(self, key):
+        """
+        Returns the probability of each action of the decision of the
+        given key, None if the decision is unknown.
+        """
+        thresholds = self.thresholds.get(key)
+        if thresholds is None:
+            return None
+        previous = 0
+        probabilities = []
+        for t in thresholds:
+            probabilities.append(float(t - previous) / SCALE)
+            previous = t
+        return tuple(probabilities)
+
+    def sample(self, key, rng):
+        """
+        Returns the index of an action of the decision of the given key,
+        drawn with rng, None if the decision is unknown.
+        """
+        thresholds = self.thresholds.get(key)
+        if thresholds is None:
+            return None
+        return bisect.bisect_right(thresholds, rng.randrange(SCALE))
+
+
+_default_policy = None
+
+
+def load_default_policy():
+    """
+    Returns the policy at DEFAULT_PATH, None if there is none. The
+    policy is only read once.
+    """
+    global _default_policy
+    if _default_policy is None and os.path.exists(DEFAULT_PATH):
+        _default_policy = read_policy(DEFAULT_PATH)
+    return _default_policy
+
+
+class CfrIntel(intel.Intel):
+    """
+    Intel that bids, selects the suit and discards following a trained
+    policy. Falls back to Intel for decisions missing from the policy.
+    """
+
+    def __init__(self, player, rng=None, policy=None):
+        """
+        Initializer of CfrIntel. policy defaults to the one loaded by
+        load_default_policy.
+        """
+        intel.Intel.__init__(self, player, rng)
+        self.policy = policy if policy is not None else load_default_policy()
+
+    def _sample(self, key):
+        if self.policy is None:
+            return None
+        return self.policy.sample(key, self.rng)
+
+    def should_bid(self, current_bid):
+        """
+        Places the bid the policy draws.
+        """
+        if not rules.select_valid_bids(current_bid):
+            return 0
+        action = self._sample(bid_key(self.player.hand.mask, current_bid))
+        if action is None:
+            return intel.Intel.should_bid(self, current_bid)
+        return BID_ACTIONS[action]
+
+    def select_suit(self):
+        """
+        Returns the suit the hand is strongest in, as the policy was
+        trained with.
+        """
+        if self.policy is None:
+            return intel.Intel.select_suit(self)
+        return best_suit(self.player.hand.mask)
+
+    def select_discard_cards(self, suit):
+        """
+        Keeps the amount of cards the policy draws, the strongest ones.
+        """
+        mask = self.player.hand.mask
+        action = self._sample(discard_key(mask, suit))
+        if action is None:
+            return intel.Intel.select_discard_cards(self, suit)
+        kept = kept_cards(mask, suit, KEEP_ACTIONS[action])
+        return [c for c in self.player.hand if not kept >> c.index & 1]
+
+
+def parse_args():
+
+    parser = ArgumentParser(
+            description='Trains the bidding and discard policy with CFR')
+
+    parser.add_argument('-o', '--output', default=DEFAULT_PATH,
+            help='Policy file to write (default: %(default)s)')
+    parser.add_argument('-c', '--checkpoint', default=None,
+            help='Checkpoint file to resume from and to write after '
+                 'every batch')
+    parser.add_argument('-i', '--iterations', type=int,
+            default=DEFAULT_ITERATIONS,
+            help='Iterations to run in total (default: %(default)s)')
+    parser.add_argument('-t', '--hours', type=float, default=None,
+            help='Stop after the batch that runs out of HOURS')
+    parser.add_argument('-p', '--players', type=int, default=4,
+            help='Number of players (default: %(default)s)')
+    parser.add_argument('-s', '--seed', type=int, default=0,
+            help='Seed of the deals (default: %(default)s)')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+            help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Iterations per worker and batch (default: %(default)s)')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    seconds = args.hours * 3600 if args.hours is not None else None
+    trainer = train(args.iterations, args.players, args.seed, args.processes,
+                    args.chunk_size, args.checkpoint, seconds)
+    policy = trainer.policy()
+    directory = os.path.dirname(args.output)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    write_policy(policy, args.output, args.players)
+    print('%d iterations, %d decisions written to %s'
+          % (trainer.iterations, len(policy), args.output))
+
+
+if __name__ == '__main__':
+    main()
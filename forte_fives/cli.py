@@ -7,6 +7,11 @@ from forte_fives import rules
 from argparse import ArgumentParser
 from textwrap import dedent
 
+try:
+    input = raw_input
+except NameError:
+    pass
+
 
 class CliPlayer(Player):
     """Define player that performs actions based on user input."""
@@ -25,7 +30,7 @@ class CliPlayer(Player):
                 What is your bid? (Press ENTER skip): """
                 .format(valid_bids))
 
-            raw_bid = raw_input(message).strip()
+            raw_bid = input(message).strip()
             try:
                 bid = int(raw_bid or 0)
             except ValueError:
@@ -44,7 +49,7 @@ class CliPlayer(Player):
 
         while True:
             self._display_suits(with_choice=False)
-            suit = raw_input('Choose suit: ').strip()
+            suit = input('Choose suit: ').strip()
             if not suit:
                 print('A suit must be selected!')
                 continue
@@ -63,7 +68,7 @@ class CliPlayer(Player):
         self._display_hand(with_choice=True)
 
         while True:
-            raw_card_index = raw_input('Enter card selection: ').strip()
+            raw_card_index = input('Enter card selection: ').strip()
             if not raw_card_index:
                 print('A card must be chosen!')
                 continue
@@ -98,7 +103,7 @@ class CliPlayer(Player):
 
         while len(selected_cards) < max_amount:
             # TODO: Indicate how many cards must be discarded.
-            raw_card_index = raw_input('Enter card selection [Press ENTER to end]: ').strip()
+            raw_card_index = input('Enter card selection [Press ENTER to end]: ').strip()
             try:
                 card_index = int(raw_card_index or -1)
             except ValueError:
@@ -107,7 +112,7 @@ class CliPlayer(Player):
 
             if card_index == -1:
                 if len(self.hand) - len(selected_cards) > rules.HAND_SIZE:
-                    print 'Not enough cards discarded.'
+                    print('Not enough cards discarded.')
                     continue
 
                 break
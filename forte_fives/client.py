@@ -0,0 +1,169 @@
+"""
+A small client of the game server, Python 3 only.
+
+An agent makes the decisions: RandomAgent picks any valid answer, for
+testing the server, while ConsoleAgent asks the user. See
+forte_fives.server for the protocol.
+"""
+from forte_fives import card
+from forte_fives import instrument
+from forte_fives import server
+
+from argparse import ArgumentParser
+import asyncio
+import json
+import random
+
+
+def card_names(indexes):
+    return ', '.join(str(card.CARDS[i]) for i in indexes)
+
+
+class Agent(object):
+    """
+    Base class for agents. decide is given every request message and
+    returns the answer, or a coroutine returning it. event is given
+    every other message.
+    """
+
+    def decide(self, request):
+        raise NotImplementedError()
+
+    def event(self, message):
+        """
+        Ignores messages by default.
+        """
+
+
+class RandomAgent(Agent):
+    """
+    Picks a random valid answer to every request.
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+
+    def decide(self, request):
+        if request['decision'] == instrument.SELECT_DISCARD_CARDS:
+            amount = self.rng.randint(request['minimum'], request['maximum'])
+            return self.rng.sample(request['hand'], amount)
+        return self.rng.choice(request['options'])
+
+
+class ConsoleAgent(Agent):
+    """
+    Prints the game and asks the user for every decision.
+    """
+
+    def event(self, message):
+        if message['type'] == 'error':
+            print(message['message'])
+        elif message['type'] != 'event':
+            return
+        elif message['event'] == 'card_played':
+            print('%s played %s' % (message['player'],
+                                    card.CARDS[message['card']]))
+        elif message['event'] == 'trick_finished':
+            print('Winner is %s, score: %s' % (message['player'],
+                                               message['scores']))
+        elif message['event'] == 'bid_placed':
+            print('%s bid %s' % (message['player'], message['bid'] or 'pass'))
+        elif message['event'] == 'suit_selected':
+            print('%s selected %s' % (message['player'], message['suit']))
+        elif message['event'] == 'game_finished':
+            print('%s won the game!' % message['winner'])
+
+    async def prompt(self, text):
+        loop = asyncio.get_event_loop()
+        return (await loop.run_in_executor(None, input, text)).strip()
+
+    async def decide(self, request):
+        print('Your hand is: %s' % card_names(request['hand']))
+        decision = request['decision']
+        if decision == instrument.SELECT_DISCARD_CARDS:
+            while True:
+                answer = await self.prompt(
+                    'Cards to discard, by position, %d to %d of them: '
+                    % (request['minimum'], request['maximum']))
+                try:
+                    return [request['hand'][int(i)] for i in answer.split()]
+                except (ValueError, IndexError):
+                    print('%s is not a valid selection!' % answer)
+
+        options = request['options']
+        if decision == instrument.SELECT_BEST_CARD:
+            print('Cards played: %s' % card_names(request['trick']))
+            labels = [str(card.CARDS[i]) for i in options]
+        else:
+            labels = [str(o) for o in options]
+        for index, label in enumerate(labels):
+            print('[%d] %s' % (index, label))
+        while True:
+            answer = await self.prompt('Your choice: ')
+            try:
+                return options[int(answer)]
+            except (ValueError, IndexError):
+                print('%s is not a valid selection!' % answer)
+
+
+async def play(agent, name, host=server.DEFAULT_HOST,
+               port=server.DEFAULT_PORT):
+    """
+    Joins a table of the server at host and port under the given name,
+    plays it with agent and returns the name of the winner, None if the
+    connection was lost before the end of the game.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    winner = None
+    try:
+        writer.write((json.dumps({'type': 'hello', 'name': name}) +
+                      '\n').encode('utf-8'))
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line.decode('utf-8'))
+            if message['type'] != 'request':
+                agent.event(message)
+                if message.get('event') == 'game_finished':
+                    winner = message['winner']
+                continue
+            answer = agent.decide(message)
+            if asyncio.iscoroutine(answer):
+                answer = await answer
+            writer.write((json.dumps({'id': message['id'],
+                                      'answer': answer}) +
+                          '\n').encode('utf-8'))
+            await writer.drain()
+    finally:
+        writer.close()
+    return winner
+
+
+def parse_args():
+
+    parser = ArgumentParser(description='Plays 45s on a game server')
+
+    parser.add_argument('--host', default=server.DEFAULT_HOST,
+            help='Address of the server (default: %s)' % server.DEFAULT_HOST)
+    parser.add_argument('-p', '--port', type=int, default=server.DEFAULT_PORT,
+            help='Port of the server (default: %d)' % server.DEFAULT_PORT)
+    parser.add_argument('-n', '--name', default='myself',
+            help='Name at the table (default: myself)')
+    parser.add_argument('--random', action='store_true',
+            help='Play random valid moves instead of asking')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    agent = RandomAgent() if args.random else ConsoleAgent()
+    try:
+        asyncio.run(play(agent, args.name, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
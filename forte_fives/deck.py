@@ -1,4 +1,5 @@
 from forte_fives import card
+from forte_fives import cardset
 
 
 import random
@@ -6,22 +7,39 @@ import random
 
 class Deck(object):
 
-    def __init__(self):
+    def __init__(self, rng=None):
         """
-        Initialize deck class
+        Initialize deck class. rng is the random.Random instance used
+        to shuffle the deck, the random module is used if None.
         """
-        # Create 52 cards
-        self.cards = []
-        for suit in card.SUITS:
-            for rank in card.RANKS:
-                self.cards.append(card.Card(rank, suit))
+        self.rng = rng if rng is not None else random
+        # Take all 52 cards
+        self.cards = cardset.CardList(card.CARDS, cardset.FULL_MASK)
+
+    @property
+    def cards(self):
+        """
+        List of cards in the deck. It also keeps the mask of the cards.
+        """
+        return self._cards
+
+    @cards.setter
+    def cards(self, cards):
+        self._cards = cardset.CardList(cards)
+
+    @property
+    def mask(self):
+        """
+        Mask of the cards in the deck, see cardset.
+        """
+        return self._cards.mask
 
     def __str__(self):
         """
         Defines how the deck should be printed
         """
         string = ""
-        for card in self.cards:
+        for card in self._cards:
             string += str(card) + "\t"
         return string
 
@@ -29,7 +47,7 @@ class Deck(object):
         """
         Returns how many cards in the deck
         """
-        return len(self.cards)
+        return len(self._cards)
 
     def __contains__(self, unknown_card):
         """
@@ -37,11 +55,9 @@ class Deck(object):
         in the deck.
         """
         if type(unknown_card) != card.Card:
-            raise card.BadCardException('Card of type %s' % str(type(card)))
-        for c in self.cards:
-            if str(c) == str(unknown_card):
-                return True
-        return False
+            raise card.BadCardException('Card of type %s'
+                                        % str(type(unknown_card)))
+        return cardset.contains(self._cards.mask, unknown_card)
 
     ###########################################################################
     #
@@ -52,8 +68,8 @@ class Deck(object):
         """
         Removes and returns the last card of the deck.
         """
-        if len(self) > 0:
-            return self.cards.pop()
+        if self._cards:
+            return self._cards.pop()
         return None
 
     def insert_card(self, new_card):
@@ -65,10 +81,13 @@ class Deck(object):
         if new_card in self:
             raise card.BadCardException('Card already in deck %s'
                                         % str(new_card))
-        self.cards.append(new_card)
+        self._cards.append(new_card)
 
     def shuffle(self):
         """
         Shuffles the whole deck
         """
-        random.shuffle(self.cards)
+        # Shuffle a plain list, the mask does not change anyway.
+        cards = list(self._cards)
+        self.rng.shuffle(cards)
+        self._cards = cardset.CardList(cards, self._cards.mask)
@@ -0,0 +1,320 @@
+"""
+Bot decisions made in worker processes, Python 3 only.
+
+A search running in the event loop of the game server holds up every
+table, the ones with remote players included. PoolPlayers send their
+bids and card plays to a Dispatcher instead, which hands them to a
+pool of worker processes and awaits the answers.
+
+Decisions carry a compact state: the hand as a mask, the cards played
+as indexes and whatever the intel learned about the round, see
+Intel.snapshot. The worker restores an intel of the same class from it.
+Decisions of all the tables are batched, to pay for a trip to a worker
+once for many of them. Decisions of tables that are abandoned are
+dropped before being sent, and the batches left with nothing to decide
+are cancelled before a worker picks them up.
+
+Decisions cheap enough to make in the event loop, once many of them are
+grouped, go to a Batcher instead: BatchPlayers hand it the card plays of
+all the tables, which a neural.Network evaluates at once.
+"""
+from forte_fives import budget
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import hand
+from forte_fives import instrument
+from forte_fives import intel
+from forte_fives import player
+from forte_fives import server
+
+import asyncio
+import concurrent.futures
+import random
+
+
+# Most decisions sent to a worker at once.
+DEFAULT_BATCH_SIZE = 32
+
+# Seconds a decision waits for others to fill a batch.
+DEFAULT_BATCH_DELAY = 0.001
+
+# Share of the time left for a decision that the worker gets. The rest
+# covers the wait for a batch and the trips to the worker and back.
+WORKER_SHARE = 0.8
+
+
+class Decision(object):
+    """
+    A decision to make in a worker: calling method, an Intel method, of
+    an intel_class intel with args. hand is the mask of the cards of the
+    player, state the snapshot of the intel, seed the seed of its
+    random.Random and seconds the time it has, None for no limit. Cards
+    in args are given by index.
+    """
+
+    def __init__(self, intel_class, hand, state, method, args, seed,
+                 seconds=None):
+        self.intel_class = intel_class
+        self.hand = hand
+        self.state = state
+        self.method = method
+        self.args = tuple(args)
+        self.seed = seed
+        self.seconds = seconds
+
+
+def decide(decision):
+    """
+    Makes a Decision and returns the result, a card index for a card.
+    """
+    p = player.Player(None, decision.intel_class)
+    p.set_hand(hand.Hand())
+    p.hand.cards = cardset.cards_of(decision.hand)
+    p.intel.rng = random.Random(decision.seed)
+    p.intel.restore(decision.state)
+    if decision.seconds is not None:
+        p.intel.deadline = budget.Deadline(decision.seconds)
+
+    if decision.method == instrument.SELECT_BEST_CARD:
+        suit, trick = decision.args
+        return p.intel.select_best_card(
+            suit, [card.CARDS[i] for i in trick]).index
+    return getattr(p.intel, decision.method)(*decision.args)
+
+
+def decide_batch(decisions):
+    """
+    Worker entry point, makes a list of decisions. Returns, for each of
+    them, a (True, result) tuple or an (False, exception) one.
+    """
+    results = []
+    for decision in decisions:
+        try:
+            results.append((True, decide(decision)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+class Dispatcher(object):
+    """
+    Sends decisions to a pool of worker processes, in batches.
+    """
+
+    def __init__(self, processes=None, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_delay=DEFAULT_BATCH_DELAY, executor=None):
+        """
+        Initializes a dispatcher with a pool of the given amount of
+        processes, the number of CPUs by default, or with the given
+        concurrent.futures executor. A batch is sent once batch_size
+        decisions are waiting, or batch_delay seconds after the first
+        one.
+        """
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(processes)
+        self.executor = executor
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.batches = 0
+        self.decisions = 0
+        self._queue = []
+        self._timer = None
+        self._running = set()
+
+    async def submit(self, decision):
+        """
+        Returns the result of the decision, made in a worker. Raises
+        what the decision raised.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._queue.append((decision, future))
+        if len(self._queue) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_delay, self.flush)
+        return await future
+
+    def flush(self):
+        """
+        Sends the waiting decisions to a worker right away.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Decisions awaited by abandoned tables are cancelled already.
+        pending = [(d, f) for d, f in self._queue if not f.cancelled()]
+        self._queue = []
+        if not pending:
+            return
+
+        batch = asyncio.get_event_loop().run_in_executor(
+            self.executor, decide_batch, [d for d, f in pending])
+        self.batches += 1
+        self.decisions += len(pending)
+        self._running.add(batch)
+        batch.add_done_callback(
+            lambda batch: self._finished(pending, batch))
+
+        def abandoned(future):
+            if all(f.cancelled() for d, f in pending):
+                batch.cancel()
+
+        for d, f in pending:
+            f.add_done_callback(abandoned)
+
+    def _finished(self, pending, batch):
+        self._running.discard(batch)
+        if batch.cancelled():
+            return
+        if batch.exception() is not None:
+            for d, f in pending:
+                if not f.done():
+                    f.set_exception(batch.exception())
+            return
+        for (d, f), (ok, value) in zip(pending, batch.result()):
+            if f.done():
+                continue
+            if ok:
+                f.set_result(value)
+            else:
+                f.set_exception(value)
+
+    def close(self):
+        """
+        Cancels every decision not made yet and shuts the pool down.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for d, f in self._queue:
+            f.cancel()
+        self._queue = []
+        for batch in list(self._running):
+            batch.cancel()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class PoolPlayer(server.AsyncPlayer):
+    """
+    A bot whose bids and card plays are made by a Dispatcher. Suits and
+    discards take no search and are decided right away.
+    """
+
+    def __init__(self, name, intel_class=intel.Intel, dispatcher=None):
+        """
+        Initializes the player. intel_class must pickle, to be sent to
+        the workers: a class, or a functools.partial of one.
+        """
+        server.AsyncPlayer.__init__(self, name, intel_class)
+        self.intel_class = intel_class
+        self.dispatcher = dispatcher
+
+    def decision(self, method, *args):
+        """
+        Returns the Decision of the given Intel method and args.
+        """
+        deadline = self.intel.deadline
+        seconds = None
+        if deadline is not None and deadline.seconds is not None:
+            seconds = deadline.remaining() * WORKER_SHARE
+        return Decision(self.intel_class, self.hand.mask,
+                        self.intel.snapshot(), method, args,
+                        self.intel.rng.getrandbits(64), seconds)
+
+    async def async_place_bid(self, current_bid):
+        return await self.dispatcher.submit(
+            self.decision(instrument.SHOULD_BID, current_bid))
+
+    async def async_play_card(self, suit, cards_played):
+        index = await self.dispatcher.submit(
+            self.decision(instrument.SELECT_BEST_CARD, suit,
+                          [c.index for c in cards_played]))
+        return self.play_pending_card(card.CARDS[index], suit, cards_played)
+
+
+class Batcher(object):
+    """
+    Makes decisions in batches, in the event loop, with a function
+    deciding many of them at once, such as neural.Network.decide.
+    """
+
+    def __init__(self, decide, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_delay=DEFAULT_BATCH_DELAY):
+        """
+        Initializes a batcher calling decide with a list of requests,
+        which returns the list of their results. A batch is decided
+        once batch_size requests are waiting, or batch_delay seconds
+        after the first one.
+        """
+        self.decide = decide
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.batches = 0
+        self.decisions = 0
+        self._queue = []
+        self._timer = None
+
+    async def submit(self, request):
+        """
+        Returns the result of the request. Raises what decide raised.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._queue.append((request, future))
+        if len(self._queue) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_delay, self.flush)
+        return await future
+
+    def flush(self):
+        """
+        Decides the waiting requests right away.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending = [(r, f) for r, f in self._queue if not f.cancelled()]
+        self._queue = []
+        if not pending:
+            return
+
+        self.batches += 1
+        self.decisions += len(pending)
+        try:
+            results = self.decide([r for r, f in pending])
+        except Exception as e:
+            for r, f in pending:
+                f.set_exception(e)
+            return
+        for (r, f), result in zip(pending, results):
+            f.set_result(result)
+
+    def close(self):
+        """
+        Cancels every request not decided yet.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for r, f in self._queue:
+            f.cancel()
+        self._queue = []
+
+
+class BatchPlayer(server.AsyncPlayer):
+    """
+    A bot whose card plays are decided by a Batcher. Its intel turns a
+    card play into a request, with an observation method such as the
+    one of neural.NeuralIntel. Other decisions are made right away.
+    """
+
+    def __init__(self, name, intel_class, batcher=None):
+        server.AsyncPlayer.__init__(self, name, intel_class)
+        self.batcher = batcher
+
+    async def async_play_card(self, suit, cards_played):
+        index = await self.batcher.submit(
+            self.intel.observation(suit, cards_played))
+        return self.play_pending_card(card.CARDS[index], suit, cards_played)
@@ -0,0 +1,147 @@
+"""
+Observers get notified about everything that happens during a Game.
+
+A Game does not print anything by itself. Instead, each event is
+forwarded to all its observers. ConsoleObserver reproduces the
+traditional text output, while a Game without observers runs quietly,
+which is what batch simulations want.
+"""
+
+
+class Observer(object):
+    """
+    Base class for Game observers. Every event handler is a no-op,
+    subclasses only need to override the events they care about.
+    """
+
+    def game_started(self, players):
+        """
+        A new game is about to be played by the given players.
+        """
+
+    def deck_shuffled(self, deck):
+        """
+        A new round starts with the given deck, just shuffled.
+        """
+
+    def cards_dealt(self, players, kiddie):
+        """
+        Every player received a hand and the kiddie was set aside.
+        """
+
+    def bid_placed(self, player, bid):
+        """
+        The player placed a bid. A bid of 0 means the player passed.
+        """
+
+    def bidding_finished(self, player, bid):
+        """
+        The player won the bidding with the given bid.
+        """
+
+    def suit_selected(self, player, suit):
+        """
+        The bidding player selected the playing suit.
+        """
+
+    def cards_discarded(self, player, amount):
+        """
+        The player threw out amount cards.
+        """
+
+    def trick_started(self, player):
+        """
+        The player is about to lead a new trick.
+        """
+
+    def card_played(self, player, played_card):
+        """
+        The player played a card in the current trick.
+        """
+
+    def trick_finished(self, winner, winning_card, on_table, score_board):
+        """
+        The winner took the trick made of the cards on_table.
+        """
+
+    def bonus_awarded(self, player, highest_card, score_board):
+        """
+        The player got the extra points for the highest card.
+        """
+
+    def bid_set(self, player, score_before, score_after):
+        """
+        The bidding player did not make the bid and was penalized.
+        """
+
+    def deadline_exceeded(self, player, decision, fell_back):
+        """
+        The player took too long to make the decision, named after the
+        Intel method. If fell_back, the player had no answer and the
+        decision was made by the fallback policy instead.
+        """
+
+    def round_finished(self, bidding_player, bid, made):
+        """
+        A round is over. made tells if the bidding player made the bid.
+        """
+
+    def game_finished(self, winner):
+        """
+        The game is over, winner is the name of the winning player.
+        """
+
+
+class ConsoleObserver(Observer):
+    """
+    Prints the progress of the game to stdout.
+    """
+
+    def game_started(self, players):
+        print('Welcome to Forte Fives!')
+        print('')
+
+    def cards_dealt(self, players, kiddie):
+        for player in players:
+            print('%s : %s' % (player, player.hand))
+        print('Kiddie : %s' % kiddie)
+
+    def bid_placed(self, player, bid):
+        if bid:
+            print('%s has bid %s' % (player, bid))
+        else:
+            print('%s passes on bid.' % player)
+
+    def bidding_finished(self, player, bid):
+        print('Bidding player is %s' % player)
+
+    def suit_selected(self, player, suit):
+        print('Player %s has selected %s suit' % (player, suit))
+
+    def cards_discarded(self, player, amount):
+        print('%s discarded %d cards.' % (player, amount))
+
+    def trick_started(self, player):
+        print('Starting player is %s' % player)
+
+    def card_played(self, player, played_card):
+        print('%s played %s' % (player, played_card))
+
+    def trick_finished(self, winner, winning_card, on_table, score_board):
+        print('Table: %s' % on_table)
+        print('Winner is %s with card %s' % (winner, winning_card))
+        print('Current score:')
+        print(score_board)
+
+    def bonus_awarded(self, player, highest_card, score_board):
+        print('%s had the highest card %s' % (player, highest_card))
+        print('Current score:')
+        print(score_board)
+
+    def bid_set(self, player, score_before, score_after):
+        print('%s did NOT make his bid.' % player)
+        print('Score before the adjustment: %d' % score_before)
+        print('Score after the adjustment: %d' % score_after)
+
+    def game_finished(self, winner):
+        print('The game winner is ' + winner)
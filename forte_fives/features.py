@@ -0,0 +1,109 @@
+"""
+Decisions of played rounds, as plain integer observations.
+
+An observation describes what a player knows when making a decision:
+its hand, the playing suit, the cards on the table, the amount of
+turns played, its game score and the best one of its opponents, and
+the cards it may play. decisions replays recorded rounds (see record)
+into every decision taken in them, with the observation, the action
+and what the player scored in the round: what self-play data and the
+neural network are made of.
+"""
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import record
+
+
+# Kinds of decisions.
+BID = 0
+DISCARD = 1
+CARD = 2
+
+# Fields of an observation.
+OBSERVATION_FIELDS = ('hand', 'suit', 'table', 'tricks', 'score',
+                      'other_score', 'valid')
+
+
+def observation(hand, suit, table=cardset.EMPTY, tricks=0, score=0,
+                other_score=0, valid=cardset.EMPTY):
+    """
+    Returns the observation of a decision, a tuple of plain integers
+    following OBSERVATION_FIELDS. hand, table and valid are masks of
+    the cards in hand, on the table and the ones that may be played.
+    """
+    return (hand, card.SUITS.index(suit), table, tricks, score, other_score,
+            valid)
+
+
+def valid_moves(hand, suit, table_cards):
+    """
+    Returns the mask of the cards of the hand (a mask) that may be
+    played, with the cards of the given indexes on the table, following
+    rules.select_valid_cards.
+    """
+    if table_cards and card.CARDS[table_cards[0]].suit == suit:
+        in_suit = hand & cardset.IN_SUIT_MASKS[suit]
+        if in_suit:
+            return in_suit
+    return hand
+
+
+def _other(scores, seat):
+    others = scores[:seat] + scores[seat + 1:]
+    return max(others) if others else 0
+
+
+def decisions(records):
+    """
+    Generates the (kind, seat, bidder, observation, action, outcome)
+    tuples of the decisions taken in the given records, in order. bidder
+    is the seat of the bidding player. The action of a bid is the bid,
+    0 for a pass, the one of a discard the mask of the cards thrown out
+    and the one of a card play its index. outcome is what the player
+    scored in the round.
+
+    Bids are observed with the playing suit the bidder went on to
+    select. Game scores are rebuilt from the earlier rounds of a game,
+    so the records of a game must come in order, its first round first.
+    """
+    scores = None
+    for r in records:
+        players = r.players
+        if r.round == 0 or scores is None or len(scores) != players:
+            scores = [0] * players
+        played = 0
+        for s in record.Replay(r).states():
+            if s.phase == record.DEALT:
+                for seat in range(players):
+                    yield (BID, seat, r.bidder,
+                           observation(s.hands[seat], r.suit,
+                                       score=scores[seat],
+                                       other_score=_other(scores, seat)),
+                           r.bids[seat], r.points[seat])
+            elif s.phase == record.BIDDING_FINISHED:
+                hands = list(s.hands)
+                hands[r.bidder] |= s.kiddie
+                for x in range(players):
+                    seat = (r.bidder + x) % players
+                    yield (DISCARD, seat, r.bidder,
+                           observation(hands[seat], r.suit,
+                                       score=scores[seat],
+                                       other_score=_other(scores, seat)),
+                           r.discards[seat], r.points[seat])
+            elif s.phase == record.CARD_PLAYED:
+                seat = (s.leader + len(s.trick) - 1) % players
+                c = s.trick[-1]
+                hand = s.hands[seat] | 1 << c
+                table = s.trick[:-1]
+                table_mask = cardset.EMPTY
+                for index in table:
+                    table_mask |= 1 << index
+                current = [v + p for v, p in zip(scores, s.points)]
+                yield (CARD, seat, r.bidder,
+                       observation(hand, r.suit, table_mask,
+                                   played // players, current[seat],
+                                   _other(current, seat),
+                                   valid_moves(hand, r.suit, table)),
+                       c, r.points[seat])
+                played += 1
+        scores = [v + p for v, p in zip(scores, r.points)]
@@ -1,7 +1,16 @@
+from forte_fives import budget
+from forte_fives import card
 from forte_fives import deck
+from forte_fives import events
 from forte_fives import hand
+from forte_fives import instrument
+from forte_fives import intel
 from forte_fives import scoreboard
 from forte_fives import rules
+from forte_fives import state
+
+
+import random
 
 
 class Game(object):
@@ -9,11 +18,34 @@ class Game(object):
     This class represents an instance of a 45s game.
     """
 
-    def __init__(self, players):
+    # Intel making the decisions players run out of time for.
+    fallback_class = intel.Intel
+
+    def __init__(self, players, observers=None, rng=None,
+                 instrumentation=None, move_time=None):
         """
         Initializes a game with the given players.
+        observers are notified of every event in the game. By default,
+        the game is printed to stdout. Use an empty list to play quietly.
+        rng is a random.Random instance used to shuffle the deck. It is
+        also handed to the players so that a game can be reproduced.
+        The random module is used if None.
+        instrumentation, an instrument.Instrumentation, times the phases
+        of every round and the decisions of the players, if given.
+        move_time is the amount of seconds players have for every
+        decision, None for no limit. See decide.
         """
         self.players = players
+        self.rng = rng if rng is not None else random
+        if rng is not None:
+            for player in self.players:
+                player.set_rng(rng)
+        if observers is None:
+            observers = [events.ConsoleObserver()]
+        self.observers = observers
+        self.instrumentation = instrumentation
+        self.move_time = move_time
+        self.update_listeners()
         # Initialize the score board.
         self.score_board = scoreboard.ScoreBoard(
             [p.name for p in self.players])
@@ -22,15 +54,84 @@ class Game(object):
         """
         Starts the game.
         """
-        print "Welcome to Forte Fives!"
-        print
+        self.update_listeners()
+        self.notify('game_started', self.players)
 
         # Should break out of loop, when one of the players
         # hits the high score of 120.
         while self.should_continue():
             self.play_round()
 
-        print 'The game winner is ' + self.score_board.get_winner()
+        winner = self.score_board.get_winner()
+        self.notify('game_finished', winner)
+        return winner
+
+    def update_listeners(self):
+        """
+        Determines who gets notified of the game events: the observers,
+        and the intel of any player which is an observer as well. This
+        is done again at the start of every round.
+        """
+        self.listeners = list(self.observers)
+        for player in self.players:
+            if isinstance(player.intel, events.Observer):
+                self.listeners.append(player.intel)
+
+    def notify(self, event, *args):
+        """
+        Forwards the given event to every listener.
+        """
+        for listener in self.listeners:
+            getattr(listener, event)(*args)
+
+    def measure(self, name, player, func, *args):
+        """
+        Calls func with args and returns its result. The call is timed
+        under name, for the given player name or None, if the game is
+        instrumented.
+        """
+        if self.instrumentation is None:
+            return func(*args)
+        return self.instrumentation.call(name, player, func, *args)
+
+    def decide(self, name, player, func, *args):
+        """
+        Has the player make the decision of the given name, by calling
+        func with args, and returns the decision.
+
+        With a move_time, the player's intel gets a budget.Deadline. If
+        it raises budget.DeadlineExceeded, the decision is made again
+        with fallback_class as the player's intel. Either way, going
+        over time is reported to the observers.
+        """
+        if self.move_time is None:
+            return self.measure(name, player.name, func, *args)
+
+        deadline = budget.Deadline(self.move_time)
+        player.set_deadline(deadline)
+        try:
+            decision = self.measure(name, player.name, func, *args)
+        except budget.DeadlineExceeded:
+            self.notify('deadline_exceeded', player, name, True)
+            return self.fall_back(player, func, *args)
+        finally:
+            player.set_deadline(None)
+
+        if deadline.expired():
+            self.notify('deadline_exceeded', player, name, False)
+        return decision
+
+    def fall_back(self, player, func, *args):
+        """
+        Calls func with args while the player's intel is replaced by
+        one of fallback_class.
+        """
+        player_intel = player.intel
+        player.intel = self.fallback_class(player, player_intel.rng)
+        try:
+            return func(*args)
+        finally:
+            player.intel = player_intel
 
     def should_continue(self):
         """
@@ -43,136 +144,205 @@ class Game(object):
 
     def play_round(self):
         """
-        Plays a round.
+        Plays a round, having the players make the decisions of
+        round_steps right away.
         """
+        for decision in self.round_steps():
+            decision.answer = self.decide(
+                decision.name, decision.player,
+                getattr(decision.player, decision.method), *decision.args)
+
+    def round_steps(self):
+        """
+        Plays a round, one step after the other. Generates the Decisions
+        the steps wait for: their answer has to be set before the round
+        goes on. See play_round.
+        """
+        self.update_listeners()
 
         # Create a deck of cards and shuffle it.
-        self.deck = deck.Deck()
+        self.deck = deck.Deck(self.rng)
         self.deck.shuffle()
+        self.notify('deck_shuffled', self.deck)
 
-        # Deal cards and create kiddie.
-        kiddie = self.deal_cards()
-
-        # Keep track of the winning players and their cards.
-        winners = []
+        current = Round()
 
-        for player in self.players:
-            print player, ':', player.hand
-        print 'Kiddie', ':', kiddie
+        # Deal cards and create kiddie.
+        current.kiddie = self.measure(instrument.DEAL_CARDS, None,
+                                      self.deal_cards)
+        self.notify('cards_dealt', self.players, current.kiddie)
 
         # Start bidding process.
-        bidding_player, current_bid = self.start_bidding()
+        for decision in self.measure_step(instrument.START_BIDDING,
+                                          self.start_bidding(current)):
+            yield decision
         # Store the initial score to determine later if player made bid.
-        bp_initial_score = self.score_board.get_score(bidding_player.name)
+        current.initial_score = self.score_board.get_score(
+            current.bidder.name)
 
         # Determine the playing suit.
-        playing_suit = bidding_player.select_suit()
-        print 'Player %s has selected %s suit' % (bidding_player, playing_suit)
+        for decision in self.select_suit(current):
+            yield decision
 
-        # Initialize the starting player to bidder.
-        starting_player = bidding_player
-
-        # Give starting player the kiddie.
-        for c in kiddie:
-            starting_player.hand.add_card(c)
+        # Give the bidder the kiddie, and start with the bidder.
+        for c in current.kiddie:
+            current.bidder.hand.add_card(c)
+        current.leader = current.bidder
 
         # Allow players to throw out cards and get new cards.
-        # Determine the order of the players.
-        index = self.players.index(starting_player)
-        ordered_players = self.players[index:] + self.players[:index]
-        self.improve_cards(ordered_players, playing_suit)
+        for decision in self.measure_step(instrument.IMPROVE_CARDS,
+                                          self.improve_cards(current)):
+            yield decision
+
+        # The cards played are tracked in a compact state, see
+        # state.GameState.
+        self.state = state.GameState(current.suit,
+                                     [p.hand.mask for p in self.players],
+                                     self.players.index(current.bidder))
 
         # Actually start playing!
         # 5 is the number of cards on each hand.
-        for x in range(5):
-            print "Starting player is", starting_player
-            starting_player, winning_card = self.play_hand(starting_player,
-                                                           playing_suit,
-                                                           current_bid)
-            winners.append((starting_player, winning_card))
-
-        # Give the player with the highest card an additional 5 points.
-        cards = [c for p, c in winners]
+        for x in range(rules.HAND_SIZE):
+            self.notify('trick_started', current.leader)
+            for decision in self.measure_step(instrument.PLAY_HAND,
+                                              self.play_hand(current)):
+                yield decision
+
+        made = self.measure(instrument.SCORING, None, self.score_round,
+                            current.winners, current.suit, current.bidder,
+                            current.bid, current.initial_score)
+        self.notify('round_finished', current.bidder, current.bid, made)
+
+    def measure_step(self, name, step):
+        """
+        Generates the Decisions of step, a round step, and times the
+        whole step under name if the game is instrumented, the time
+        the decisions take included, like measure.
+        """
+        if self.instrumentation is None:
+            for decision in step:
+                yield decision
+            return
+        timer = self.instrumentation.timer
+        start = timer()
+        for decision in step:
+            yield decision
+        self.instrumentation.record(name, None, timer() - start)
+
+    def score_round(self, winners, playing_suit, bidding_player, current_bid,
+                    initial_score):
+        """
+        Awards the highest card and settles the bid at the end of a
+        round. Returns whether or not the bid was made.
+        """
+        self.award_highest_card(winners, playing_suit)
+        return self.settle_bid(bidding_player, current_bid, initial_score)
+
+    def award_highest_card(self, winners, playing_suit):
+        """
+        Gives the player that won the highest card in suit an additional
+        5 points. winners is a list of (player, winning card) tuples, one
+        per trick. Nobody gets the bonus if no card in suit won a trick.
+        """
+        cards = rules.get_in_suit_cards(playing_suit, [c for p, c in winners])
+        if not cards:
+            return
         highest_card = rules.get_highest_card_in_suit(playing_suit, cards)
         for p, c in winners:
             if c == highest_card:
                 self.score_board.increment_score(p.name, 5)
-                print p, 'had the highest card', c
-                print 'Current score:'
-                print self.score_board
+                self.notify('bonus_awarded', p, c, self.score_board)
                 break
 
-        # If bidding player didn't make bid, deduct the bid.
+    def settle_bid(self, bidding_player, current_bid, initial_score):
+        """
+        If bidding player didn't make bid, deduct the bid.
+        Returns whether or not the bid was made.
+        """
         bp_current_score = self.score_board.get_score(bidding_player.name)
-        if bp_current_score - current_bid < bp_initial_score:
-            print bidding_player, 'did NOT make his bid.'
-            print ("Score before the adjustment: %d" %
-                   self.score_board.get_score(bidding_player.name))
+        if bp_current_score - current_bid < initial_score:
             self.score_board.set_score(bidding_player.name,
-                                       bp_initial_score - current_bid)
-            print ("Score after the adjustment: %d" %
-                   self.score_board.get_score(bidding_player.name))
+                                       initial_score - current_bid)
+            self.notify('bid_set', bidding_player, bp_current_score,
+                        self.score_board.get_score(bidding_player.name))
+            return False
+        return True
 
-    def start_bidding(self):
+    def start_bidding(self, current):
         """
         Each player has one chance to bid. After all player have
         placed a bid, the highest bid wins. Since a new bid can only
         be higher than the previous bid, the latest bid is also
         the highest bid.
+        Sets the bidder and the bid of current, a Round.
         """
         current_bid = None
         bidding_player = None
         for player in self.players:
-            new_bid = player.place_bid(current_bid)
+            decision = Decision(instrument.SHOULD_BID, player, 'place_bid',
+                                current_bid)
+            yield decision
+            new_bid = decision.answer
+            self.notify('bid_placed', player, new_bid or 0)
             if new_bid:
-                print player, 'has bid', new_bid
                 bidding_player = player
                 current_bid = new_bid
-            else:
-                print player, 'passes on bid.'
 
         # If no players bid, dealer HAS to bid.
         if bidding_player is None:
             bidding_player = self.players[0]
             current_bid = rules.BIDS[0]
 
-        print 'Bidding player is', bidding_player
+        self.notify('bidding_finished', bidding_player, current_bid)
 
-        return bidding_player, current_bid
+        current.bidder = bidding_player
+        current.bid = current_bid
 
-    def play_hand(self, starting_player, playing_suit, bid):
+    def select_suit(self, current):
         """
-        Each player will deal a card, starting with the starting
-        player, of course.
-        Updates the score for each player.
-        Returns the winner player.
+        The bidder of current, a Round, selects the playing suit.
         """
-        # Determine the order of the players.
-        index = self.players.index(starting_player)
-        ordered_players = self.players[index:] + self.players[:index]
+        decision = Decision(instrument.SELECT_SUIT, current.bidder,
+                            'select_suit')
+        yield decision
+        current.suit = decision.answer
+        self.notify('suit_selected', current.bidder, current.suit)
 
-        # Set a list of cards that have already been played.
-        on_table = []
+    def play_hand(self, current):
+        """
+        Each player will deal a card, starting with the leader of
+        current, a Round, of course.
+        The state decides who plays, checks that the cards played are
+        valid, raising state.StateException otherwise, and finds the
+        winner, who leads the next trick.
+        Updates the score for each player.
+        """
+        leader = self.state.leader
         # Let the game begin!
-        for p in ordered_players:
-            played_card = p.play_card(playing_suit, on_table)
-            print p, "played", played_card
-            on_table.append(played_card)
-        print "Table:", on_table
-
-        # Determine the winner.
-        winning_card = rules.get_winnind_card(playing_suit, on_table)
-        index = on_table.index(winning_card)
-        # Use the index of the card played to match the player.
-        winner = ordered_players[index]
-        print 'Winner is', winner, 'with card', winning_card
+        for x in range(len(self.players)):
+            p = self.players[self.state.turn]
+            # The cards that have already been played.
+            on_table = [card.CARDS[c]
+                        for c in self.state.trick[:self.state.trick_size]]
+            decision = Decision(instrument.SELECT_BEST_CARD, p, 'play_card',
+                                current.suit, on_table)
+            yield decision
+            played_card = decision.answer
+            self.state.apply(played_card.index)
+            self.notify('card_played', p, played_card)
+
+        # The state determined the winner.
+        trick, seat = self.state.last_trick()
+        on_table = [card.CARDS[c] for c in trick]
+        winner = self.players[seat]
+        winning_card = on_table[(seat - leader) % len(self.players)]
 
         # Update the score board.
         self.score_board.increment_score(winner.name, 5)
-        print 'Current score:'
-        print self.score_board
-        # Return the winner.
-        return winner, winning_card
+        self.notify('trick_finished', winner, winning_card, on_table,
+                    self.score_board)
+        current.leader = winner
+        current.winners.append((winner, winning_card))
 
     def deal_cards(self):
         """
@@ -182,33 +352,72 @@ class Game(object):
         # Deal 3 cards to each player.
         for p in self.players:
             p.set_hand(hand.Hand())
-            for x in xrange(3):
+            for x in range(3):
                 p.hand.add_card(self.deck.pick_card())
 
         # Create kiddie and deal 3 cards to it.
         kiddie = hand.Hand()
-        for x in xrange(3):
+        for x in range(3):
             kiddie.add_card(self.deck.pick_card())
 
         # Deal 2 more cards to each player.
         for p in self.players:
-            for x in xrange(2):
+            for x in range(2):
                 p.hand.add_card(self.deck.pick_card())
 
         return kiddie
 
-    def improve_cards(self, ordered_players, suit):
+    def improve_cards(self, current):
         """
         Every player gets a chance to throw out their "bad" cards
-        and get new cards with the hope of getting better cards.
+        and get new cards with the hope of getting better cards,
+        starting with the bidder of current, a Round.
+        Hands are always filled back up to rules.HAND_SIZE cards.
         """
-        for p in ordered_players:
-            amount = p.discard_cards(suit)
-            print p, 'discarded', amount, 'cards.'
+        index = self.players.index(current.bidder)
+        for p in self.players[index:] + self.players[:index]:
+            decision = Decision(instrument.SELECT_DISCARD_CARDS, p,
+                                'discard_cards', current.suit)
+            yield decision
+            amount = decision.answer
+            self.notify('cards_discarded', p, amount)
             # Deal new cards.
-            for x in range(amount):
+            for x in range(rules.HAND_SIZE - len(p.hand)):
                 p.hand.add_card(self.deck.pick_card())
 
+
+class Decision(object):
+    """
+    A decision a round step waits for: the player's method of the
+    given name, called with args. name is the name of the decision,
+    see the instrument module. answer is set to what the player
+    decided.
+    """
+
+    def __init__(self, name, player, method, *args):
+        self.name = name
+        self.player = player
+        self.method = method
+        self.args = args
+        self.answer = None
+
+
+class Round(object):
+    """
+    The round in play: the kiddie, the bidder, its bid and its score
+    before the round, the playing suit, the player leading the next
+    trick and the (player, winning card) tuple of every trick.
+    """
+
+    def __init__(self):
+        self.kiddie = None
+        self.bidder = None
+        self.bid = None
+        self.initial_score = None
+        self.suit = None
+        self.leader = None
+        self.winners = []
+
 if __name__ == '__main__':
     from forte_fives import player
     p1 = player.Player('Bruce Lee')
@@ -217,5 +426,5 @@ if __name__ == '__main__':
     p4 = player.Player('Luiz Carvalho')
     game = Game([p1, p2, p3, p4])
     game.start()
-    print "Game over!"
-    print "Length of deck is %d" % len(game.deck)
+    print('Game over!')
+    print('Length of deck is %d' % len(game.deck))
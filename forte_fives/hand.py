@@ -1,4 +1,5 @@
 from forte_fives import card
+from forte_fives import cardset
 
 
 class Hand(object):
@@ -9,6 +10,24 @@ class Hand(object):
     def __init__(self):
         self.cards = []
 
+    @property
+    def cards(self):
+        """
+        List of cards in hand. It also keeps the mask of the cards.
+        """
+        return self._cards
+
+    @cards.setter
+    def cards(self, cards):
+        self._cards = cardset.CardList(cards)
+
+    @property
+    def mask(self):
+        """
+        Mask of the cards in hand, see cardset.
+        """
+        return self._cards.mask
+
     def __len__(self):
         """
         Returns the length of hand (how many
@@ -20,26 +39,32 @@ class Hand(object):
         """
         String representation of Hand.
         """
-        return ' | '.join([str(card) for card in self.cards])
+        return ' | '.join([str(card) for card in self._cards])
+
+    def __contains__(self, c):
+        """
+        Returns whether or not card c is in hand.
+        """
+        return c in self._cards
 
     def __iter__(self):
         """
         Makes Hand iterable on its cards.
         """
-        for card in self.cards:
+        for card in self._cards:
             yield card
 
     def add_card(self, card):
         """
         Adds a card to the hand.
         """
-        self.cards.append(card)
+        self._cards.append(card)
 
     def remove_card(self, card):
         """
         Removes a specific card from hand.
         """
-        self.cards.remove(card)
+        self._cards.remove(card)
 
     def get_cards_in_suit(self, suit):
         """
@@ -48,10 +73,12 @@ class Hand(object):
         if suit not in card.SUITS:
             raise card.BadSuitException('Invalid card suit, %s' % suit)
 
-        return [card for card in self.cards if card.suit == suit]
+        if not self._cards.mask & cardset.SUIT_MASKS[suit]:
+            return []
+        return [card for card in self._cards if card.suit == suit]
 
     def get_all_cards(self):
         """
         Returns all cards in hand.
         """
-        return self.cards
+        return self._cards
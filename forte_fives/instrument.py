@@ -0,0 +1,263 @@
+"""
+Timing instrumentation of games.
+
+A Game given an Instrumentation measures the wall time of each phase
+of a round and of each decision of the players. Every measurement is
+handed to the sinks of the Instrumentation, which keep histograms in
+memory, write JSON lines or write a file in the Prometheus text format.
+"""
+import json
+import os
+import timeit
+
+
+# Phases of a round.
+DEAL_CARDS = 'deal_cards'
+START_BIDDING = 'start_bidding'
+IMPROVE_CARDS = 'improve_cards'
+PLAY_HAND = 'play_hand'
+SCORING = 'scoring'
+
+PHASES = (DEAL_CARDS, START_BIDDING, IMPROVE_CARDS, PLAY_HAND, SCORING)
+
+# Decisions of the players, named after the Intel methods.
+SHOULD_BID = 'should_bid'
+SELECT_SUIT = 'select_suit'
+SELECT_DISCARD_CARDS = 'select_discard_cards'
+SELECT_BEST_CARD = 'select_best_card'
+
+DECISIONS = (SHOULD_BID, SELECT_SUIT, SELECT_DISCARD_CARDS, SELECT_BEST_CARD)
+
+# Upper bounds of the histogram buckets, in seconds.
+BUCKETS = tuple(1e-6 * 2 ** i for i in range(25))
+
+
+try:
+    _replace = os.replace
+except AttributeError:
+    # Python 2 has no os.replace: rename only fails to replace an
+    # existing file on Windows.
+    _replace = os.rename
+
+
+class Instrumentation(object):
+    """
+    Measures how long things take and hands the measurements to sinks.
+    """
+
+    def __init__(self, sinks=None, timer=timeit.default_timer):
+        """
+        Initializes the instrumentation with the given list of sinks.
+        timer returns the current time, in seconds.
+        """
+        self.sinks = sinks if sinks is not None else [HistogramSink()]
+        self.timer = timer
+
+    def call(self, name, player, func, *args):
+        """
+        Calls func with args and returns its result, measuring how long
+        it took. player is the name of the player deciding, None for
+        the phases of a round.
+        """
+        start = self.timer()
+        try:
+            return func(*args)
+        finally:
+            self.record(name, player, self.timer() - start)
+
+    def record(self, name, player, seconds):
+        """
+        Hands a measurement to every sink.
+        """
+        for sink in self.sinks:
+            sink.record(name, player, seconds)
+
+    def close(self):
+        """
+        Closes every sink.
+        """
+        for sink in self.sinks:
+            sink.close()
+
+
+class Sink(object):
+    """
+    Base class for sinks of measurements.
+    """
+
+    def record(self, name, player, seconds):
+        """
+        Takes a measurement of name, for player or None, in seconds.
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Writes out anything left, if needed.
+        """
+
+
+class Histogram(object):
+    """
+    Call count, total time and distribution of the measurements of one
+    name and player.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if self.maximum is None or seconds > self.maximum:
+            self.maximum = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    @property
+    def mean(self):
+        if not self.count:
+            return 0.0
+        return self.total / self.count
+
+    def percentile(self, p):
+        """
+        Returns the upper bound of the bucket holding the p-th
+        percentile, p being between 0 and 100. The maximum for the
+        last bucket.
+        """
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                if i < len(BUCKETS):
+                    return min(BUCKETS[i], self.maximum)
+                return self.maximum
+        return 0.0
+
+
+class HistogramSink(Sink):
+    """
+    Keeps a Histogram of the measurements of every name and player.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, name, player, seconds):
+        key = (name, player)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.add(seconds)
+
+    def get(self, name, player=None):
+        """
+        Returns the Histogram of the given name and player, None if
+        nothing was measured.
+        """
+        return self.histograms.get((name, player))
+
+    def summary(self):
+        """
+        Returns a text table of the measurements, slowest total first.
+        """
+        lines = []
+        for (name, player), h in sorted(self.histograms.items(),
+                                        key=lambda item: -item[1].total):
+            lines.append('%-22s %-16s %8d calls %10.3f s total '
+                         '%10.1f us mean %10.1f us p99'
+                         % (name, player or '', h.count, h.total,
+                            h.mean * 1e6, h.percentile(99) * 1e6))
+        return '\n'.join(lines)
+
+
+class JsonLinesSink(Sink):
+    """
+    Appends every measurement to a file as a line of JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a')
+
+    def record(self, name, player, seconds):
+        self.file.write(json.dumps({'name': name, 'player': player,
+                                    'seconds': seconds}) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n',
+                                                                   '\\n')
+
+
+class PrometheusSink(HistogramSink):
+    """
+    Writes the histograms to a file in the Prometheus text format,
+    every interval measurements and when closed. The file is replaced
+    at once, so a collector never reads half of it.
+    """
+
+    def __init__(self, path, prefix='forte_fives', interval=10000):
+        HistogramSink.__init__(self)
+        self.path = path
+        self.prefix = prefix
+        self.interval = interval
+        self._pending = 0
+
+    def record(self, name, player, seconds):
+        HistogramSink.record(self, name, player, seconds)
+        self._pending += 1
+        if self._pending >= self.interval:
+            self.write()
+
+    def render(self):
+        """
+        Returns the histograms in the Prometheus text format.
+        """
+        metric = '%s_duration_seconds' % self.prefix
+        lines = ['# HELP %s Time spent in game phases and decisions.'
+                 % metric,
+                 '# TYPE %s histogram' % metric]
+        for (name, player), h in sorted(self.histograms.items(),
+                                        key=lambda item: (item[0][0],
+                                                          item[0][1] or '')):
+            labels = 'name="%s"' % _escape(name)
+            if player is not None:
+                labels += ',player="%s"' % _escape(player)
+            seen = 0
+            for bound, count in zip(BUCKETS, h.buckets):
+                seen += count
+                lines.append('%s_bucket{%s,le="%r"} %d'
+                             % (metric, labels, bound, seen))
+            lines.append('%s_bucket{%s,le="+Inf"} %d'
+                         % (metric, labels, h.count))
+            lines.append('%s_sum{%s} %r' % (metric, labels, h.total))
+            lines.append('%s_count{%s} %d' % (metric, labels, h.count))
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        """
+        Writes the histograms to the file.
+        """
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            f.write(self.render())
+        _replace(temporary, self.path)
+        self._pending = 0
+
+    def close(self):
+        self.write()
@@ -8,13 +8,34 @@ class Intel(object):
     Module that allow a Player to make decisions,
     such as which suit to select, whether or not to bid,
     what card to play and more.
+
+    The Game may give every decision a budget.Deadline, in the deadline
+    attribute, None meaning no limit. Decisions that take a while
+    should check it, and return the best answer found so far once it
+    expires, or raise budget.DeadlineExceeded if they have none.
     """
 
-    def __init__(self, player):
+    def __init__(self, player, rng=None):
         """
-        Initializer of Intel.
+        Initializer of Intel. rng is the random.Random instance used
+        to make decisions, the random module is used if None.
         """
         self.player = player
+        self.rng = rng if rng is not None else random
+        self.deadline = None
+
+    def snapshot(self):
+        """
+        Returns what the intel learned about the current round, if
+        anything, as a small value that pickles. restore picks it up
+        in an intel of the same class, possibly in another process.
+        """
+        return None
+
+    def restore(self, state):
+        """
+        Picks up a state returned by snapshot.
+        """
 
     def select_suit(self):
         """
@@ -27,7 +48,7 @@ class Intel(object):
         if fives:
             return fives[0].suit
 
-        return random.choice(self.player.hand.cards).suit
+        return self.rng.choice(self.player.hand.cards).suit
 
     def should_bid(self, current_bid):
         """
@@ -39,7 +60,7 @@ class Intel(object):
 
         possible_bids = rules.select_valid_bids(current_bid)
 
-        if random.choice([True, False, False]):
+        if possible_bids and self.rng.choice([True, False, False]):
             return possible_bids[0]
         else:
             return 0
@@ -52,17 +73,27 @@ class Intel(object):
         # For now let's make it really dumb.
 
         # Just pick a random valid card.
-        return random.choice(
+        return self.rng.choice(
                         rules.select_valid_cards(suit, self.player.hand,
                                                cards_played))
 
     def select_discard_cards(self, suit):
         """
         Returns all the cards that are out of suit up to allowed
-        maximum amount.
+        maximum amount. If that still leaves too many cards in hand,
+        the weakest cards in suit are discarded as well.
         """
 
         # Determine what's the maximum amount of cards that can
         # be discarded. Then, head-slice list to max amount.
         max_amount = len(self.player.hand) - rules.MINIMUM_KEEP
-        return rules.get_out_suit_cards(suit, self.player.hand)[:max_amount]
+        discards = rules.get_out_suit_cards(suit, self.player.hand)[:max_amount]
+
+        # The bidding player holds the kiddie and may need to let go
+        # of some cards in suit to get back to a regular hand.
+        min_amount = len(self.player.hand) - rules.HAND_SIZE
+        if len(discards) < min_amount:
+            in_suit = sorted(rules.get_in_suit_cards(suit, self.player.hand),
+                             key=lambda c: rules.get_in_suit_rank(suit, c))
+            discards += in_suit[:min_amount - len(discards)]
+        return discards
@@ -0,0 +1,226 @@
+"""
+What a player knows about the hidden cards of a round.
+
+The Game only hands an intel its own cards and the cards on the table,
+yet the events of a round tell a lot more: which cards are gone, which
+players could not follow the playing suit, how many cards every player
+threw out and what they bid. Knowledge follows the events and keeps,
+for every player, the mask of the cards it may still hold, narrowed
+down as the round goes, so that sampling and search intels don't have
+to work it out again for every decision.
+"""
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import events
+from forte_fives import rules
+
+
+class Knowledge(events.Observer):
+    """
+    Knowledge of a player about the current round, updated by the game
+    events. Intels owning one forward it the events they get.
+
+    Once the cards are dealt, the attributes are:
+
+    - seat, the seat of the player, and players, the list of players;
+    - bids, the bid of every seat, 0 for a pass, and bidder and bid,
+      the seat and bid of the bidding player, once bidding is over; a
+      bidder which passed was forced to bid by the rules;
+    - suit, the playing suit, once selected;
+    - discarded, the amount of cards every seat threw out, None for
+      the seats yet to discard;
+    - gone, the mask of the cards known to be out of every hidden hand:
+      the ones played and the ones the player threw out;
+    - possible, the mask of the cards every seat may hold, the hand of
+      the player at its own seat;
+    - void, whether every seat showed it has no cards in the playing
+      suit (the Ace of Hearts included), by not following a lead in
+      suit;
+    - played, the amount of cards every seat played, and shown, the
+      mask of these cards;
+    - leader, the seat leading the current trick, trick, the indexes
+      of the cards played in it, and highest, the (card index, seat)
+      of the highest card in suit won in a trick so far, or None.
+    """
+
+    def __init__(self, player):
+        self.player = player
+        self.restore(None)
+
+    def _hand(self):
+        if self.player.hand is None:
+            return cardset.EMPTY
+        return self.player.hand.mask
+
+    def _seat_of(self, player):
+        return self.players.index(player)
+
+    ###########################################################################
+    #
+    # Game events
+    #
+    ###########################################################################
+    def cards_dealt(self, players, kiddie):
+        self.players = list(players)
+        self.n_players = len(players)
+        self.seat = self._seat_of(self.player)
+        self.suit = None
+        self.bidder = None
+        self.bid = None
+        self.bids = [0] * self.n_players
+        self.discarded = [None] * self.n_players
+        self.gone = cardset.EMPTY
+        self.played = [0] * self.n_players
+        self.shown = [cardset.EMPTY] * self.n_players
+        self.void = [False] * self.n_players
+        self.leader = None
+        self.trick = []
+        self.highest = None
+
+        hand = self._hand()
+        self._held = hand
+        # The kiddie only becomes known by taking it, as the bidder.
+        self._kiddie = kiddie.mask if kiddie is not None else cardset.EMPTY
+        self.possible = [cardset.FULL_MASK & ~hand] * self.n_players
+        self.possible[self.seat] = hand
+
+    def bid_placed(self, player, bid):
+        if self.players is None:
+            return
+        self.bids[self._seat_of(player)] = bid
+
+    def bidding_finished(self, player, bid):
+        if self.players is None:
+            return
+        self.bidder = self._seat_of(player)
+        self.bid = bid
+        if self.bidder == self.seat:
+            self._held |= self._kiddie
+            self.possible = [p & ~self._kiddie for p in self.possible]
+
+    def suit_selected(self, player, suit):
+        if self.players is None:
+            return
+        self.suit = suit
+
+    def cards_discarded(self, player, amount):
+        if self.players is None:
+            return
+        seat = self._seat_of(player)
+        self.discarded[seat] = amount
+        if seat == self.seat:
+            # The hand is not dealt new cards yet: what the player held
+            # and no longer does was thrown out.
+            self.gone |= self._held & ~self._hand()
+        self._update_hand()
+
+    def trick_started(self, player):
+        if self.players is None:
+            return
+        self._update_hand()
+        self.leader = self._seat_of(player)
+        self.trick = []
+
+    def card_played(self, player, played_card):
+        if self.players is None or self.suit is None:
+            return
+        seat = self._seat_of(player)
+        mask = cardset.CARD_MASKS[played_card.index]
+        if (self.trick and card.CARDS[self.trick[0]].suit == self.suit and
+                not mask & cardset.IN_SUIT_MASKS[self.suit]):
+            # Not following a lead in suit, see rules.select_valid_cards.
+            self.set_void(seat)
+        self.trick.append(played_card.index)
+        self.played[seat] += 1
+        self.shown[seat] |= mask
+        self.gone |= mask
+        self.possible = [p & ~mask for p in self.possible]
+
+    def trick_finished(self, winner, winning_card, on_table, score_board):
+        if self.players is None or self.suit is None:
+            return
+        strength = rules.get_in_suit_rank(self.suit, winning_card)
+        if strength >= 0 and (
+                self.highest is None or strength > rules.get_in_suit_rank(
+                    self.suit, card.CARDS[self.highest[0]])):
+            self.highest = (winning_card.index, self._seat_of(winner))
+
+    ###########################################################################
+    #
+    # Knowledge
+    #
+    ###########################################################################
+    def _update_hand(self):
+        """
+        Takes in the cards the player was dealt since the last event.
+        """
+        hand = self._hand()
+        new = hand & ~self._held
+        if new:
+            self._held |= new
+            self.possible = [p & ~new for p in self.possible]
+        self.possible[self.seat] = hand
+
+    def set_void(self, seat):
+        """
+        Records that the player at seat has no cards in the playing
+        suit.
+        """
+        self.void[seat] = True
+        self.possible[seat] &= cardset.OUT_SUIT_MASKS[self.suit]
+
+    def unknown(self):
+        """
+        Returns the mask of the cards the player can't see, and that
+        may be in the hand of another player.
+        """
+        return cardset.FULL_MASK & ~self._hand() & ~self.gone
+
+    def hand_sizes(self):
+        """
+        Returns the amount of cards every seat holds, in the play phase.
+        """
+        return [rules.HAND_SIZE - played for played in self.played]
+
+    ###########################################################################
+    #
+    # Snapshots
+    #
+    ###########################################################################
+    def snapshot(self):
+        """
+        Returns the knowledge as a tuple of plain values, or None before
+        the cards are dealt.
+        """
+        if self.seat is None:
+            return None
+        return (self.n_players, self.seat, self.suit, self.bidder, self.bid,
+                tuple(self.bids), tuple(self.discarded), self.gone,
+                tuple(self.possible), tuple(self.played), tuple(self.shown),
+                tuple(self.void), self.leader, tuple(self.trick), self.highest)
+
+    def restore(self, state):
+        """
+        Picks up a snapshot. The game events are not followed
+        afterwards, see Intel.restore.
+        """
+        self.players = None
+        self._held = cardset.EMPTY
+        self._kiddie = cardset.EMPTY
+        if state is None:
+            self.n_players = self.seat = self.suit = None
+            self.bidder = self.bid = self.bids = self.discarded = None
+            self.gone = cardset.EMPTY
+            self.possible = self.played = self.shown = self.void = None
+            self.leader = self.trick = self.highest = None
+            return
+        (self.n_players, self.seat, self.suit, self.bidder, self.bid, bids,
+         discarded, self.gone, possible, played, shown, void, self.leader,
+         trick, self.highest) = state
+        self.bids = list(bids)
+        self.discarded = list(discarded)
+        self.possible = list(possible)
+        self.played = list(played)
+        self.shown = list(shown)
+        self.void = list(void)
+        self.trick = list(trick)
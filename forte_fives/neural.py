@@ -0,0 +1,571 @@
+"""
+Neural network policy and value, evaluated with NumPy.
+
+A decision is described by an observation: the hand, the playing suit,
+the cards on the table, the amount of turns played, the game scores of
+the player and of its best opponent, and the cards the player may
+play. Observations are encoded into rows of features, and a small
+multilayer perceptron evaluates a whole matrix of them at once: its
+outputs are the preference for every card, the policy, and the points
+the player is expected to score in the round, the value.
+
+Evaluating one observation costs about as much as evaluating hundreds,
+so the game server groups the card plays of all its tables into one
+evaluation, see dispatch.Batcher. The network is fit from the records
+of played rounds, see features, train and train_records.
+
+NumPy is an optional dependency: install forte-fives[numpy].
+"""
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import events
+from forte_fives import features
+from forte_fives import intel
+from forte_fives import record
+from forte_fives import rules
+from forte_fives import selfplay
+
+from argparse import ArgumentParser
+import itertools
+import os
+
+import numpy
+
+
+# Network used by NeuralIntel, see load_default_network.
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'neural.npz')
+
+DEFAULT_HIDDEN = (128, 64)
+DEFAULT_EPOCHS = 10
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_LEARNING_RATE = 0.001
+
+# Weight of the value in the loss, next to the policy.
+VALUE_WEIGHT = 1.0
+
+# Values are learned in units of the highest bid.
+VALUE_SCALE = float(rules.BIDS[-1])
+
+# Layout of the features.
+HAND = 0
+SUIT = HAND + len(card.CARDS)
+TABLE = SUIT + len(card.SUITS)
+TRICKS = TABLE + len(card.CARDS)
+SCORE = TRICKS + 1
+OTHER_SCORE = SCORE + 1
+FEATURES = OTHER_SCORE + 1
+
+# The policy, then the value.
+OUTPUTS = len(card.CARDS) + 1
+
+
+class NeuralException(Exception):
+    pass
+
+
+def _data(observations):
+    """
+    Returns the observations as an int64 array, one row each.
+    """
+    return numpy.fromiter(itertools.chain.from_iterable(observations),
+                          dtype=numpy.int64,
+                          count=len(observations) * 7).reshape(-1, 7)
+
+
+def _bits(masks):
+    """
+    Returns the bits of every mask of the given array, as a uint8 array
+    of shape (masks, 52).
+    """
+    data = masks.astype('<u8').view(numpy.uint8).reshape(-1, 8)
+    return numpy.unpackbits(data, axis=1,
+                            bitorder='little')[:, :len(card.CARDS)]
+
+
+def _features(data):
+    rows = numpy.zeros((len(data), FEATURES), dtype=numpy.float32)
+    rows[:, HAND:SUIT] = _bits(data[:, 0])
+    rows[numpy.arange(len(data)), SUIT + data[:, 1]] = 1
+    rows[:, TABLE:TRICKS] = _bits(data[:, 2])
+    rows[:, TRICKS] = data[:, 3] / float(rules.HAND_SIZE)
+    rows[:, SCORE] = data[:, 4] / float(rules.WINNING_SCORE)
+    rows[:, OTHER_SCORE] = data[:, 5] / float(rules.WINNING_SCORE)
+    return rows
+
+
+def encode(observations):
+    """
+    Returns the features of the given list of observations, as a
+    float32 array of shape (observations, FEATURES).
+    """
+    return _features(_data(observations))
+
+
+def valid_mask(observations):
+    """
+    Returns the cards that may be played in the given list of
+    observations, as a boolean array of shape (observations, 52).
+    """
+    return _bits(_data(observations)[:, 6]).astype(bool)
+
+
+class Network(object):
+    """
+    Multilayer perceptron with ReLU hidden layers. weights and biases
+    hold the float32 arrays of every layer.
+    """
+
+    def __init__(self, weights, biases):
+        self.weights = [numpy.asarray(w, dtype=numpy.float32)
+                        for w in weights]
+        self.biases = [numpy.asarray(b, dtype=numpy.float32) for b in biases]
+        if (self.weights[0].shape[0] != FEATURES or
+                self.weights[-1].shape[1] != OUTPUTS):
+            raise NeuralException('Network of %d inputs and %d outputs, '
+                                  'expected %d and %d' % (
+                                      self.weights[0].shape[0],
+                                      self.weights[-1].shape[1], FEATURES,
+                                      OUTPUTS))
+
+    @classmethod
+    def create(cls, hidden=DEFAULT_HIDDEN, rng=None):
+        """
+        Returns a network with the given sizes of hidden layers and
+        random weights, drawn with rng, a numpy.random.Generator.
+        """
+        if rng is None:
+            rng = numpy.random.default_rng()
+        sizes = [FEATURES] + list(hidden) + [OUTPUTS]
+        weights = [rng.normal(0, numpy.sqrt(2.0 / n), (n, m))
+                   for n, m in zip(sizes, sizes[1:])]
+        biases = [numpy.zeros(m) for m in sizes[1:]]
+        return cls(weights, biases)
+
+    def forward(self, inputs, activations=None):
+        """
+        Returns the outputs of the network for the given features. The
+        input of every layer is appended to activations, if given.
+        """
+        x = inputs
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            if activations is not None:
+                activations.append(x)
+            x = x.dot(w) + b
+            if i < last:
+                numpy.maximum(x, 0, out=x)
+        return x
+
+    def evaluate(self, observations):
+        """
+        Returns the (policy logits, values) arrays of the given list of
+        observations. Values are in points.
+        """
+        outputs = self.forward(encode(observations))
+        return outputs[:, :-1], outputs[:, -1] * VALUE_SCALE
+
+    def decide(self, observations):
+        """
+        Returns, for every observation, the index of the valid card
+        the policy prefers.
+        """
+        data = _data(observations)
+        logits = self.forward(_features(data))[:, :-1]
+        logits[_bits(data[:, 6]) == 0] = -numpy.inf
+        return logits.argmax(axis=1).tolist()
+
+    def values(self, observations):
+        """
+        Returns the points expected for every observation.
+        """
+        return self.evaluate(observations)[1].tolist()
+
+    def save(self, path):
+        """
+        Writes the network to the given .npz file.
+        """
+        arrays = {}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays['w%d' % i] = w
+            arrays['b%d' % i] = b
+        with open(path, 'wb') as f:
+            numpy.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a network written by save.
+        """
+        try:
+            data = numpy.load(path)
+        except (IOError, ValueError):
+            raise NeuralException('%s is not a network' % path)
+        if not hasattr(data, 'files'):
+            raise NeuralException('%s is not a network' % path)
+        with data:
+            layers = len(data.files) // 2
+            try:
+                weights = [data['w%d' % i] for i in range(layers)]
+                biases = [data['b%d' % i] for i in range(layers)]
+            except KeyError:
+                raise NeuralException('%s is not a network' % path)
+        if not layers:
+            raise NeuralException('%s is not a network' % path)
+        return cls(weights, biases)
+
+
+_default_network = None
+
+
+def load_default_network():
+    """
+    Returns the network at DEFAULT_PATH, None if there is none. The
+    network is only read once.
+    """
+    global _default_network
+    if _default_network is None and os.path.exists(DEFAULT_PATH):
+        _default_network = Network.load(DEFAULT_PATH)
+    return _default_network
+
+
+class NeuralIntel(intel.Intel, events.Observer):
+    """
+    Intel that plays the card the network prefers, and bids and
+    selects the suit with the values of the hand. Being an observer,
+    it follows the score board of the game. Falls back to Intel
+    without a network.
+    """
+
+    def __init__(self, player, rng=None, network=None, margin=0):
+        """
+        Initializer of NeuralIntel. network defaults to the one loaded
+        by load_default_network. A bid is only placed if the hand is
+        expected to make it with margin points to spare.
+        """
+        intel.Intel.__init__(self, player, rng)
+        self.network = (network if network is not None
+                        else load_default_network())
+        self.margin = margin
+        self.score_board = None
+        self._others = []
+
+    ###########################################################################
+    #
+    # Game events
+    #
+    ###########################################################################
+    def game_started(self, players):
+        self.score_board = None
+
+    def cards_dealt(self, players, kiddie):
+        self._others = [p.name for p in players if p is not self.player]
+
+    def trick_finished(self, winner, winning_card, on_table, score_board):
+        self.score_board = score_board
+
+    def bonus_awarded(self, player, highest_card, score_board):
+        self.score_board = score_board
+
+    ###########################################################################
+    #
+    # Decisions
+    #
+    ###########################################################################
+    def _scores(self):
+        """
+        Returns the game score of the player and the best one of the
+        other players.
+        """
+        if self.score_board is None:
+            return 0, 0
+        score = self.score_board.get_score(self.player.name)
+        others = [self.score_board.get_score(n) for n in self._others]
+        return score, max(others) if others else 0
+
+    def observation(self, suit, cards_played=()):
+        """
+        Returns the observation of the decision of the player, with
+        suit as the playing suit and the given cards on the table.
+        """
+        hand = self.player.hand.mask
+        table = [c.index for c in cards_played]
+        score, other_score = self._scores()
+        return features.observation(
+            hand, suit, cardset.mask_of(cards_played),
+            rules.HAND_SIZE - len(self.player.hand), score, other_score,
+            features.valid_moves(hand, suit, table))
+
+    def _best_suit(self):
+        """
+        Returns the (suit, points) tuple of the suit the hand is
+        expected to score the most points with.
+        """
+        values = self.network.values([self.observation(s)
+                                      for s in card.SUITS])
+        best = max(range(len(card.SUITS)), key=values.__getitem__)
+        return card.SUITS[best], values[best]
+
+    def select_suit(self):
+        if self.network is None:
+            return intel.Intel.select_suit(self)
+        return self._best_suit()[0]
+
+    def should_bid(self, current_bid):
+        """
+        Places the lowest bid allowed, if the hand is expected to make it.
+        """
+        if self.network is None:
+            return intel.Intel.should_bid(self, current_bid)
+        points = self._best_suit()[1]
+        for bid in rules.select_valid_bids(current_bid):
+            if bid + self.margin <= points:
+                return bid
+        return 0
+
+    def select_best_card(self, suit, cards_played):
+        if self.network is None:
+            return intel.Intel.select_best_card(self, suit, cards_played)
+        index = self.network.decide([self.observation(suit,
+                                                      cards_played)])[0]
+        return card.CARDS[index]
+
+
+###############################################################################
+#
+# Training
+#
+###############################################################################
+def examples(decisions):
+    """
+    Generates the (observation, card index, points) examples of the
+    given decisions (see features.decisions): one for every card
+    played, with the card played, and ones for the hands the bidder
+    bid with and every player kept, with -1 as card index. points is
+    what the player scored in the round.
+    """
+    for kind, seat, bidder, o, action, outcome in decisions:
+        if kind == features.CARD:
+            yield o, action, outcome
+        elif kind == features.DISCARD:
+            # The action is the mask of the cards thrown out.
+            yield (o[0] & ~action,) + o[1:], -1, outcome
+        elif seat == bidder:
+            yield o, -1, outcome
+
+
+def _loss(network, inputs, valid, cards, values):
+    """
+    Returns the loss of the network on a batch of examples, and the
+    gradients of its weights and biases.
+    """
+    activations = []
+    outputs = network.forward(inputs, activations)
+    n = len(inputs)
+
+    gradient = numpy.zeros_like(outputs)
+    loss = 0.0
+    has_card = cards >= 0
+    if has_card.any():
+        logits = numpy.where(valid[has_card], outputs[has_card, :-1],
+                             -numpy.inf)
+        logits -= logits.max(axis=1)[:, None]
+        exp = numpy.exp(logits)
+        probabilities = exp / exp.sum(axis=1)[:, None]
+        rows = numpy.arange(len(logits))
+        chosen = cards[has_card]
+        loss -= numpy.log(probabilities[rows, chosen] + 1e-12).sum() / n
+        probabilities[rows, chosen] -= 1
+        gradient[has_card, :-1] = probabilities / n
+    error = outputs[:, -1] - values / VALUE_SCALE
+    loss += VALUE_WEIGHT * (error ** 2).mean()
+    gradient[:, -1] = 2 * VALUE_WEIGHT * error / n
+
+    weight_gradients = []
+    bias_gradients = []
+    for i in range(len(network.weights) - 1, -1, -1):
+        x = activations[i]
+        weight_gradients.append(x.T.dot(gradient))
+        bias_gradients.append(gradient.sum(axis=0))
+        if i:
+            gradient = gradient.dot(network.weights[i].T) * (x > 0)
+    return loss, weight_gradients[::-1], bias_gradients[::-1]
+
+
+def train(network, examples, epochs=DEFAULT_EPOCHS,
+          batch_size=DEFAULT_BATCH_SIZE, learning_rate=DEFAULT_LEARNING_RATE,
+          rng=None, log=None):
+    """
+    Fits the network to the given list of examples (see examples) with
+    Adam, and returns the loss of every epoch. log, if given, is called
+    with the epoch and its loss after each one.
+    """
+    if not examples:
+        raise NeuralException('No examples to train on')
+    observations = [e[0] for e in examples]
+    inputs = encode(observations)
+    valid = valid_mask(observations)
+    cards = numpy.array([e[1] for e in examples], dtype=numpy.int64)
+    values = numpy.array([e[2] for e in examples], dtype=numpy.float32)
+
+    def batch(indexes):
+        return inputs[indexes], valid[indexes], cards[indexes], values[indexes]
+    return _fit(network, len(examples), batch, epochs, batch_size,
+                learning_rate, rng, log)
+
+
+def _record_batch(records):
+    """
+    Returns the inputs, valid cards, card indexes and values of the
+    examples of the given array of selfplay records, see examples.
+    """
+    kind = records['kind']
+    data = numpy.empty((len(records), 7), dtype=numpy.int64)
+    hand = records['hand']
+    # The action of a discard is the mask of the cards thrown out.
+    data[:, 0] = numpy.where(kind == features.DISCARD,
+                             hand & ~records['action'], hand)
+    data[:, 1] = records['suit']
+    data[:, 2] = records['table']
+    data[:, 3] = records['tricks']
+    data[:, 4] = records['score']
+    data[:, 5] = records['other_score']
+    data[:, 6] = records['valid']
+    cards = numpy.where(kind == features.CARD,
+                        records['action'].astype(numpy.int64), -1)
+    return (_features(data), _bits(data[:, 6]).astype(bool), cards,
+            records['outcome'].astype(numpy.float32))
+
+
+def train_records(network, arrays, epochs=DEFAULT_EPOCHS,
+                  batch_size=DEFAULT_BATCH_SIZE,
+                  learning_rate=DEFAULT_LEARNING_RATE, rng=None, log=None):
+    """
+    Fits the network like train, to the examples of the given arrays of
+    selfplay records, such as shards loaded with selfplay.load_shard.
+    Only the indexes of the examples are shuffled: the features of a
+    batch are made from the records it picks, so memory mapped shards
+    are not read in whole.
+    """
+    rows = []
+    for records in arrays:
+        kind = records['kind']
+        rows.append(numpy.flatnonzero(
+            (kind != features.BID) | (records['seat'] == records['bidder'])))
+    offsets = numpy.cumsum([0] + [len(r) for r in rows])
+    if not offsets[-1]:
+        raise NeuralException('No examples to train on')
+
+    def batch(indexes):
+        # Sorted, the indexes of every array are read in order.
+        indexes = numpy.sort(indexes)
+        where = numpy.searchsorted(offsets, indexes, side='right') - 1
+        picked = [arrays[i][rows[i][indexes[where == i] - offsets[i]]]
+                  for i in numpy.unique(where)]
+        return _record_batch(numpy.concatenate(picked))
+    return _fit(network, int(offsets[-1]), batch, epochs, batch_size,
+                learning_rate, rng, log)
+
+
+def _fit(network, count, batch, epochs, batch_size, learning_rate, rng,
+         log):
+    """
+    Fits the network to count examples, batch returning the inputs,
+    valid cards, card indexes and values of the examples of an array of
+    indexes. See train.
+    """
+    if rng is None:
+        rng = numpy.random.default_rng()
+    parameters = network.weights + network.biases
+    first = [numpy.zeros_like(p) for p in parameters]
+    second = [numpy.zeros_like(p) for p in parameters]
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    step = 0
+    losses = []
+    for epoch in range(epochs):
+        order = rng.permutation(count)
+        total = 0.0
+        for start in range(0, count, batch_size):
+            indexes = order[start:start + batch_size]
+            loss, weights, biases = _loss(network, *batch(indexes))
+            total += loss * len(indexes)
+            step += 1
+            for p, g, m, v in zip(parameters, weights + biases, first,
+                                  second):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= (learning_rate * (m / (1 - beta1 ** step)) /
+                      (numpy.sqrt(v / (1 - beta2 ** step)) + epsilon))
+        losses.append(total / count)
+        if log is not None:
+            log(epoch, losses[-1])
+    return losses
+
+
+def parse_args():
+
+    parser = ArgumentParser(
+            description='Trains the neural network from played rounds')
+
+    parser.add_argument('records', nargs='+',
+            help='Record files of the rounds to learn from, or '
+                 'directories of self-play shards')
+    parser.add_argument('-o', '--output', default=DEFAULT_PATH,
+            help='Network file to write (default: %(default)s)')
+    parser.add_argument('-r', '--resume', action='store_true',
+            help='Keep training the network in the output file')
+    parser.add_argument('--hidden', default=','.join(
+            str(h) for h in DEFAULT_HIDDEN),
+            help='Sizes of the hidden layers (default: %(default)s)')
+    parser.add_argument('-e', '--epochs', type=int, default=DEFAULT_EPOCHS,
+            help='Passes over the examples (default: %(default)s)')
+    parser.add_argument('-b', '--batch-size', type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Examples per step (default: %(default)s)')
+    parser.add_argument('-l', '--learning-rate', type=float,
+            default=DEFAULT_LEARNING_RATE,
+            help='Learning rate (default: %(default)s)')
+    parser.add_argument('-s', '--seed', type=int, default=0,
+            help='Seed of the weights and of the order of the examples '
+                 '(default: %(default)s)')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = numpy.random.default_rng(args.seed)
+    if args.resume and os.path.exists(args.output):
+        network = Network.load(args.output)
+    else:
+        hidden = [int(h) for h in args.hidden.split(',') if h]
+        network = Network.create(hidden, rng)
+
+    # Record files are turned into selfplay records, like the shards.
+    arrays = []
+    for path in args.records:
+        if os.path.isdir(path):
+            for shard in selfplay.shard_paths(path):
+                arrays.append(selfplay.load_shard(shard))
+        else:
+            decisions = features.decisions(record.read_records(path))
+            arrays.append(numpy.frombuffer(
+                b''.join(selfplay.pack(d) for d in decisions),
+                dtype=selfplay.record_dtype()))
+    print('%d records' % sum(len(a) for a in arrays))
+
+    def log(epoch, loss):
+        print('Epoch %d: loss %.4f' % (epoch + 1, loss))
+
+    train_records(network, arrays, args.epochs, args.batch_size,
+                  args.learning_rate, rng, log)
+    directory = os.path.dirname(args.output)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    network.save(args.output)
+    print('Network written to %s' % args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Perfect information Monte Carlo intel.
+
+Whenever the player has to play a card, the hidden hands of the other
+players are sampled, consistently with everything the player has seen
+so far. Each sample is solved with the double dummy solver and the card
+which is best in most samples is the one played.
+"""
+from forte_fives import budget
+from forte_fives import card
+from forte_fives import events
+from forte_fives import intel
+from forte_fives import knowledge
+from forte_fives import rules
+from forte_fives import sampler
+from forte_fives import solver
+from forte_fives import transposition
+
+
+# Seconds spent on every card to play, which keeps a game against three
+# Intel players around half a second.
+DEFAULT_TIME_BUDGET = 0.005
+
+
+class PimcIntel(intel.Intel, events.Observer):
+    """
+    Intel that plays cards by sampling and solving the hidden hands.
+    Being an observer, it follows the game to know what cards the other
+    players may hold, see knowledge.Knowledge.
+    """
+
+    def __init__(self, player, rng=None, samples=20,
+                 time_budget=DEFAULT_TIME_BUDGET,
+                 table_size=transposition.DEFAULT_SIZE, weigh_bids=False):
+        """
+        Initializer of PimcIntel. Up to samples hands are solved for
+        each card to play, within time_budget seconds. A sample takes
+        tens of milliseconds to solve early in a round, so the default
+        budget cuts the first solve short there, and the best card it
+        found so far gets the only vote; samples add up later in the
+        round, as solving gets cheaper. With a time_budget of None,
+        every sample is solved in full, which takes about 10 seconds a
+        game. Solved positions are kept in a transposition table of
+        table_size slots, for the whole game. With weigh_bids, samples
+        vote in proportion to how well they explain the bids, see
+        sampler.bid_weights.
+        """
+        intel.Intel.__init__(self, player, rng)
+        self.samples = samples
+        self.time_budget = time_budget
+        self.table_size = table_size
+        self.weigh_bids = weigh_bids
+        self.table = None
+        self.solver = None
+        self.knowledge = knowledge.Knowledge(player)
+
+    ###########################################################################
+    #
+    # Game events
+    #
+    ###########################################################################
+    def cards_dealt(self, players, kiddie):
+        self.knowledge.cards_dealt(players, kiddie)
+        self.solver = None
+
+    def bid_placed(self, player, bid):
+        self.knowledge.bid_placed(player, bid)
+
+    def bidding_finished(self, player, bid):
+        self.knowledge.bidding_finished(player, bid)
+
+    def suit_selected(self, player, suit):
+        self.knowledge.suit_selected(player, suit)
+        if self.knowledge.players is None:
+            return
+        # Solved positions are shared by the samples, and by the
+        # following turns.
+        if self.table is None:
+            self.table = transposition.TranspositionTable(self.table_size)
+        self.solver = solver.Solver(suit, self.knowledge.seat,
+                                    self.knowledge.n_players, self.table)
+
+    def cards_discarded(self, player, amount):
+        self.knowledge.cards_discarded(player, amount)
+
+    def trick_started(self, player):
+        self.knowledge.trick_started(player)
+
+    def card_played(self, player, played_card):
+        self.knowledge.card_played(player, played_card)
+
+    def trick_finished(self, winner, winning_card, on_table, score_board):
+        self.knowledge.trick_finished(winner, winning_card, on_table,
+                                      score_board)
+
+    ###########################################################################
+    #
+    # Snapshots
+    #
+    ###########################################################################
+    def snapshot(self):
+        if self.solver is None:
+            return None
+        return self.knowledge.snapshot()
+
+    def restore(self, state):
+        """
+        Picks up a snapshot to make the decisions of the play phase.
+        The game events are not followed afterwards, and the solver
+        uses the transposition table shared by the whole process, so
+        that the decisions restored one after the other in a worker
+        process build on each other.
+        """
+        self.knowledge.restore(state)
+        self.solver = None
+        if state is None:
+            return
+        self.solver = solver.Solver(self.knowledge.suit, self.knowledge.seat,
+                                    self.knowledge.n_players,
+                                    transposition.shared(self.table_size))
+
+    ###########################################################################
+    #
+    # Decisions
+    #
+    ###########################################################################
+    def select_best_card(self, suit, cards_played):
+        """
+        Returns the card that is best in most of the sampled deals.
+        Falls back to Intel.select_best_card when not following a game.
+        """
+        valid_cards = rules.select_valid_cards(suit, self.player.hand,
+                                               cards_played)
+        if len(valid_cards) == 1:
+            return valid_cards[0]
+        if self.solver is None or self.solver.suit != suit:
+            return intel.Intel.select_best_card(self, suit, cards_played)
+
+        hand = self.player.hand.mask
+        hands_sampler = sampler.knowledge_sampler(self.knowledge)
+        weight = None
+        if self.weigh_bids:
+            weight = sampler.bid_weights(self.knowledge)
+        trick = [c.index for c in cards_played]
+
+        # Samples are solved one after the other, so stopping at any
+        # point leaves the votes of the samples solved so far. Even a
+        # sample cut short by a deadline still votes for the best card
+        # found.
+        votes = {}
+        time_budget = budget.Deadline(self.time_budget)
+        for x in range(self.samples):
+            hands = hands_sampler.sample(self.rng)
+            if hands is None:
+                break
+            vote = weight(hands) if weight is not None else 1
+            hands[self.knowledge.seat] = hand
+            move, points = self.solver.solve(hands, self.knowledge.leader,
+                                             trick, self.knowledge.highest,
+                                             self._solve_deadline(time_budget))
+            votes[move] = votes.get(move, 0) + vote
+            if time_budget.expired() or (self.deadline is not None and
+                                         self.deadline.expired()):
+                break
+
+        if not votes:
+            return intel.Intel.select_best_card(self, suit, cards_played)
+        return card.CARDS[max(sorted(votes), key=votes.get)]
+
+    def _solve_deadline(self, time_budget):
+        """
+        Returns the deadline of the next solve: the time budget of the
+        decision, or the deadline of the Game if it comes first.
+        """
+        if self.deadline is None:
+            return time_budget
+        remaining = self.deadline.remaining()
+        if (time_budget.seconds is None or self.deadline.nodes is not None or
+                remaining is not None and remaining < time_budget.remaining()):
+            return self.deadline
+        return time_budget
@@ -12,14 +12,15 @@ class Player(object):
     This class performs actions required to play a game.
     """
 
-    def __init__(self, name):
+    def __init__(self, name, intel_class=intel.Intel):
         """
         Initialization of Player object. Creates hand attribute.
+        intel_class is called with the player to create its intel.
         """
         self.name = name
         self.hand = None
         # Create intelligence object.
-        self.intel = intel.Intel(self)
+        self.intel = intel_class(self)
 
     def __str__(self):
         """
@@ -32,6 +33,19 @@ class Player(object):
             parts.append(str(card))
         return ' | '.join(parts)
 
+    def set_rng(self, rng):
+        """
+        Sets the random.Random instance used by Player's intel.
+        """
+        self.intel.rng = rng
+
+    def set_deadline(self, deadline):
+        """
+        Sets the budget.Deadline of the next decision of Player's intel,
+        None for no limit.
+        """
+        self.intel.deadline = deadline
+
     def set_hand(self, hand):
         """
         Sets parameter hand to Player's hand attribute.
@@ -0,0 +1,412 @@
+"""
+Compact binary records of played rounds.
+
+Every round is stored as a fixed size record: the seed of its game, the
+shuffled deck, the bids, the playing suit, the cards each player threw
+out and the cards of every turn, in the order they were played. That
+is everything needed to replay the round, without asking any Intel.
+
+A record file starts with a header giving the amount of players, and
+is followed by the records, so records can be appended to a file and
+the n-th record can be found without reading the ones before it.
+"""
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import events
+from forte_fives import rules
+
+import os
+import struct
+
+
+MAGIC = b'FFRC'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHH')
+
+# Cards dealt to the kiddie.
+KIDDIE_SIZE = 3
+
+# Points for winning a turn, and for winning the highest card in suit.
+TURN_POINTS = 5
+HIGHEST_CARD_POINTS = 5
+
+# Phases of a replayed round, see Replay.
+DEALT = 'dealt'
+BIDDING_FINISHED = 'bidding finished'
+CARDS_DISCARDED = 'cards discarded'
+CARD_PLAYED = 'card played'
+ROUND_FINISHED = 'round finished'
+
+
+class RecordException(Exception):
+    pass
+
+
+def record_struct(players):
+    """
+    Returns the struct.Struct of the records of rounds played by the
+    given amount of players.
+    """
+    return struct.Struct('<QI%dsB%dBBBB%dQ%ds%dh' % (
+        len(card.CARDS), players, players, players * rules.HAND_SIZE,
+        players))
+
+
+class RoundRecord(object):
+    """
+    A played round.
+
+    seed is the seed of the game and round the position of the round
+    in the game. deck holds the card indexes of the shuffled deck,
+    bids the bid of every seat (0 for a pass), in seat order. bidder is
+    the seat of the bidding player, bid the bid it has to make and suit
+    the playing suit. discards holds the mask of the cards each seat
+    threw out, tricks the card indexes of every turn, in the order they
+    were played, and points what every seat scored in the round.
+    """
+
+    def __init__(self, seed, round, deck, bids, bidder, bid, suit, discards,
+                 tricks, points):
+        self.seed = seed
+        self.round = round
+        self.deck = tuple(deck)
+        self.bids = tuple(bids)
+        self.bidder = bidder
+        self.bid = bid
+        self.suit = suit
+        self.discards = tuple(discards)
+        self.tricks = tuple(tuple(t) for t in tricks)
+        self.points = tuple(points)
+
+    def __eq__(self, other):
+        return (isinstance(other, RoundRecord) and
+                self.__dict__ == other.__dict__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    @property
+    def players(self):
+        return len(self.bids)
+
+    @property
+    def made(self):
+        """
+        Whether or not the bidding player made the bid.
+        """
+        return self.points[self.bidder] >= 0
+
+    def pack(self):
+        """
+        Returns the record as bytes.
+        """
+        flat = [c for t in self.tricks for c in t]
+        return record_struct(self.players).pack(
+            self.seed, self.round, bytes(bytearray(self.deck)),
+            len(self.bids), *(list(self.bids) + [
+                self.bidder, self.bid, card.SUITS.index(self.suit)] +
+                list(self.discards) + [bytes(bytearray(flat))] +
+                list(self.points)))
+
+    @classmethod
+    def unpack(cls, data, players, offset=0):
+        """
+        Returns the record of the given amount of players packed in data
+        at offset.
+        """
+        fields = record_struct(players).unpack_from(data, offset)
+        seed, round, deck, count = fields[:4]
+        if count != players:
+            raise RecordException('Record of %d players, expected %d'
+                                  % (count, players))
+        fields = fields[4:]
+        bids = fields[:players]
+        bidder, bid, suit = fields[players:players + 3]
+        fields = fields[players + 3:]
+        discards = fields[:players]
+        flat = bytearray(fields[players])
+        tricks = [flat[i:i + players] for i in range(0, len(flat), players)]
+        points = fields[players + 1:]
+        return cls(seed, round, bytearray(deck), bids, bidder, bid,
+                   card.SUITS[suit], discards, tricks, points)
+
+
+class RecordingObserver(events.Observer):
+    """
+    Writes a record of every round of a game to a RecordWriter.
+    """
+
+    def __init__(self, writer, players, seed=0):
+        """
+        Initializes the observer of a game of the given players. seed is
+        the one the game was played with, if any.
+        """
+        self.writer = writer
+        self.players = players
+        self.seed = seed
+        self.round = 0
+
+    def _seat(self, player):
+        return self.players.index(player)
+
+    def deck_shuffled(self, deck):
+        self.deck = [c.index for c in deck.cards]
+        self.bids = [0] * len(self.players)
+        self.discards = [0] * len(self.players)
+        self.points = [0] * len(self.players)
+        self.tricks = []
+        self.bidder = None
+
+    def cards_dealt(self, players, kiddie):
+        self.hands = [p.hand.mask for p in players]
+        self.kiddie = kiddie.mask
+
+    def bid_placed(self, player, bid):
+        self.bids[self._seat(player)] = bid
+
+    def bidding_finished(self, player, bid):
+        self.bidder = self._seat(player)
+        self.bid = bid
+
+    def suit_selected(self, player, suit):
+        self.suit = suit
+        self.hands[self.bidder] |= self.kiddie
+
+    def cards_discarded(self, player, amount):
+        seat = self._seat(player)
+        self.discards[seat] = self.hands[seat] & ~player.hand.mask
+
+    def trick_started(self, player):
+        self.tricks.append([])
+
+    def card_played(self, player, played_card):
+        self.tricks[-1].append(played_card.index)
+
+    def trick_finished(self, winner, winning_card, on_table, score_board):
+        self.points[self._seat(winner)] += TURN_POINTS
+
+    def bonus_awarded(self, player, highest_card, score_board):
+        self.points[self._seat(player)] += HIGHEST_CARD_POINTS
+
+    def bid_set(self, player, score_before, score_after):
+        self.points[self._seat(player)] += score_after - score_before
+
+    def round_finished(self, bidding_player, bid, made):
+        self.writer.write(RoundRecord(
+            self.seed, self.round, self.deck, self.bids, self.bidder,
+            self.bid, self.suit, self.discards, self.tricks, self.points))
+        self.round += 1
+
+
+class RecordWriter(object):
+    """
+    Appends records to a record file. The file is created if needed.
+    A record cut short at the end of the file, by a crash of an earlier
+    writer, is dropped.
+    """
+
+    def __init__(self, path, players=4):
+        """
+        Opens the record file at path for records of the given amount
+        of players.
+        """
+        self.path = path
+        self.players = players
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size:
+            if _read_header(path) != players:
+                raise RecordException('%s holds records of other players'
+                                      % path)
+            self.file = open(path, 'ab')
+            # Records appended after a partial one would all be misread.
+            record_size = record_struct(players).size
+            whole = size - (size - HEADER.size) % record_size
+            if whole < size:
+                self.file.truncate(whole)
+        else:
+            self.file = open(path, 'ab')
+            self.file.write(HEADER.pack(MAGIC, VERSION, players))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, record):
+        """
+        Appends the given RoundRecord.
+        """
+        if record.players != self.players:
+            raise RecordException('Record of %d players, expected %d'
+                                  % (record.players, self.players))
+        self.file.write(record.pack())
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def _read_header(path):
+    """
+    Returns the amount of players of the records in the file at path.
+    """
+    with open(path, 'rb') as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise RecordException('%s is not a record file' % path)
+    magic, version, players = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise RecordException('%s is not a record file' % path)
+    return players
+
+
+class RecordReader(object):
+    """
+    Reads the records of a record file, one at a time.
+    """
+
+    def __init__(self, path):
+        """
+        Opens the record file at path.
+        """
+        self.path = path
+        self.players = _read_header(path)
+        self.record_size = record_struct(self.players).size
+
+    def __len__(self):
+        """
+        Returns the amount of complete records in the file.
+        """
+        return (os.path.getsize(self.path) - HEADER.size) // self.record_size
+
+    def __iter__(self):
+        return self.records()
+
+    def offset(self, index):
+        """
+        Returns the position of the index-th record in the file.
+        """
+        return HEADER.size + index * self.record_size
+
+    def records(self, start=0, stop=None):
+        """
+        Generates the records from the start-th one up to, but not
+        including, the stop-th one, or the end of the file.
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset(start))
+            index = start
+            while stop is None or index < stop:
+                data = f.read(self.record_size)
+                if len(data) < self.record_size:
+                    break
+                yield RoundRecord.unpack(data, self.players)
+                index += 1
+
+
+def read_records(path, start=0, stop=None):
+    """
+    Generates the records of the record file at path, see
+    RecordReader.records.
+    """
+    return RecordReader(path).records(start, stop)
+
+
+class ReplayState(object):
+    """
+    The state of a replayed round at some point.
+
+    phase tells which point that is. hands holds the mask of the hand
+    of every seat, kiddie the mask of the kiddie until the bidding
+    player picks it up. leader is the seat that started the current
+    turn, trick the card indexes played in it so far and points the
+    points every seat won so far.
+    """
+
+    def __init__(self, phase, hands, kiddie, leader, trick, points):
+        self.phase = phase
+        self.hands = list(hands)
+        self.kiddie = kiddie
+        self.leader = leader
+        self.trick = list(trick)
+        self.points = list(points)
+
+
+class Replay(object):
+    """
+    Replays a RoundRecord, following the same steps as Game.play_round.
+    """
+
+    def __init__(self, record):
+        self.record = record
+
+    def states(self):
+        """
+        Generates the ReplayState of the round after the cards are
+        dealt, after the bidding, after the cards are discarded and
+        replaced, after every card played and at the end of the round.
+        RecordException is raised if the record is not consistent.
+        """
+        r = self.record
+        players = r.players
+        deck = list(r.deck)
+        if sorted(deck) != list(range(len(card.CARDS))):
+            raise RecordException('Bad deck in record %d' % r.round)
+
+        # Deal like Game.deal_cards, from the end of the deck.
+        hands = [0] * players
+        for seat in range(players):
+            for x in range(3):
+                hands[seat] |= 1 << deck.pop()
+        kiddie = 0
+        for x in range(KIDDIE_SIZE):
+            kiddie |= 1 << deck.pop()
+        for seat in range(players):
+            for x in range(2):
+                hands[seat] |= 1 << deck.pop()
+        points = [0] * players
+        yield ReplayState(DEALT, hands, kiddie, r.bidder, [], points)
+        yield ReplayState(BIDDING_FINISHED, hands, kiddie, r.bidder, [],
+                          points)
+
+        hands[r.bidder] |= kiddie
+        kiddie = 0
+        for x in range(players):
+            seat = (r.bidder + x) % players
+            if r.discards[seat] & ~hands[seat]:
+                raise RecordException('Bad discards in record %d' % r.round)
+            hands[seat] &= ~r.discards[seat]
+            for y in range(rules.HAND_SIZE - cardset.popcount(hands[seat])):
+                hands[seat] |= 1 << deck.pop()
+        yield ReplayState(CARDS_DISCARDED, hands, kiddie, r.bidder, [],
+                          points)
+
+        leader = r.bidder
+        highest = None
+        in_suit = rules.IN_SUIT_STRENGTH[r.suit]
+        for trick in r.tricks:
+            for position, c in enumerate(trick):
+                seat = (leader + position) % players
+                if not hands[seat] >> c & 1:
+                    raise RecordException('Bad card in record %d' % r.round)
+                hands[seat] &= ~(1 << c)
+                yield ReplayState(CARD_PLAYED, hands, kiddie, leader,
+                                  trick[:position + 1], points)
+            winning = rules.get_winnind_card(
+                r.suit, [card.CARDS[c] for c in trick])
+            leader = (leader + trick.index(winning.index)) % players
+            points[leader] += TURN_POINTS
+            if in_suit[winning.index] >= 0 and (
+                    highest is None or in_suit[winning.index] >
+                    in_suit[highest[0]]):
+                highest = (winning.index, leader)
+
+        if highest is not None:
+            points[highest[1]] += HIGHEST_CARD_POINTS
+        if points[r.bidder] < r.bid:
+            points[r.bidder] = -r.bid
+        yield ReplayState(ROUND_FINISHED, hands, kiddie, leader, [], points)
@@ -84,9 +84,8 @@ def get_in_suit_cards(suit, cards):
     Returns all the cards in the given suit.
     Ace of Hearts is also included in selection.
     """
-    return [c for c in cards
-            if c.suit == suit or
-            (c.suit == card.HEARTS and c.rank == 'A')]
+    strength = IN_SUIT_STRENGTH[suit]
+    return [c for c in cards if strength[c.index] >= 0]
 
 
 def get_out_suit_cards(suit, cards):
@@ -94,9 +93,8 @@ def get_out_suit_cards(suit, cards):
     Returns all the cards that are NOT in the given suit.
     Ace of Hearts is NEVER included in selection.
     """
-    return [c for c in cards
-            if c.suit != suit and
-            not (c.suit == card.HEARTS and c.rank == 'A')]
+    strength = IN_SUIT_STRENGTH[suit]
+    return [c for c in cards if strength[c.index] < 0]
 
 
 def get_card_order_for_suit(suit, in_suit=True):
@@ -117,6 +115,63 @@ def get_card_order_for_suit(suit, in_suit=True):
             return OUT_SUIT_ORDER_BLACK
 
 
+def _build_in_suit_strength(suit):
+    """
+    Returns, for every card index, the position of the card within the
+    card order of suit, or -1 if the card is not in suit.
+    """
+    cards_order = get_card_order_for_suit(suit)
+    strength = []
+    for c in card.CARDS:
+        # Adjust for Ace of Hearts.
+        if c.suit == card.HEARTS and c.rank == 'A':
+            strength.append(cards_order.index('AH'))
+        elif c.suit == suit:
+            strength.append(cards_order.index(c.rank))
+        else:
+            strength.append(-1)
+    return tuple(strength)
+
+
+def _build_trick_strength(suit, first_suit):
+    """
+    Returns, for every card index, how strong the card is in a turn
+    where suit is the playing suit and the first card played is of
+    first_suit. Cards in suit beat all others. Otherwise, only cards
+    matching the first card can win. Cards that can not win are -1.
+    """
+    in_suit = IN_SUIT_STRENGTH[suit]
+    first = IN_SUIT_STRENGTH[first_suit]
+    strength = []
+    for index in range(len(card.CARDS)):
+        if in_suit[index] >= 0:
+            strength.append(len(card.CARDS) + in_suit[index])
+        else:
+            strength.append(first[index])
+    return tuple(strength)
+
+
+# Position of every card, by index, within the card order of each suit.
+# Cards not in suit are -1.
+IN_SUIT_STRENGTH = dict((s, _build_in_suit_strength(s)) for s in card.SUITS)
+
+# How strong every card, by index, is in a turn. The first key is the
+# playing suit, the second one the suit of the first card played. The
+# strongest card on the table wins the turn.
+TRICK_STRENGTH = dict(
+    (s, dict((f, _build_trick_strength(s, f)) for f in card.SUITS))
+    for s in card.SUITS)
+
+
+def get_in_suit_rank(suit, c):
+    """
+    Returns the position of the given card within the card order of
+    suit, or -1 if the card is not in suit. The higher the position,
+    the stronger the card.
+    """
+    return IN_SUIT_STRENGTH[suit][c.index]
+
+
 def get_highest_card_in_suit(suit, cards):
     """
     Returns the highest card in suit of the given cards.
@@ -129,16 +184,11 @@ def get_highest_card_in_suit(suit, cards):
     if len(cards) == 1:
         return cards[0]
 
-    cards_order = get_card_order_for_suit(suit)
-
+    strength = IN_SUIT_STRENGTH[suit]
     highest_index = -1
     highest_card = None
     for c in cards:
-        rank = c.rank
-        # Adjust for Ace of Hearts.
-        if c.suit == card.HEARTS and c.rank == 'A':
-            rank = 'AH'
-        current_index = cards_order.index(rank)
+        current_index = strength[c.index]
         if current_index > highest_index:
             highest_index = current_index
             highest_card = c
@@ -165,12 +215,14 @@ def get_winnind_card(suit, cards):
     if len(cards) == 0:
         raise RulesException("Need at least one card to get winner!")
 
-    # Determine whether or not this turn was played in suit.
-    in_suit = len(get_in_suit_cards(suit, cards)) > 0
+    # Cards in suit are stronger than any other card. Otherwise, the
+    # first card determines what suit is played in.
+    strength = TRICK_STRENGTH[suit][cards[0].suit]
 
-    if in_suit:
-        # When in_suit we can ignore all the out suit cards.
-        return get_highest_card_in_suit(suit, cards)
-
-    else:
-        return get_highest_card_out_suit(cards)
+    winning_card = cards[0]
+    highest = strength[winning_card.index]
+    for c in cards:
+        if strength[c.index] > highest:
+            highest = strength[c.index]
+            winning_card = c
+    return winning_card
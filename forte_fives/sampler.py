@@ -0,0 +1,194 @@
+"""
+Uniform sampling of the hidden hands consistent with what is known.
+
+The hidden cards are dealt to the other players, each getting as many
+cards as it holds and only cards it may hold (see knowledge.Knowledge),
+the remaining ones being out of the game: in the deck, discarded or
+left in the kiddie. Dealing the cards one player after the other and
+starting over when the constraints can't be met gets slow, and biased,
+once several players are known to be void.
+
+Instead, the cards are grouped in classes by the set of players that
+may hold them, a handful of classes at most. The amount of deals
+giving every player a given count of the cards of every class is a
+product of multinomial coefficients, so the deals are counted class
+after class, once per decision. Sampling then picks the counts of
+every class in proportion to the deals they lead to, and the cards of
+the class uniformly: every consistent deal comes up with the same
+probability, and no sample is ever thrown away.
+
+Deals can also be weighted by how likely the players were to bid the
+way they did with the hands dealt, see bid_weights.
+"""
+from forte_fives import cardset
+from forte_fives import rules
+from forte_fives import strength
+
+import bisect
+import itertools
+import math
+import random
+
+
+# Points between two bids, the spread of the bidding model.
+DEFAULT_SCALE = 5.0
+
+
+def _ways(total, counts):
+    """
+    Returns the amount of ways to pick counts[i] cards for every i out
+    of total cards, the cards left being out of the game.
+    """
+    ways = math.factorial(total) // math.factorial(total - sum(counts))
+    for count in counts:
+        ways //= math.factorial(count)
+    return ways
+
+
+class Sampler(object):
+    """
+    Deals hidden hands uniformly among the ones consistent with the
+    constraints. The deals are counted on creation, so a sampler is
+    meant to be created once per decision and sampled many times.
+    """
+
+    def __init__(self, unknown, possible, sizes, seat=None):
+        """
+        Initializer of Sampler. The cards of the unknown mask are dealt,
+        sizes[s] of them to every seat s but seat, only ones of the
+        possible[s] mask. The cards left are out of the game.
+        """
+        self.players = len(sizes)
+        self.seats = [s for s in range(self.players)
+                      if s != seat and sizes[s]]
+
+        classes = {}
+        for index in cardset.indexes_of(unknown):
+            allowed = tuple(x for x, s in enumerate(self.seats)
+                            if possible[s] >> index & 1)
+            if allowed:
+                classes.setdefault(allowed, []).append(index)
+        self._classes = sorted(classes.items())
+
+        self._options = [{} for c in self._classes]
+        start = tuple(sizes[s] for s in self.seats)
+        self._start = start
+        self.count = self._count(0, start)
+
+    def _count(self, i, needs):
+        """
+        Returns the amount of deals of the classes from i on, the seats
+        needing the given amount of cards. Keeps the options of every
+        class along the way, see sample.
+        """
+        if i == len(self._classes):
+            return 0 if any(needs) else 1
+        options = self._options[i]
+        if needs in options:
+            return options[needs][0][-1] if options[needs][0] else 0
+
+        allowed, cards = self._classes[i]
+        cumulative = []
+        choices = []
+        total = 0
+        ranges = [range(min(needs[x], len(cards)) + 1) for x in allowed]
+        for counts in itertools.product(*ranges):
+            if sum(counts) > len(cards):
+                continue
+            left = list(needs)
+            for x, count in zip(allowed, counts):
+                left[x] -= count
+            left = tuple(left)
+            deals = self._count(i + 1, left)
+            if not deals:
+                continue
+            total += _ways(len(cards), counts) * deals
+            cumulative.append(total)
+            choices.append((counts, left))
+        options[needs] = (cumulative, choices)
+        return total
+
+    def sample(self, rng=random):
+        """
+        Returns the list of hand masks of a deal, EMPTY for the seats
+        not dealt any card, or None if there is no consistent deal.
+        """
+        if not self.count:
+            return None
+        hands = [cardset.EMPTY] * self.players
+        needs = self._start
+        for options, (allowed, cards) in zip(self._options, self._classes):
+            cumulative, choices = options[needs]
+            deal = rng.randrange(cumulative[-1])
+            counts, needs = choices[bisect.bisect_right(cumulative, deal)]
+            picked = rng.sample(cards, sum(counts))
+            start = 0
+            for x, count in zip(allowed, counts):
+                seat = self.seats[x]
+                for index in picked[start:start + count]:
+                    hands[seat] |= 1 << index
+                start += count
+        return hands
+
+
+def knowledge_sampler(knowledge):
+    """
+    Returns the Sampler of the hands of the other players in the play
+    phase, from the knowledge of a player.
+    """
+    return Sampler(knowledge.unknown(), knowledge.possible,
+                   knowledge.hand_sizes(), knowledge.seat)
+
+
+def _logistic(x):
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+def bid_weights(knowledge, table=None, scale=DEFAULT_SCALE):
+    """
+    Returns a function giving the importance weight of a deal (the list
+    of hand masks of a sample, in the play phase): how likely the other
+    players were to bid the way they did with these hands.
+
+    Players are assumed to bid like strength.StrengthIntel, when their
+    best suit is expected to make the bid, give or take scale points.
+    The hands are looked up in table, defaulting to the one of
+    strength.load_default_table, with the cards already played put
+    back. Returns None without a table.
+
+    Only the bids of the seats which kept all their cards are weighed:
+    for them, the hand sampled and the cards played make up the hand
+    they bid with. The bidder took the kiddie, and the seats that threw
+    out cards were dealt new ones, so the hands they play are not the
+    ones they bid with, and are left out.
+    """
+    if table is None:
+        table = strength.load_default_table()
+    if table is None:
+        return None
+
+    # (seat, bid, sign): the seat bid, sign 1, or did not bid, sign -1,
+    # with its hand in its best suit.
+    terms = []
+    current = None
+    for seat, bid in enumerate(knowledge.bids):
+        if (seat != knowledge.seat and seat != knowledge.bidder and
+                knowledge.discarded[seat] == 0):
+            if bid:
+                terms.append((seat, bid, 1))
+            else:
+                valid = rules.select_valid_bids(current)
+                if valid:
+                    terms.append((seat, valid[0], -1))
+        if bid:
+            current = bid
+
+    def weight(hands):
+        w = 1.0
+        for seat, bid, sign in terms:
+            best = table.best_suit(hands[seat] | knowledge.shown[seat])
+            if best is not None:
+                w *= _logistic(sign * (best[1] - bid) / scale)
+        return w
+
+    return weight
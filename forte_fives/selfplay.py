@@ -0,0 +1,383 @@
+"""
+Self-play data generation.
+
+Games between configurable intels are played across a pool of
+processes, and every decision taken in them is written as a fixed size
+record: the observation (see features), the action and the outcome.
+
+Records go to shards of a fixed amount of games, each in a file named
+after its position. A shard is written to a temporary file and renamed
+once complete, so a generation can be interrupted at any point and
+resumed: shards already written are skipped. With dedup, records equal
+to ones already written, in any shard, are dropped.
+
+A shard file starts with a header, followed by the records, compressed
+with zlib as a whole or not compressed at all. Either way, a shard
+loads as a NumPy structured array without parsing, see load_shard:
+uncompressed shards are memory mapped, compressed ones decompressed
+into a buffer with a single call.
+"""
+from forte_fives import features
+from forte_fives import player
+from forte_fives import simulation
+from forte_fives import tournament
+
+from argparse import ArgumentParser
+import importlib
+import json
+import multiprocessing
+import os
+import struct
+import zlib
+
+
+MAGIC = b'FFSP'
+VERSION = 1
+
+# Magic, version, flags and amount of records.
+HEADER = struct.Struct('<4sHHI')
+
+# Flags of a shard.
+COMPRESSED = 1
+
+# Fields of a record, with their NumPy types, see record_dtype.
+RECORD_FIELDS = (
+    ('hand', '<u8'),
+    ('table', '<u8'),
+    ('valid', '<u8'),
+    ('action', '<u8'),
+    ('suit', 'u1'),
+    ('kind', 'u1'),
+    ('tricks', 'u1'),
+    ('seat', 'u1'),
+    ('bidder', 'u1'),
+    ('score', '<i2'),
+    ('other_score', '<i2'),
+    ('outcome', '<i2'),
+)
+RECORD = struct.Struct('<QQQQBBBBBhhh')
+
+# Settings of a generation, kept in its directory so that resuming it
+# with other ones is caught.
+MANIFEST = 'selfplay.json'
+
+# Intels available by name. Others are given as module:class.
+INTELS = {
+    'random': 'forte_fives.intel:Intel',
+    'strength': 'forte_fives.strength:StrengthIntel',
+    'pimc': 'forte_fives.pimc:PimcIntel',
+    'cfr': 'forte_fives.cfr:CfrIntel',
+    'neural': 'forte_fives.neural:NeuralIntel',
+}
+
+
+try:
+    _replace = os.replace
+except AttributeError:
+    # Python 2 has no os.replace: rename only fails to replace an
+    # existing file on Windows.
+    _replace = os.rename
+
+
+class SelfPlayException(Exception):
+    pass
+
+
+def intel_class(name):
+    """
+    Returns the intel class of the given name, see INTELS.
+    """
+    spec = INTELS.get(name, name)
+    if ':' not in spec:
+        raise SelfPlayException('Unknown intel %s' % name)
+    module, attribute = spec.split(':', 1)
+    try:
+        return getattr(importlib.import_module(module), attribute)
+    except (ImportError, AttributeError) as e:
+        raise SelfPlayException('Bad intel %s: %s' % (name, e))
+
+
+class PlayersFactory(object):
+    """
+    Creates the players of a game, one per intel name. Unlike a
+    function creating them, it pickles, to be sent to other processes.
+    """
+
+    def __init__(self, intels):
+        self.intels = list(intels)
+
+    def __call__(self):
+        return [player.Player('Player %d' % seat, intel_class(name))
+                for seat, name in enumerate(self.intels)]
+
+
+def pack(decision):
+    """
+    Returns the record of a decision of features.decisions, as bytes.
+    """
+    kind, seat, bidder, o, action, outcome = decision
+    return RECORD.pack(o[0], o[2], o[6], action, o[1], kind, o[3], seat,
+                       bidder, o[4], o[5], outcome)
+
+
+def unpack(data, offset=0):
+    """
+    Returns the decision of the record packed in data at offset, as
+    features.decisions generates it.
+    """
+    (hand, table, valid, action, suit, kind, tricks, seat, bidder, score,
+     other_score, outcome) = RECORD.unpack_from(data, offset)
+    return (kind, seat, bidder,
+            (hand, suit, table, tricks, score, other_score, valid),
+            action, outcome)
+
+
+def record_dtype():
+    """
+    Returns the NumPy dtype of the records.
+    """
+    import numpy
+    return numpy.dtype(list(RECORD_FIELDS))
+
+
+class _Collector(list):
+    """
+    Keeps the records of played rounds, like a record.RecordWriter.
+    """
+    write = list.append
+
+
+def play_shard(factory, seeds):
+    """
+    Plays one game per seed with the players of factory, and returns
+    the records of the decisions taken, as bytes.
+    """
+    rounds = _Collector()
+    simulation.play_games(factory, seeds, rounds)
+    return b''.join(pack(d) for d in features.decisions(rounds))
+
+
+def _play_shard(args):
+    """
+    Worker entry point, plays the games of one shard.
+    """
+    index, factory, seeds = args
+    return index, play_shard(factory, seeds)
+
+
+def shard_path(directory, index):
+    return os.path.join(directory, 'shard-%06d.ffsp' % index)
+
+
+def shard_paths(directory):
+    """
+    Returns the paths of the shards in the given directory, in order.
+    """
+    return [os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.startswith('shard-') and name.endswith('.ffsp')]
+
+
+def write_shard(path, data, compress=True):
+    """
+    Writes the given records to a shard file. The file only shows up
+    once complete.
+    """
+    flags = COMPRESSED if compress else 0
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, len(data) // RECORD.size))
+        f.write(zlib.compress(data) if compress else data)
+    _replace(temporary, path)
+
+
+def _read_header(path, f):
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise SelfPlayException('%s is not a shard' % path)
+    magic, version, flags, count = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise SelfPlayException('%s is not a shard' % path)
+    return flags, count
+
+
+def read_shard(path):
+    """
+    Returns the records of a shard file, as bytes.
+    """
+    with open(path, 'rb') as f:
+        flags, count = _read_header(path, f)
+        data = f.read()
+    if flags & COMPRESSED:
+        try:
+            data = zlib.decompress(data)
+        except zlib.error:
+            raise SelfPlayException('%s is corrupt' % path)
+    if len(data) != count * RECORD.size:
+        raise SelfPlayException('%s is truncated' % path)
+    return data
+
+
+def shard_decisions(path):
+    """
+    Generates the decisions of a shard file, see unpack.
+    """
+    data = read_shard(path)
+    for offset in range(0, len(data), RECORD.size):
+        yield unpack(data, offset)
+
+
+def load_shard(path):
+    """
+    Returns the records of a shard file as a NumPy structured array of
+    record_dtype. Uncompressed shards are memory mapped.
+    """
+    import numpy
+    with open(path, 'rb') as f:
+        flags, count = _read_header(path, f)
+    if flags & COMPRESSED:
+        return numpy.frombuffer(read_shard(path), dtype=record_dtype())
+    return numpy.memmap(path, dtype=record_dtype(), mode='r',
+                        offset=HEADER.size, shape=(count,))
+
+
+def _check_manifest(directory, settings):
+    """
+    Writes the settings of a generation to its directory, or checks
+    they are the ones of the generation being resumed.
+    """
+    path = os.path.join(directory, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            written = json.load(f)
+        if written != settings:
+            raise SelfPlayException(
+                '%s holds another generation: %s' % (directory, written))
+        return
+    with open(path, 'w') as f:
+        json.dump(settings, f, indent=2, sort_keys=True)
+
+
+def _digests(data):
+    return [hash(data[offset:offset + RECORD.size])
+            for offset in range(0, len(data), RECORD.size)]
+
+
+def generate(directory, n_games, intels, seed=0, processes=None,
+             shard_size=tournament.DEFAULT_SHARD_SIZE, compress=True,
+             dedup=False, log=None):
+    """
+    Plays n_games games across a pool of processes, processes defaulting
+    to the number of CPUs, and writes their decisions to shards in the
+    given directory. intels holds the intel name of every seat.
+
+    Shards already in the directory are kept, so an interrupted
+    generation resumes where it stopped. Games only depend on the
+    seed, so resuming gives the shards an uninterrupted generation
+    would have. With dedup, records equal to ones already written are
+    dropped. log, if given, is called with the index and the amount of
+    records of every shard written. Returns the amount of shards
+    written, of records written and of records dropped.
+    """
+    for name in intels:
+        intel_class(name)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    _check_manifest(directory, {'games': n_games, 'seed': seed,
+                                'shard_size': shard_size,
+                                'intels': list(intels),
+                                'compress': compress, 'dedup': dedup,
+                                'version': VERSION})
+
+    factory = PlayersFactory(intels)
+    shards = tournament.make_shards(simulation.game_seeds(n_games, seed),
+                                    shard_size)
+    tasks = [(index, factory, seeds) for index, seeds in enumerate(shards)
+             if not os.path.exists(shard_path(directory, index))]
+
+    seen = set()
+    if dedup:
+        for path in shard_paths(directory):
+            seen.update(_digests(read_shard(path)))
+
+    written = records = dropped = 0
+    pool = multiprocessing.Pool(processes)
+    try:
+        for index, data in pool.imap(_play_shard, tasks):
+            if dedup:
+                kept = []
+                for offset, digest in zip(range(0, len(data), RECORD.size),
+                                          _digests(data)):
+                    if digest in seen:
+                        dropped += 1
+                    else:
+                        seen.add(digest)
+                        kept.append(data[offset:offset + RECORD.size])
+                data = b''.join(kept)
+            write_shard(shard_path(directory, index), data, compress)
+            written += 1
+            records += len(data) // RECORD.size
+            if log is not None:
+                log(index, len(data) // RECORD.size)
+    finally:
+        pool.close()
+        pool.join()
+
+    return written, records, dropped
+
+
+def parse_args():
+
+    parser = ArgumentParser(
+            description='Plays games between bots and writes every '
+                        'decision taken, to train on')
+
+    parser.add_argument('directory',
+            help='Directory of the shards, resumed if it holds some')
+    parser.add_argument('-g', '--games', type=int, default=1000,
+            help='Games to play (default: %(default)s)')
+    parser.add_argument('-i', '--intel', action='append', default=None,
+            help='Intel of a seat, a name among %s or module:class. '
+                 'Repeat for every seat, or give one for all of them '
+                 '(default: random)' % ', '.join(sorted(INTELS)))
+    parser.add_argument('-n', '--players', type=int, default=4,
+            help='Players per game (default: %(default)s)')
+    parser.add_argument('-s', '--seed', type=int, default=0,
+            help='Seed of the games (default: %(default)s)')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+            help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--shard-size', type=int,
+            default=tournament.DEFAULT_SHARD_SIZE,
+            help='Games per shard (default: %(default)s)')
+    parser.add_argument('--no-compress', action='store_true',
+            help='Write shards that can be memory mapped')
+    parser.add_argument('--dedup', action='store_true',
+            help='Drop records equal to ones already written')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    intels = args.intel or ['random']
+    if len(intels) == 1:
+        intels = intels * args.players
+    if len(intels) != args.players:
+        raise SystemExit('%d intels given for %d players'
+                         % (len(intels), args.players))
+
+    def log(index, count):
+        print('Shard %d: %d records' % (index, count))
+
+    try:
+        written, records, dropped = generate(
+            args.directory, args.games, intels, args.seed, args.processes,
+            args.shard_size, not args.no_compress, args.dedup, log)
+    except SelfPlayException as e:
+        raise SystemExit(str(e))
+    print('%d shards, %d records written to %s, %d duplicates dropped'
+          % (written, records, args.directory, dropped))
+
+
+if __name__ == '__main__':
+    main()
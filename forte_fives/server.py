@@ -0,0 +1,612 @@
+"""
+Asyncio game server, Python 3 only.
+
+Many tables are played at once in a single process. An AsyncGame
+awaits the decisions of its players instead of blocking on them, so a
+table waiting on a remote player does not hold up the other tables,
+and no thread is needed per table.
+
+Remote players connect to a GameServer over a local TCP socket and
+speak newline delimited JSON. A client introduces itself with
+
+    {"type": "hello", "name": "..."}
+
+and is told its name at the table with a "welcome" message. It is then
+sent an "event" message for everything that happens at its table, and
+a "request" message for every decision it has to make:
+
+    {"type": "request", "id": 1, "decision": "should_bid",
+     "hand": [...], "options": [...], ...}
+
+which it answers with
+
+    {"id": 1, "answer": ...}
+
+Cards are given by their index in card.CARDS. Answers that are not
+valid get an "error" message back and the request is repeated. A
+client that disconnects, or does not answer within the move time of
+the table, has its decisions made by the intel of the bots instead.
+See forte_fives.client for a client.
+"""
+from forte_fives import budget
+from forte_fives import card
+from forte_fives import events
+from forte_fives import game
+from forte_fives import instrument
+from forte_fives import intel
+from forte_fives import player
+from forte_fives import rules
+
+from argparse import ArgumentParser
+import asyncio
+import functools
+import itertools
+import json
+import random
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 4545
+
+# Seconds a remote player has for every decision.
+DEFAULT_MOVE_TIME = 60.0
+
+
+class AsyncPlayer(player.Player):
+    """
+    A player whose decisions are awaited. The async_ methods mirror
+    the decisions of Player, and by default make them right away.
+
+    Cards chosen elsewhere are played or thrown out by setting them
+    as pending, and calling the Player method as usual.
+    """
+
+    def __init__(self, name, intel_class=intel.Intel):
+        player.Player.__init__(self, name, intel_class)
+        self._pending = None
+
+    def _select_card(self, suit, cards_played):
+        if self._pending is not None:
+            return self._pending
+        return player.Player._select_card(self, suit, cards_played)
+
+    def _select_discard_cards(self, suit):
+        if self._pending is not None:
+            return self._pending
+        return player.Player._select_discard_cards(self, suit)
+
+    def play_pending_card(self, selected_card, suit, cards_played):
+        """
+        Plays selected_card, see play_card.
+        """
+        self._pending = selected_card
+        try:
+            return self.play_card(suit, cards_played)
+        finally:
+            self._pending = None
+
+    def discard_pending_cards(self, cards, suit):
+        """
+        Throws out the given cards, see discard_cards.
+        """
+        self._pending = cards
+        try:
+            return self.discard_cards(suit)
+        finally:
+            self._pending = None
+
+    async def async_place_bid(self, current_bid):
+        return self.place_bid(current_bid)
+
+    async def async_select_suit(self):
+        return self.select_suit()
+
+    async def async_discard_cards(self, suit):
+        return self.discard_cards(suit)
+
+    async def async_play_card(self, suit, cards_played):
+        return self.play_card(suit, cards_played)
+
+
+class Disconnected(Exception):
+    """
+    Raised by a RemotePlayer asked for a decision once disconnected.
+    """
+
+
+class AsyncGame(game.Game):
+    """
+    A Game whose rounds are coroutines, following the same steps, see
+    Game.round_steps.
+
+    The decisions of AsyncPlayers are awaited. With a move_time, an
+    AsyncPlayer gets a budget.Deadline, and if it does not decide in
+    time, raises budget.DeadlineExceeded or is disconnected, the
+    decision is made by fallback_class instead. Other players decide
+    right away, as in a Game, and the table then lets the other tables
+    run.
+
+    Players which are observers are notified of the game events too.
+    """
+
+    async def start(self):
+        """
+        Plays the game and returns the name of the winner.
+        """
+        self.update_listeners()
+        self.notify('game_started', self.players)
+
+        while self.should_continue():
+            await self.play_round()
+
+        winner = self.score_board.get_winner()
+        self.notify('game_finished', winner)
+        return winner
+
+    def update_listeners(self):
+        game.Game.update_listeners(self)
+        for p in self.players:
+            if isinstance(p, events.Observer):
+                self.listeners.append(p)
+
+    async def play_round(self):
+        """
+        Plays a round, awaiting the decisions of round_steps.
+        """
+        for decision in self.round_steps():
+            decision.answer = await self.decide_async(decision)
+
+    async def decide_async(self, decision):
+        """
+        Has the player make the given game.Decision and returns what it
+        decided, see Game.decide.
+        """
+        player = decision.player
+        func = getattr(player, decision.method)
+        if not isinstance(player, AsyncPlayer):
+            answer = self.decide(decision.name, player, func, *decision.args)
+            await asyncio.sleep(0)
+            return answer
+
+        coroutine = getattr(player, 'async_' + decision.method)(
+            *decision.args)
+        deadline = None
+        if self.move_time is not None:
+            deadline = budget.Deadline(self.move_time)
+            player.set_deadline(deadline)
+        if self.instrumentation is not None:
+            start = self.instrumentation.timer()
+        try:
+            answer = await asyncio.wait_for(coroutine, self.move_time)
+        except (asyncio.TimeoutError, budget.DeadlineExceeded):
+            self.notify('deadline_exceeded', player, decision.name, True)
+            return self.fall_back(player, func, *decision.args)
+        except Disconnected:
+            return self.fall_back(player, func, *decision.args)
+        finally:
+            player.set_deadline(None)
+
+        if self.instrumentation is not None:
+            self.instrumentation.record(decision.name, player.name,
+                                        self.instrumentation.timer() - start)
+        if deadline is not None and deadline.expired():
+            self.notify('deadline_exceeded', player, decision.name, False)
+        return answer
+
+
+def _indexes(cards):
+    return [c.index for c in cards]
+
+
+class RemotePlayer(AsyncPlayer, events.Observer):
+    """
+    A player on the other end of a connection, see the protocol at the
+    top of this module. Once disconnected, it raises Disconnected when
+    asked for a decision.
+    """
+
+    def __init__(self, name, reader, writer, intel_class=intel.Intel):
+        """
+        Initializes the player connected through the given
+        asyncio.StreamReader and asyncio.StreamWriter.
+        """
+        AsyncPlayer.__init__(self, name, intel_class)
+        self.reader = reader
+        self.writer = writer
+        self.connected = True
+        self.players = []
+        self._requests = itertools.count(1)
+
+    def send(self, message):
+        """
+        Sends a message, if still connected.
+        """
+        if not self.connected:
+            return
+        if self.writer.is_closing():
+            self.connected = False
+            return
+        self.writer.write((json.dumps(message) + '\n').encode('utf-8'))
+
+    def event(self, name, **fields):
+        fields.update(type='event', event=name)
+        self.send(fields)
+
+    def check_connection(self):
+        """
+        Returns whether or not the player is still connected, noticing
+        a connection closed by the other end while nothing was read.
+        """
+        if self.connected and (self.writer.is_closing() or
+                               self.reader.at_eof()):
+            self.connected = False
+        return self.connected
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        self.connected = False
+        self.writer.close()
+
+    async def read(self):
+        """
+        Returns the next message received, None once disconnected.
+        """
+        while self.connected:
+            try:
+                line = await self.reader.readline()
+            except ConnectionError:
+                line = b''
+            if not line:
+                self.connected = False
+                break
+            try:
+                message = json.loads(line.decode('utf-8'))
+                if not isinstance(message, dict):
+                    raise ValueError('Not an object')
+            except ValueError as e:
+                self.send({'type': 'error', 'message': 'Bad message: %s' % e})
+                continue
+            return message
+        return None
+
+    async def ask(self, decision, **fields):
+        """
+        Sends a request for the given decision and returns the answer,
+        None once disconnected. Answers to earlier requests, which ran
+        out of time, are ignored.
+        """
+        request_id = next(self._requests)
+        fields.update(type='request', id=request_id, decision=decision,
+                      hand=_indexes(self.hand))
+        self.send(fields)
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            self.connected = False
+        while self.connected:
+            message = await self.read()
+            if message is not None and message.get('id') == request_id:
+                return message.get('answer')
+        return None
+
+    def reject(self, answer):
+        self.send({'type': 'error',
+                   'message': 'Not a valid answer: %r' % (answer,)})
+
+    async def async_place_bid(self, current_bid):
+        options = [0] + list(rules.select_valid_bids(current_bid))
+        while self.connected:
+            answer = await self.ask(instrument.SHOULD_BID,
+                                    current_bid=current_bid or 0,
+                                    options=options)
+            if answer in options:
+                return answer
+            self.reject(answer)
+        raise Disconnected()
+
+    async def async_select_suit(self):
+        while self.connected:
+            answer = await self.ask(instrument.SELECT_SUIT,
+                                    options=list(card.SUITS))
+            if answer in card.SUITS:
+                return answer
+            self.reject(answer)
+        raise Disconnected()
+
+    async def async_discard_cards(self, suit):
+        hand_indexes = _indexes(self.hand)
+        minimum = max(0, len(hand_indexes) - rules.HAND_SIZE)
+        maximum = len(hand_indexes) - rules.MINIMUM_KEEP
+        while self.connected:
+            answer = await self.ask(instrument.SELECT_DISCARD_CARDS,
+                                    suit=suit, minimum=minimum,
+                                    maximum=maximum)
+            if (isinstance(answer, list) and
+                    minimum <= len(answer) <= maximum and
+                    len(set(answer)) == len(answer) and
+                    all(a in hand_indexes for a in answer)):
+                return self.discard_pending_cards(
+                    [card.CARDS[a] for a in answer], suit)
+            self.reject(answer)
+        raise Disconnected()
+
+    async def async_play_card(self, suit, cards_played):
+        options = _indexes(rules.select_valid_cards(suit, self.hand,
+                                                    cards_played))
+        while self.connected:
+            answer = await self.ask(instrument.SELECT_BEST_CARD, suit=suit,
+                                    trick=_indexes(cards_played),
+                                    options=options)
+            if answer in options:
+                return self.play_pending_card(card.CARDS[answer], suit,
+                                              cards_played)
+            self.reject(answer)
+        raise Disconnected()
+
+    # Game events, forwarded to the client.
+
+    def _scores(self, score_board):
+        return dict((name, score_board.get_score(name))
+                    for name in self.players)
+
+    def game_started(self, players):
+        self.players = [p.name for p in players]
+        self.event('game_started', players=self.players)
+
+    def cards_dealt(self, players, kiddie):
+        self.event('cards_dealt', hand=_indexes(self.hand))
+
+    def bid_placed(self, player, bid):
+        self.event('bid_placed', player=player.name, bid=bid)
+
+    def bidding_finished(self, player, bid):
+        self.event('bidding_finished', player=player.name, bid=bid)
+
+    def suit_selected(self, player, suit):
+        self.event('suit_selected', player=player.name, suit=suit)
+
+    def cards_discarded(self, player, amount):
+        self.event('cards_discarded', player=player.name, amount=amount)
+
+    def trick_started(self, player):
+        self.event('trick_started', player=player.name)
+
+    def card_played(self, player, played_card):
+        self.event('card_played', player=player.name, card=played_card.index)
+
+    def trick_finished(self, winner, winning_card, on_table, score_board):
+        self.event('trick_finished', player=winner.name,
+                   card=winning_card.index, scores=self._scores(score_board))
+
+    def bonus_awarded(self, player, highest_card, score_board):
+        self.event('bonus_awarded', player=player.name,
+                   card=highest_card.index, scores=self._scores(score_board))
+
+    def bid_set(self, player, score_before, score_after):
+        self.event('bid_set', player=player.name, score_before=score_before,
+                   score_after=score_after)
+
+    def deadline_exceeded(self, player, decision, fell_back):
+        self.event('deadline_exceeded', player=player.name,
+                   decision=decision, fell_back=fell_back)
+
+    def round_finished(self, bidding_player, bid, made):
+        self.event('round_finished', player=bidding_player.name, bid=bid,
+                   made=made)
+
+    def game_finished(self, winner):
+        self.event('game_finished', winner=winner)
+
+
+def _unique_name(name, taken):
+    unique = name
+    for x in itertools.count(2):
+        if unique not in taken:
+            return unique
+        unique = '%s (%d)' % (name, x)
+
+
+class GameServer(object):
+    """
+    Seats remote players at tables as they connect, filling the other
+    seats with bots, and plays every table as an asyncio task.
+    """
+
+    def __init__(self, remote_players=1, players=4, bot_class=player.Player,
+                 intel_class=intel.Intel, move_time=DEFAULT_MOVE_TIME,
+                 seed=None):
+        """
+        Initializes a server opening a table of the given amount of
+        players for every remote_players connected. Bots are created
+        with bot_class and intel_class, which also makes the decisions
+        of the remote players which are gone or run out of time.
+        move_time is the amount of seconds remote players have for
+        every decision.
+        """
+        if not 0 < remote_players <= players:
+            raise ValueError('Bad amount of remote players, %d'
+                             % remote_players)
+        self.remote_players = remote_players
+        self.players = players
+        self.bot_class = bot_class
+        self.intel_class = intel_class
+        self.move_time = move_time
+        self.rng = random.Random(seed)
+        self.waiting = []
+        self.tables = set()
+        self.games_played = 0
+        self.server = None
+        self.port = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts accepting connections on host and port. A port of 0
+        picks a free port, see the port attribute.
+        """
+        self.server = await asyncio.start_server(self.connected, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def close(self):
+        """
+        Stops accepting connections and abandons the tables in play.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for remote in self.waiting:
+            remote.close()
+        self.waiting = []
+        tables = list(self.tables)
+        for task in tables:
+            task.cancel()
+        await asyncio.gather(*tables, return_exceptions=True)
+
+    async def connected(self, reader, writer):
+        """
+        Handles a new connection.
+        """
+        remote = RemotePlayer(None, reader, writer, self.intel_class)
+        hello = await remote.read()
+        if hello is None or hello.get('type') != 'hello':
+            remote.send({'type': 'error', 'message': 'Expected hello'})
+            remote.close()
+            return
+        # Players who left while waiting would only take up a seat.
+        for gone in [p for p in self.waiting if not p.check_connection()]:
+            gone.close()
+            self.waiting.remove(gone)
+        remote.name = _unique_name(str(hello.get('name') or 'Player'),
+                                   set(p.name for p in self.waiting))
+        self.waiting.append(remote)
+        if len(self.waiting) >= self.remote_players:
+            remote_players = self.waiting[:self.remote_players]
+            del self.waiting[:self.remote_players]
+            self.open_table(remote_players)
+
+    def open_table(self, remote_players):
+        """
+        Seats the given remote players at a new table, with bots, and
+        starts playing it.
+        """
+        players = list(remote_players)
+        taken = set(p.name for p in players)
+        for x in range(self.players - len(players)):
+            name = _unique_name('Bot %d' % (x + 1), taken)
+            taken.add(name)
+            players.append(self.bot_class(name, self.intel_class))
+        self.rng.shuffle(players)
+
+        table = AsyncGame(players, observers=[],
+                          rng=random.Random(self.rng.getrandbits(64)),
+                          move_time=self.move_time)
+        table.fallback_class = self.intel_class
+        for remote in remote_players:
+            remote.send({'type': 'welcome', 'name': remote.name})
+        task = asyncio.ensure_future(self.play_table(table))
+        self.tables.add(task)
+        task.add_done_callback(self.tables.discard)
+        return task
+
+    async def play_table(self, table):
+        """
+        Plays the game of a table and returns the name of the winner.
+        The remote players are disconnected at the end.
+        """
+        try:
+            winner = await table.start()
+        finally:
+            for p in table.players:
+                if isinstance(p, RemotePlayer):
+                    p.close()
+        self.games_played += 1
+        return winner
+
+
+async def play_tables(count, factory, seed=None, move_time=None):
+    """
+    Plays count tables at once and returns the names of their winners.
+    factory returns the list of players of a new table.
+    """
+    rng = random.Random(seed)
+    tables = [AsyncGame(factory(), observers=[],
+                        rng=random.Random(rng.getrandbits(64)),
+                        move_time=move_time)
+              for x in range(count)]
+    return await asyncio.gather(*[t.start() for t in tables])
+
+
+def parse_args():
+
+    parser = ArgumentParser(description='Hosts games of 45s over TCP')
+
+    parser.add_argument('--host', default=DEFAULT_HOST,
+            help='Address to listen on (default: %s)' % DEFAULT_HOST)
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT,
+            help='Port to listen on (default: %d)' % DEFAULT_PORT)
+    parser.add_argument('-r', '--remote-players', type=int, default=1,
+            help='Remote players per table (default: 1)')
+    parser.add_argument('-n', '--players', type=int, default=4,
+            help='Players per table (default: 4)')
+    parser.add_argument('-t', '--move-time', type=float,
+            default=DEFAULT_MOVE_TIME,
+            help='Seconds for every decision (default: %g)'
+                 % DEFAULT_MOVE_TIME)
+    parser.add_argument('-s', '--seed', type=int, default=None,
+            help='Seed for reproducible tables')
+    parser.add_argument('-w', '--workers', type=int, default=0,
+            help='Worker processes making the decisions of the bots '
+                 '(default: none, bots decide in the server process)')
+    parser.add_argument('--network', default=None,
+            help='Neural network file the bots play cards with, evaluated '
+                 'for all the tables at once (requires NumPy)')
+
+    return parser.parse_args()
+
+
+async def serve(args):
+    bot_class = player.Player
+    intel_class = intel.Intel
+    dispatcher = None
+    batcher = None
+    if args.network:
+        # dispatch builds on this module, neural requires NumPy.
+        from forte_fives import dispatch
+        from forte_fives import neural
+        network = neural.Network.load(args.network)
+        batcher = dispatch.Batcher(network.decide)
+        bot_class = functools.partial(dispatch.BatchPlayer, batcher=batcher)
+        intel_class = functools.partial(neural.NeuralIntel, network=network)
+    elif args.workers:
+        from forte_fives import dispatch
+        dispatcher = dispatch.Dispatcher(args.workers)
+        bot_class = functools.partial(dispatch.PoolPlayer,
+                                      dispatcher=dispatcher)
+    server = GameServer(args.remote_players, args.players, bot_class,
+                        intel_class, move_time=args.move_time,
+                        seed=args.seed)
+    await server.start(args.host, args.port)
+    print('Serving on %s:%d' % (args.host, server.port))
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        if dispatcher is not None:
+            dispatcher.close()
+        if batcher is not None:
+            batcher.close()
+
+
+def main():
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
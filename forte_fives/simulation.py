@@ -0,0 +1,155 @@
+"""
+Headless batch simulations of complete games.
+
+Games are played without observers, so nothing is printed, and only
+aggregated statistics are kept around. Each game gets its own
+random.Random instance, seeded from a master seed, which makes any
+batch of games reproducible no matter how it is split up.
+"""
+from forte_fives import events
+from forte_fives import game
+from forte_fives import record
+
+import random
+
+
+class SimulationStats(object):
+    """
+    Aggregated results of a batch of games, broken down by seat. A seat
+    is the position of a player in the list of players of a game.
+    """
+
+    def __init__(self, seats):
+        """
+        Initializes empty statistics for the given amount of seats.
+        """
+        self.seats = seats
+        self.games = 0
+        self.rounds = 0
+        self.wins = [0] * seats
+        self.bids_made = [0] * seats
+        self.bids_set = [0] * seats
+        self.total_scores = [0] * seats
+
+    def __str__(self):
+        """
+        String representation of SimulationStats.
+        """
+        lines = ['%d games, %d rounds' % (self.games, self.rounds)]
+        for seat in range(self.seats):
+            lines.append(
+                'Seat %d: %d wins, %d bids made, %d bids set, '
+                'average score %.2f' % (seat, self.wins[seat],
+                                        self.bids_made[seat],
+                                        self.bids_set[seat],
+                                        self.average_score(seat)))
+        return '\n'.join(lines)
+
+    def average_score(self, seat):
+        """
+        Returns the average final score of the given seat.
+        """
+        if not self.games:
+            return 0.0
+        return float(self.total_scores[seat]) / self.games
+
+    def merge(self, other):
+        """
+        Adds the results of other SimulationStats to these ones.
+        """
+        if not other.games:
+            return
+        if not self.games:
+            self.seats = other.seats
+            self.wins = [0] * other.seats
+            self.bids_made = [0] * other.seats
+            self.bids_set = [0] * other.seats
+            self.total_scores = [0] * other.seats
+        if self.seats != other.seats:
+            raise ValueError('Can not merge stats for %d and %d seats'
+                             % (self.seats, other.seats))
+        self.games += other.games
+        self.rounds += other.rounds
+        for seat in range(self.seats):
+            self.wins[seat] += other.wins[seat]
+            self.bids_made[seat] += other.bids_made[seat]
+            self.bids_set[seat] += other.bids_set[seat]
+            self.total_scores[seat] += other.total_scores[seat]
+
+    def add_game(self, players, score_board, winner):
+        """
+        Records the final scores and the winner of a finished game.
+        """
+        self.games += 1
+        for seat, player in enumerate(players):
+            self.total_scores[seat] += score_board.get_score(player.name)
+            if player.name == winner:
+                self.wins[seat] += 1
+
+
+class StatsObserver(events.Observer):
+    """
+    Keeps track of the bids made and set of every seat.
+    """
+
+    def __init__(self, stats, players):
+        self.stats = stats
+        self.players = players
+
+    def round_finished(self, bidding_player, bid, made):
+        seat = self.players.index(bidding_player)
+        self.stats.rounds += 1
+        if made:
+            self.stats.bids_made[seat] += 1
+        else:
+            self.stats.bids_set[seat] += 1
+
+
+def game_seeds(n_games, seed=None):
+    """
+    Returns the list of seeds for n_games games, derived from seed.
+    """
+    master = random.Random(seed)
+    return [master.getrandbits(64) for x in range(n_games)]
+
+
+def play_game(players, stats, rng=None, writer=None, seed=0):
+    """
+    Quietly plays a whole game with the given players and adds its
+    results to stats. If writer, a record.RecordWriter, is given, the
+    rounds are recorded along with the seed of the game.
+    """
+    observers = [StatsObserver(stats, players)]
+    if writer is not None:
+        observers.append(record.RecordingObserver(writer, players, seed))
+    g = game.Game(players, observers=observers, rng=rng)
+    winner = g.start()
+    stats.add_game(players, g.score_board, winner)
+
+
+def play_games(players_factory, seeds, writer=None):
+    """
+    Plays one game per seed and returns their SimulationStats. The
+    rounds are recorded to writer, if given.
+    """
+    stats = None
+    for game_seed in seeds:
+        players = players_factory()
+        if stats is None:
+            stats = SimulationStats(len(players))
+        play_game(players, stats, random.Random(game_seed), writer,
+                  game_seed)
+
+    return stats or SimulationStats(0)
+
+
+def simulate(n_games, players_factory, seed=None, writer=None):
+    """
+    Plays n_games games and returns their SimulationStats.
+
+    players_factory is called without arguments before every game and
+    must return a new list of players, each with a unique name.
+    Games played with the same seed always end up the same way.
+    Every round is recorded to writer, a record.RecordWriter, if given.
+    """
+    return play_games(players_factory, game_seeds(n_games, seed), writer)
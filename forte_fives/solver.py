@@ -0,0 +1,484 @@
+"""
+Double dummy solver for the play phase of a round.
+
+Given every player's hand, the solver finds the card that gets a
+player the most points out of the remaining turns: 5 points per turn
+won, plus 5 points for winning the highest card in suit. The other
+players are assumed to play against that player, which turns the
+search into a two sided alpha-beta search.
+
+Cards are handled by index and hands as masks, see card and cardset.
+Positions are solved in their canonical form, see canonical, and
+identified by their Zobrist hash, see state. Solved positions are kept
+in a bounded transposition.TranspositionTable, which may be shared by
+several solvers.
+"""
+from forte_fives import budget
+from forte_fives import canonical
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import rules
+from forte_fives import state
+from forte_fives import transposition
+
+import random
+
+
+# Points for winning a turn, and for winning the highest card in suit.
+TURN_POINTS = 5
+HIGHEST_CARD_POINTS = 5
+
+# All points come in multiples of STEP.
+STEP = 5
+
+# Larger than any value.
+INFINITY = 1 << 16
+
+# Nodes searched between checks of the deadline.
+CHECK_INTERVAL = 1024
+
+# Transposition table entry flags.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+_rng = random.Random(state.ZOBRIST_SEED + 1)
+
+# Zobrist keys of the seat the points are counted for, by seat.
+SEAT_KEYS = tuple(_rng.getrandbits(64) for x in range(state.MAX_PLAYERS))
+# Of the highest card in suit won so far, encoded as by
+# Solver._encode_highest, plus one.
+BEST_KEYS = tuple(_rng.getrandbits(64) for x in range(2 * len(card.RANKS) +
+                                                      3))
+
+del _rng
+
+
+class SolverException(Exception):
+    pass
+
+
+def _build_stronger(suit):
+    """
+    Returns, for every card index, the indexes of the cards that beat
+    it whenever both are played, weakest first. Cards in suit are
+    compared to each other, other cards to the cards of their own suit.
+    """
+    in_suit = rules.IN_SUIT_STRENGTH[suit]
+    stronger = []
+    for c in card.CARDS:
+        if in_suit[c.index] >= 0:
+            strength = in_suit
+            same = [o for o in card.CARDS if in_suit[o.index] >= 0]
+        else:
+            strength = rules.IN_SUIT_STRENGTH[c.suit]
+            same = [o for o in card.CARDS
+                    if o.suit == c.suit and in_suit[o.index] < 0]
+        stronger.append(tuple(
+            o.index for o in sorted(same, key=lambda o: strength[o.index])
+            if strength[o.index] > strength[c.index]))
+
+    # Playing the Ace of Hearts first does not force anybody to follow
+    # suit, unless hearts is the suit. It is not like any other card.
+    ace = card.Card('A', card.HEARTS)
+    if suit != card.HEARTS:
+        stronger[ace.index] = ()
+    return tuple(stronger)
+
+
+class Solver(object):
+    """
+    Solves positions of the play phase for one player, the seat, when
+    suit is the playing suit. Positions already solved are kept in a
+    transposition table, which makes solving related positions faster.
+    """
+
+    def __init__(self, suit, seat, players=4, table=None):
+        """
+        Initializes a solver for the given seat out of players seats.
+        table is the transposition.TranspositionTable to use, a new one
+        by default. Solvers of other suits and seats can share it.
+        """
+        self.suit = suit
+        self.seat = seat
+        self.players = players
+        self.table = (table if table is not None
+                      else transposition.TranspositionTable())
+        self.nodes = 0
+        # Deadline of the current search, and whether or not the last
+        # search finished in time.
+        self.deadline = None
+        self.complete = True
+        # Distinct moves, by valid cards, hand and cards in play. Unlike
+        # the transposition table, this is only kept for one search.
+        self._distinct = {}
+
+        # Everything below is about the canonical playing suit.
+        suit = self._suit = canonical.canonical_suit(suit)
+        self._suit_index = card.SUITS.index(suit)
+        self._in_suit_mask = cardset.IN_SUIT_MASKS[suit]
+        self._in_suit = rules.IN_SUIT_STRENGTH[suit]
+        # Turn strength by the suit index of the first card.
+        self._strength = tuple(rules.TRICK_STRENGTH[suit][s]
+                               for s in card.SUITS)
+        self._stronger = _build_stronger(suit)
+        # Card index by strength in suit.
+        self._in_suit_cards = dict((strength, index) for index, strength
+                                   in enumerate(self._in_suit)
+                                   if strength >= 0)
+        self._ace = -1
+        if suit != card.HEARTS:
+            self._ace = card.Card('A', card.HEARTS).index
+        # Part of the hash of every position searched by the solver.
+        self._base_key = state.SUIT_KEYS[self._suit_index] ^ SEAT_KEYS[seat]
+
+    def solve(self, hands, leader, trick=(), highest=None, deadline=None):
+        """
+        Returns the best card index for the player to play next and the
+        points the seat gets out of the remaining turns.
+
+        hands is the list of masks of every seat, leader the seat that
+        started the current turn and trick the card indexes played in
+        the current turn so far. highest is a (card index, seat) tuple
+        of the highest card in suit won in an earlier turn, if any.
+
+        If the budget.Deadline expires during the search, the best card
+        found so far is returned along with the points it is known to
+        get at least, and complete is set to False.
+        """
+        self.deadline = deadline
+        suit, hands, trick, highest, perm = canonical.canonical_position(
+            self.suit, hands, trick, highest)
+        best = self._encode_highest(highest)
+        turn = (leader + len(trick)) % self.players
+        if turn != self.seat:
+            raise SolverException('Seat %d is not playing next' % self.seat)
+
+        moves = self._valid_moves(hands, trick, best, turn)
+        key = self._hash(hands)
+        self.table.new_search()
+        self._distinct.clear()
+
+        def probe(t):
+            for move in moves:
+                v = self._play(hands, leader, trick, best, turn, move,
+                               t - 1, t, key)
+                if v >= t:
+                    # Try the move that worked first from now on.
+                    moves.remove(move)
+                    moves.insert(0, move)
+                    return v
+            return t - 1
+
+        value = self._bisect(probe, self._max_points(hands))
+        move = canonical.permute_index(moves[0], canonical.inverse(perm))
+        return move, value
+
+    def evaluate(self, hands, leader, trick=(), highest=None, deadline=None):
+        """
+        Returns a dict with the points the seat gets for every card the
+        player to play next is allowed to play. Arguments are the same
+        as for solve(). Once the deadline expires, the points are only
+        lower bounds.
+        """
+        self.deadline = deadline
+        suit, hands, trick, highest, perm = canonical.canonical_position(
+            self.suit, hands, trick, highest)
+        best = self._encode_highest(highest)
+        turn = (leader + len(trick)) % self.players
+
+        # Equivalent cards are only searched once.
+        values = {}
+        complete = True
+        key = self._hash(hands)
+        self.table.new_search()
+        self._distinct.clear()
+        for move in self._valid_moves(hands, trick, best, turn):
+            values[move] = self._bisect(
+                lambda t: self._play(hands, leader, trick, best, turn, move,
+                                     t - 1, t, key),
+                self._max_points(hands))
+            complete = complete and self.complete
+        self.complete = complete
+        for move in self._valid_moves(hands, trick, best, turn, False):
+            if move not in values:
+                for stronger in self._stronger[move]:
+                    if stronger in values:
+                        values[move] = values[stronger]
+                        break
+        back = canonical.inverse(perm)
+        return dict((canonical.permute_index(move, back), value)
+                    for move, value in values.items())
+
+    def _bisect(self, probe, high):
+        """
+        Returns the value of a position, between 0 and high. probe(t)
+        runs a null window search which returns at least t if the value
+        of the position is at least t. Narrow windows cut off so much
+        more of the search that a few of them beat a single wide one.
+
+        Every probe narrows down the value, so when the deadline expires
+        the lowest value known so far is returned.
+        """
+        low = 0
+        high -= high % STEP
+        self.complete = True
+        try:
+            while low < high:
+                middle = (low + high) // (2 * STEP) * STEP + STEP
+                if probe(middle) >= middle:
+                    low = middle
+                else:
+                    high = middle - STEP
+        except budget.DeadlineExceeded:
+            self.complete = False
+        return low
+
+    def _encode_highest(self, highest):
+        """
+        Encodes the highest card in suit won so far as a single number.
+        The strength of the card, doubled, plus one if the seat won it.
+        -1 if no card in suit was won yet.
+        """
+        if highest is None:
+            return -1
+        index, seat = highest
+        return self._in_suit[index] * 2 + (seat == self.seat)
+
+    def _hash(self, hands):
+        """
+        Returns the hash of the given hands, to which the keys of the
+        leader and of the highest card are added at the start of every
+        turn.
+        """
+        key = self._base_key
+        for seat, hand in enumerate(hands):
+            keys = state.HAND_KEYS[seat]
+            for c in cardset.indexes_of(hand):
+                key ^= keys[c]
+        return key
+
+    def _max_points(self, hands):
+        """
+        Returns the most points that can still be won.
+        """
+        return (max(cardset.popcount(h) for h in hands) * TURN_POINTS +
+                HIGHEST_CARD_POINTS)
+
+    def _turn_strength(self, trick):
+        """
+        Returns the strength table to use for the next card played.
+        When starting a turn, any card would be the first one.
+        """
+        if trick:
+            return self._strength[trick[0] // len(card.RANKS)]
+        return rules.TRICK_STRENGTH[self._suit][self._suit]
+
+    def _valid_moves(self, hands, trick, best, turn, distinct=True):
+        """
+        Returns the card indexes that seat turn can play, following
+        rules.select_valid_cards, strongest first.
+
+        If distinct, cards that are equivalent to a stronger card in hand
+        are left out: no card played by anybody else or already won ranks
+        between them, so playing one or the other makes no difference.
+        """
+        hand = hands[turn]
+        if trick:
+            first_suit = trick[0] // len(card.RANKS)
+            if first_suit == self._suit_index:
+                in_suit = hand & self._in_suit_mask
+                if in_suit:
+                    hand = in_suit
+
+        if not distinct or not hand & (hand - 1):
+            moves = cardset.indexes_of(hand)
+        else:
+            present = 0
+            for h in hands:
+                present |= h
+            for c in trick:
+                present |= 1 << c
+            if best >= 0:
+                present |= 1 << self._in_suit_cards[best >> 1]
+            moves = self._distinct_moves(hand, hands[turn], present)
+
+        strength = self._turn_strength(trick)
+        if not trick:
+            moves.sort(key=strength.__getitem__, reverse=True)
+            return moves
+
+        # Try to win the turn as cheaply as possible, unless it is already
+        # won by the same side. Otherwise, get rid of the weakest card.
+        position = 0
+        highest = strength[trick[0]]
+        for p in range(1, len(trick)):
+            if strength[trick[p]] > highest:
+                highest = strength[trick[p]]
+                position = p
+        winner = (turn - len(trick) + position) % self.players
+        if (winner == self.seat) == (turn == self.seat):
+            moves.sort(key=strength.__getitem__)
+        else:
+            moves.sort(key=lambda m: strength[m] + (strength[m] < highest) *
+                       INFINITY)
+        return moves
+
+    def _distinct_moves(self, valid, hand, present):
+        """
+        Returns the card indexes of the valid mask, leaving out the ones
+        equivalent to a stronger card in hand. present is the mask of all
+        the cards that are still in play.
+        """
+        key = (valid, hand, present)
+        moves = self._distinct.get(key)
+        if moves is None:
+            ace = self._ace
+            moves = []
+            for m in cardset.indexes_of(valid):
+                for stronger in self._stronger[m]:
+                    if present >> stronger & 1:
+                        if hand >> stronger & 1 and stronger != ace:
+                            break
+                        moves.append(m)
+                        break
+                else:
+                    moves.append(m)
+            self._distinct[key] = moves
+        return list(moves)
+
+    def _play(self, hands, leader, trick, best, turn, move, alpha, beta,
+              key):
+        """
+        Plays the card move for seat turn and returns the value of the
+        resulting position. key is the hash of the hands, see _hash.
+        """
+        bit = 1 << move
+        hands[turn] ^= bit
+        trick.append(move)
+        key ^= state.HAND_KEYS[turn][move]
+        try:
+            if len(trick) < self.players:
+                return self._search(hands, leader, trick, best, alpha, beta,
+                                    key)
+
+            # The turn is over, find out who won it.
+            strength = self._strength[trick[0] // len(card.RANKS)]
+            position = 0
+            highest = strength[trick[0]]
+            for p in range(1, self.players):
+                if strength[trick[p]] > highest:
+                    highest = strength[trick[p]]
+                    position = p
+            winner = (leader + position) % self.players
+            winning_card = trick[position]
+
+            points = 0
+            if winner == self.seat:
+                points = TURN_POINTS
+
+            in_suit = self._in_suit[winning_card]
+            if in_suit >= 0 and in_suit * 2 > best:
+                best = in_suit * 2 + (winner == self.seat)
+
+            return points + self._search(hands, winner, [], best,
+                                         alpha - points, beta - points, key)
+        finally:
+            trick.pop()
+            hands[turn] ^= bit
+
+    def _search(self, hands, leader, trick, best, alpha, beta, key):
+        """
+        Alpha-beta search of the given position. Returns the points the
+        seat gets out of the remaining turns. key is the hash of the
+        hands, see _hash.
+        """
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes % CHECK_INTERVAL:
+            self.deadline.check(CHECK_INTERVAL)
+        turn = (leader + len(trick)) % self.players
+
+        position = None
+        move_first = None
+        if not trick:
+            if not hands[turn]:
+                # No cards left, only the highest card is left to award.
+                if best >= 0 and best & 1:
+                    return HIGHEST_CARD_POINTS
+                return 0
+
+            position = (key ^ state.LEADER_KEYS[leader] ^
+                        BEST_KEYS[best + 1])
+            entry = self.table.get(position)
+            if entry is not None:
+                value, flag, move_first = entry
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        moves = self._valid_moves(hands, trick, best, turn)
+        if move_first is not None and move_first in moves:
+            moves.remove(move_first)
+            moves.insert(0, move_first)
+
+        alpha_start = alpha
+        beta_start = beta
+        best_move = moves[0]
+        if turn == self.seat:
+            value = -1
+            for move in moves:
+                v = self._play(hands, leader, trick, best, turn, move,
+                               alpha, beta, key)
+                if v > value:
+                    value = v
+                    best_move = move
+                if value > alpha:
+                    alpha = value
+                if alpha >= beta:
+                    break
+        else:
+            value = INFINITY
+            for move in moves:
+                v = self._play(hands, leader, trick, best, turn, move,
+                               alpha, beta, key)
+                if v < value:
+                    value = v
+                    best_move = move
+                if value < beta:
+                    beta = value
+                if alpha >= beta:
+                    break
+
+        if position is not None:
+            if value <= alpha_start:
+                flag = UPPER
+            elif value >= beta_start:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.table.put(position, cardset.popcount(hands[turn]),
+                           (value, flag, best_move))
+
+        return value
+
+
+def solve(suit, hands, leader, seat, trick=(), highest=None):
+    """
+    Returns the best card for seat to play and the points it gets out
+    of the remaining turns, assuming everybody can see all the cards.
+
+    hands is the list of hands of every seat, as lists of cards. leader
+    is the seat that started the current turn and trick the cards played
+    in the current turn so far, which means it is seat's turn to play.
+    highest is a (card, seat) tuple for the highest card in suit won
+    in an earlier turn, if any.
+    """
+    solver = Solver(suit, seat, len(hands))
+    if highest is not None:
+        highest = (highest[0].index, highest[1])
+    move, points = solver.solve([cardset.mask_of(h) for h in hands], leader,
+                                [c.index for c in trick], highest)
+    return card.CARDS[move], points
@@ -0,0 +1,255 @@
+"""
+Compact state of the play phase of a round.
+
+A GameState holds the hands as masks, the cards of the current turn as
+indexes and the points won so far, and plays and takes back cards in
+place: apply and undo take constant time and allocate nothing, so a
+search can walk the whole game tree with a single state instead of
+copying hands, tables and score boards at every node.
+
+The state also keeps a Zobrist hash, updated along with every move,
+which identifies the position: the playing suit, the hands, the cards
+on the table, the leader of the turn and the highest card in suit won
+so far. The points won in earlier turns are not part of it, since
+they don't change what can be won from the position on.
+"""
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import rules
+
+import random
+
+
+# Points for winning a turn, and for winning the highest card in suit.
+TURN_POINTS = 5
+HIGHEST_CARD_POINTS = 5
+
+# Most players a deck can be dealt to.
+MAX_PLAYERS = len(card.CARDS) // rules.HAND_SIZE
+
+# Seed of the Zobrist keys. Hashes are the same in every process.
+ZOBRIST_SEED = 45
+
+
+class StateException(Exception):
+    pass
+
+
+def _keys(rng, count):
+    return tuple(rng.getrandbits(64) for x in range(count))
+
+
+_rng = random.Random(ZOBRIST_SEED)
+
+# Zobrist keys of a card in the hand of a seat, by seat and card index.
+HAND_KEYS = tuple(_keys(_rng, len(card.CARDS)) for x in range(MAX_PLAYERS))
+# Of a card on the table, by card index.
+TABLE_KEYS = _keys(_rng, len(card.CARDS))
+# Of the leader of the turn, by seat.
+LEADER_KEYS = _keys(_rng, MAX_PLAYERS)
+# Of the highest card in suit won so far, by seat and card index.
+HIGHEST_KEYS = tuple(_keys(_rng, len(card.CARDS)) for x in range(MAX_PLAYERS))
+# Of the playing suit, by suit index.
+SUIT_KEYS = _keys(_rng, len(card.SUITS))
+
+del _rng
+
+# Suit index of every card, by index.
+CARD_SUITS = tuple(card.SUITS.index(c.suit) for c in card.CARDS)
+
+
+class GameState(object):
+    """
+    The play phase of a round, for suit as the playing suit.
+
+    hands holds the mask of the hand of every seat, leader the seat that
+    started the current turn and turn the seat playing next. trick holds
+    the card indexes of the current turn, its first trick_size ones
+    being played. points holds the points every seat won in turns so
+    far, and highest_card and highest_seat the highest card in suit won
+    so far and its winner, or -1. hash is the Zobrist hash.
+    """
+
+    def __init__(self, suit, hands, leader, highest=None):
+        """
+        Initializes the state of the given hands (masks), at the start
+        of a turn led by leader. highest is a (card index, seat) tuple
+        of the highest card in suit won in an earlier turn, if any.
+        """
+        if not 0 < len(hands) <= MAX_PLAYERS:
+            raise StateException('Bad amount of players, %d' % len(hands))
+        self.suit = suit
+        self.players = len(hands)
+        self.hands = list(hands)
+        self.leader = leader
+        self.turn = leader
+        self.trick = [-1] * self.players
+        self.trick_size = 0
+        self.points = [0] * self.players
+        self.highest_card = -1
+        self.highest_seat = -1
+        if highest is not None:
+            self.highest_card, self.highest_seat = highest
+
+        self._in_suit = rules.IN_SUIT_STRENGTH[suit]
+        self._in_suit_mask = cardset.IN_SUIT_MASKS[suit]
+        self._suit_index = card.SUITS.index(suit)
+        # Turn strength by the suit index of the first card.
+        self._strength = tuple(rules.TRICK_STRENGTH[suit][s]
+                               for s in card.SUITS)
+
+        # Moves played, and what finished turns changed, to undo them.
+        moves = sum(cardset.popcount(h) for h in self.hands)
+        self.ply = 0
+        self.tricks_played = 0
+        self._moves = [-1] * moves
+        self._leaders = [-1] * (moves // self.players + 1)
+        self._highest_cards = [-1] * len(self._leaders)
+        self._highest_seats = [-1] * len(self._leaders)
+
+        self.hash = self.compute_hash()
+
+    def compute_hash(self):
+        """
+        Returns the Zobrist hash of the state, computed from scratch.
+        """
+        h = SUIT_KEYS[self._suit_index] ^ LEADER_KEYS[self.leader]
+        for seat, mask in enumerate(self.hands):
+            keys = HAND_KEYS[seat]
+            for c in cardset.indexes_of(mask):
+                h ^= keys[c]
+        for c in self.trick[:self.trick_size]:
+            h ^= TABLE_KEYS[c]
+        if self.highest_card >= 0:
+            h ^= HIGHEST_KEYS[self.highest_seat][self.highest_card]
+        return h
+
+    def valid_moves(self):
+        """
+        Returns the mask of the cards the seat playing next may play,
+        following rules.select_valid_cards.
+        """
+        hand = self.hands[self.turn]
+        if self.trick_size and CARD_SUITS[self.trick[0]] == self._suit_index:
+            in_suit = hand & self._in_suit_mask
+            if in_suit:
+                return in_suit
+        return hand
+
+    def score(self, seat):
+        """
+        Returns the points of seat so far, with the bonus for the
+        highest card in suit if it holds it.
+        """
+        if seat == self.highest_seat:
+            return self.points[seat] + HIGHEST_CARD_POINTS
+        return self.points[seat]
+
+    def is_over(self):
+        return self.ply == len(self._moves)
+
+    def apply(self, move):
+        """
+        Plays the card of index move for the seat playing next, which
+        has to be a valid move. Once every seat played, the turn is
+        finished: its winner gets the points and leads the next turn.
+        """
+        seat = self.turn
+        if not self.valid_moves() >> move & 1:
+            if not self.hands[seat] >> move & 1:
+                raise StateException('Card %d is not in the hand of seat %d'
+                                     % (move, seat))
+            raise StateException('Card %d does not follow suit, seat %d'
+                                 % (move, seat))
+        self.hands[seat] ^= 1 << move
+        self.hash ^= HAND_KEYS[seat][move] ^ TABLE_KEYS[move]
+        self.trick[self.trick_size] = move
+        self.trick_size += 1
+        self._moves[self.ply] = move
+        self.ply += 1
+
+        if self.trick_size < self.players:
+            self.turn = (seat + 1) % self.players
+            return
+
+        # The turn is finished.
+        t = self.tricks_played
+        self._leaders[t] = self.leader
+        self._highest_cards[t] = self.highest_card
+        self._highest_seats[t] = self.highest_seat
+
+        trick = self.trick
+        strength = self._strength[CARD_SUITS[trick[0]]]
+        position = 0
+        for p in range(1, self.players):
+            if strength[trick[p]] > strength[trick[position]]:
+                position = p
+        winning = trick[position]
+        winner = (self.leader + position) % self.players
+        self.points[winner] += TURN_POINTS
+
+        h = self.hash ^ LEADER_KEYS[self.leader] ^ LEADER_KEYS[winner]
+        for c in trick:
+            h ^= TABLE_KEYS[c]
+        in_suit = self._in_suit
+        if in_suit[winning] >= 0 and (
+                self.highest_card < 0 or
+                in_suit[winning] > in_suit[self.highest_card]):
+            if self.highest_card >= 0:
+                h ^= HIGHEST_KEYS[self.highest_seat][self.highest_card]
+            h ^= HIGHEST_KEYS[winner][winning]
+            self.highest_card = winning
+            self.highest_seat = winner
+        self.hash = h
+
+        self.leader = self.turn = winner
+        self.trick_size = 0
+        self.tricks_played += 1
+
+    def undo(self, move):
+        """
+        Takes back the card of index move, which has to be the last one
+        played, along with the end of the turn it finished, if any.
+        """
+        if not self.ply or self._moves[self.ply - 1] != move:
+            raise StateException('Card %d was not played last' % move)
+
+        if not self.trick_size:
+            # The move finished a turn.
+            self.tricks_played -= 1
+            t = self.tricks_played
+            winner = self.leader
+            self.points[winner] -= TURN_POINTS
+            h = self.hash ^ LEADER_KEYS[winner] ^ LEADER_KEYS[self._leaders[t]]
+            if self.highest_card != self._highest_cards[t]:
+                h ^= HIGHEST_KEYS[self.highest_seat][self.highest_card]
+                if self._highest_cards[t] >= 0:
+                    h ^= HIGHEST_KEYS[self._highest_seats[t]][
+                        self._highest_cards[t]]
+                self.highest_card = self._highest_cards[t]
+                self.highest_seat = self._highest_seats[t]
+            start = self.ply - self.players
+            for p in range(self.players):
+                c = self._moves[start + p]
+                self.trick[p] = c
+                h ^= TABLE_KEYS[c]
+            self.hash = h
+            self.leader = self._leaders[t]
+            self.trick_size = self.players
+
+        self.ply -= 1
+        self.trick_size -= 1
+        seat = (self.leader + self.trick_size) % self.players
+        self.hands[seat] |= 1 << move
+        self.hash ^= HAND_KEYS[seat][move] ^ TABLE_KEYS[move]
+        self.turn = seat
+
+    def last_trick(self):
+        """
+        Returns the card indexes of the last finished turn, in the
+        order they were played, and the seat that won it.
+        """
+        if not self.tricks_played:
+            raise StateException('No turn finished yet')
+        start = (self.ply - self.trick_size) - self.players
+        return self._moves[start:start + self.players], self.leader
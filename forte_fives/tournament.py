@@ -0,0 +1,57 @@
+"""
+Parallel tournaments of simulated games.
+
+A tournament shards its games across a multiprocessing pool. Every
+game is seeded on its own from the tournament seed, so the merged
+results only depend on the seed, not on how many processes were used.
+"""
+from forte_fives import simulation
+
+import multiprocessing
+
+
+# Amount of games handed to a worker process at once.
+DEFAULT_SHARD_SIZE = 100
+
+
+def _play_shard(args):
+    """
+    Worker entry point, plays the games of one shard.
+    """
+    players_factory, seeds = args
+    return simulation.play_games(players_factory, seeds)
+
+
+def make_shards(seeds, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Splits the list of game seeds into shards of shard_size games.
+    """
+    return [seeds[i:i + shard_size] for i in range(0, len(seeds), shard_size)]
+
+
+def run_tournament(n_games, players_factory, seed=None, processes=None,
+                   shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Plays n_games games across a pool of processes and returns the
+    merged SimulationStats.
+
+    players_factory has the same meaning as for simulation.simulate
+    but, since it is sent to other processes, it must be picklable,
+    e.g. a function defined at module level. processes defaults to the
+    number of CPUs. Running a tournament twice with the same seed gives
+    identical results, which are also the ones simulation.simulate
+    gives for that seed.
+    """
+    seeds = simulation.game_seeds(n_games, seed)
+    shards = [(players_factory, s) for s in make_shards(seeds, shard_size)]
+
+    stats = simulation.SimulationStats(0)
+    pool = multiprocessing.Pool(processes)
+    try:
+        for shard_stats in pool.imap_unordered(_play_shard, shards):
+            stats.merge(shard_stats)
+    finally:
+        pool.close()
+        pool.join()
+
+    return stats
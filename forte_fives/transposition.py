@@ -0,0 +1,98 @@
+"""
+Bounded transposition tables.
+
+A TranspositionTable keeps the values of positions already searched,
+by their Zobrist hash (see state), in a fixed amount of slots. It never
+grows, so it can be kept for as long as useful: across the decisions of
+a round, where later turns search again most of the positions searched
+for earlier ones, or for the whole life of a worker process.
+
+When two positions fall in the same slot, the one with more cards left
+is kept, since it took more work to search. Entries that were not used
+since an earlier search are replaced by anything, which keeps positions
+of rounds long gone from filling the table.
+"""
+
+
+# Slots of a table, by default. Must be a power of 2.
+DEFAULT_SIZE = 1 << 16
+
+
+class TranspositionTable(object):
+    """
+    Fixed size table of (value, flag, move) entries, by 64-bit hash.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        if size <= 0 or size & (size - 1):
+            raise ValueError('Size must be a power of 2, not %d' % size)
+        self.size = size
+        self._mask = size - 1
+        self.generation = 0
+        self.clear()
+
+    def __len__(self):
+        """
+        Returns the amount of slots in use.
+        """
+        return self.size - self._keys.count(None)
+
+    def clear(self):
+        """
+        Empties the table.
+        """
+        self._keys = [None] * self.size
+        self._depths = [0] * self.size
+        self._generations = [0] * self.size
+        self._entries = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+
+    def new_search(self):
+        """
+        Starts a new search. Entries not used by it are the first to go.
+        """
+        self.generation += 1
+
+    def get(self, key):
+        """
+        Returns the entry of the position of hash key, None if it is
+        not in the table.
+        """
+        slot = key & self._mask
+        if self._keys[slot] != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._generations[slot] = self.generation
+        return self._entries[slot]
+
+    def put(self, key, depth, entry):
+        """
+        Stores the entry of the position of hash key, searched with
+        depth cards left, unless its slot holds a deeper position used
+        in the current search.
+        """
+        slot = key & self._mask
+        if (self._keys[slot] is not None and self._keys[slot] != key and
+                self._generations[slot] == self.generation and
+                self._depths[slot] > depth):
+            return
+        self._keys[slot] = key
+        self._depths[slot] = depth
+        self._generations[slot] = self.generation
+        self._entries[slot] = entry
+
+
+_shared = {}
+
+
+def shared(size=DEFAULT_SIZE):
+    """
+    Returns the table of the given size shared by everything in the
+    process, such as the decisions made by a worker process.
+    """
+    table = _shared.get(size)
+    if table is None:
+        table = _shared[size] = TranspositionTable(size)
+    return table
@@ -0,0 +1,386 @@
+"""
+Vectorized simulation of whole rounds with NumPy.
+
+Thousands of rounds are played at once, each one a row of arrays:
+the deck is dealt like Game.deal_cards does, players bid, select the
+suit, discard like Intel.select_discard_cards does and play the five
+turns, and the highest card in suit gets its bonus.
+
+Hands are arrays of card indexes (see card.CARDS), with a slot per
+card and -1 in the slots of the cards already played. Suits are
+encoded by their position in card.SUITS, like in batch.
+
+play_hands plays rounds around given hands of the bidding player
+instead, which estimates their strength (see the strength module).
+
+Two policies are available for the players' decisions. RANDOM plays
+like Intel: random bids, suit and cards. GREEDY bids and selects the
+suit it holds the most cards in, and tries to win every turn.
+
+NumPy is an optional dependency: install forte-fives[numpy].
+"""
+from forte_fives import batch
+from forte_fives import card
+from forte_fives import rules
+
+import numpy
+
+
+RANDOM = 'random'
+GREEDY = 'greedy'
+POLICIES = (RANDOM, GREEDY)
+
+# Cards dealt to the kiddie.
+KIDDIE_SIZE = 3
+
+# Rounds played at once, which bounds the memory used.
+DEFAULT_CHUNK_SIZE = 20000
+
+# Points for winning a turn, and for winning the highest card in suit.
+TURN_POINTS = 5
+HIGHEST_CARD_POINTS = 5
+
+_CARDS = len(card.CARDS)
+_BIDS = numpy.array(rules.BIDS)
+
+# Lookup tables with an extra last column for empty slots, so that
+# they can be indexed with -1: no strength, no suit, not a five.
+_IN_SUIT_STRENGTH = numpy.hstack([batch.IN_SUIT_STRENGTH,
+                                  numpy.full((len(card.SUITS), 1), -1,
+                                             dtype=numpy.int16)])
+_TRICK_STRENGTH = numpy.concatenate(
+    [batch.TRICK_STRENGTH,
+     numpy.full((len(card.SUITS), len(card.SUITS), 1), -2,
+                dtype=numpy.int16)], axis=-1)
+_CARD_SUITS = numpy.append(batch.CARD_SUITS, -1)
+_FIVES = numpy.array([c.rank == '5' for c in card.CARDS] + [False])
+
+
+class RoundResults(object):
+    """
+    Outcome of a batch of rounds, as arrays with a row per round.
+
+    bidders, bids and suits are the seat of the bidding player, the
+    winning bid and the suit index of each round. points holds the
+    points every seat won out of the turns and the bonus, scores what
+    every seat actually scores once the bid is settled. made tells
+    whether the bid was made, and highest_cards is the index of the
+    card that got the bonus, -1 if none did.
+    """
+
+    def __init__(self, bidders, bids, suits, points, made, highest_cards):
+        self.bidders = bidders
+        self.bids = bids
+        self.suits = suits
+        self.points = points
+        self.made = made
+        self.highest_cards = highest_cards
+
+        rounds = numpy.arange(len(bidders))
+        self.scores = points.copy()
+        self.scores[rounds, bidders] = numpy.where(
+            made, points[rounds, bidders], -bids)
+
+    def __len__(self):
+        return len(self.bidders)
+
+    @classmethod
+    def concatenate(cls, results):
+        """
+        Returns the results of all the given results, in order.
+        """
+        return cls(*[numpy.concatenate([getattr(r, name) for r in results])
+                     for name in ('bidders', 'bids', 'suits', 'points',
+                                  'made', 'highest_cards')])
+
+
+def _pick(scores, allowed):
+    """
+    Returns, for every row, the slot of the highest score among the
+    allowed ones.
+    """
+    return numpy.where(allowed, scores, -numpy.inf).argmax(axis=-1)
+
+
+def _random(rng, shape):
+    return rng.random(shape, dtype=numpy.float32)
+
+
+def _in_suit_counts(hands):
+    """
+    Returns the amount of cards in suit the given hands hold, by suit
+    index. The result has the shape of hands, but for the last axis
+    which holds the 4 suits.
+    """
+    return numpy.stack([(_IN_SUIT_STRENGTH[s][hands] >= 0).sum(axis=-1)
+                        for s in range(len(card.SUITS))], axis=-1)
+
+
+def deal(n, rng, players=4):
+    """
+    Shuffles n decks and deals them like Game.deal_cards does: three
+    cards to every player, three to the kiddie and two more to every
+    player. Returns the hands, of shape (n, players, 5), the kiddies,
+    of shape (n, 3), and the card indexes left in the decks, in the
+    order they are picked, of shape (n, 52 - 5 * players - 3).
+    """
+    # Cards are picked from the end of the deck, which is as random as
+    # the start.
+    decks = _random(rng, (n, _CARDS)).argsort(axis=1).astype(numpy.int16)
+    first = 3 * players + KIDDIE_SIZE
+    hands = numpy.concatenate(
+        [decks[:, :3 * players].reshape(n, players, 3),
+         decks[:, first:first + 2 * players].reshape(n, players, 2)],
+        axis=-1)
+    return hands, decks[:, 3 * players:first], decks[:, first + 2 * players:]
+
+
+def bid(hands, rng, policy=RANDOM):
+    """
+    Every player bids once, in seat order, like Game.start_bidding.
+    Returns the seat of the bidding player and the bid of every round.
+    Nobody bidding means the dealer, seat 0, bids the lowest bid.
+
+    RANDOM players bid the lowest bid allowed one time out of three,
+    like Intel. GREEDY players do when they hold three cards in suit.
+    """
+    n, players = hands.shape[:2]
+    current = numpy.zeros(n, dtype=numpy.int64)
+    bidders = numpy.zeros(n, dtype=numpy.int64)
+    if policy == GREEDY:
+        wants = _in_suit_counts(hands).max(axis=-1) >= 3
+    else:
+        wants = _random(rng, (n, players)) < 1.0 / 3
+    for p in range(players):
+        higher = current[:, None] < _BIDS
+        bids = wants[:, p] & higher.any(axis=1)
+        current = numpy.where(bids, _BIDS[higher.argmax(axis=1)], current)
+        bidders = numpy.where(bids, p, bidders)
+    current = numpy.where(current == 0, _BIDS[0], current)
+    return bidders, current
+
+
+def select_suit(hands, rng, policy=RANDOM):
+    """
+    Returns the suit index the given hands, of shape (n, slots), select.
+
+    RANDOM hands select the suit of a five, or of a random card, like
+    Intel. GREEDY hands select the suit they hold the most cards in,
+    the strongest cards breaking ties.
+    """
+    if policy == GREEDY:
+        strength = numpy.stack([_IN_SUIT_STRENGTH[s][hands].max(axis=-1)
+                                for s in range(len(card.SUITS))], axis=-1)
+        return (_in_suit_counts(hands) * 100 + strength).argmax(axis=-1)
+    fives = _FIVES[hands]
+    scores = _random(rng, hands.shape)
+    slots = numpy.where(fives.any(axis=1), _pick(scores, fives),
+                        _pick(scores, hands >= 0))
+    return _CARD_SUITS[hands[numpy.arange(len(hands)), slots]].astype(
+        numpy.int64)
+
+
+def discard(hands, suits, rng):
+    """
+    Returns the cards every hand keeps, like Intel.select_discard_cards:
+    all the cards in suit, and other cards to keep rules.MINIMUM_KEEP,
+    but no more than rules.HAND_SIZE cards, the weakest cards in suit
+    going first. The other cards kept are random.
+
+    hands has shape (n, players, slots). The result has shape
+    (n, players, 5), the cards kept first, then empty slots. The
+    amount of cards kept is returned as well.
+    """
+    in_suit = _IN_SUIT_STRENGTH[suits[:, None, None], hands]
+    scores = numpy.where(in_suit >= 0, in_suit + 1.0,
+                         _random(rng, hands.shape))
+    scores = numpy.where(hands >= 0, scores, -1.0)
+    kept = numpy.clip((in_suit >= 0).sum(axis=-1), rules.MINIMUM_KEEP,
+                      rules.HAND_SIZE)
+
+    order = (-scores).argsort(axis=-1)[..., :rules.HAND_SIZE]
+    hands = numpy.take_along_axis(hands, order, axis=-1)
+    slots = numpy.arange(rules.HAND_SIZE)
+    return numpy.where(slots < kept[..., None], hands, -1), kept
+
+
+def refill(hands, kept, stock, bidders):
+    """
+    Deals cards from the stock in the empty slots of the hands,
+    starting with the bidding player, like Game.improve_cards. hands,
+    as returned by discard, is updated in place.
+    """
+    n, players = hands.shape[:2]
+    rounds = numpy.arange(n)
+    offsets = numpy.zeros(n, dtype=numpy.int64)
+    for p in range(players):
+        seats = (bidders + p) % players
+        seat_kept = kept[rounds, seats]
+        for x in range(rules.HAND_SIZE):
+            dealt = x >= seat_kept
+            picked = stock[rounds, offsets + numpy.maximum(x - seat_kept, 0)]
+            hands[rounds, seats, x] = numpy.where(
+                dealt, picked, hands[rounds, seats, x])
+        offsets += rules.HAND_SIZE - seat_kept
+
+
+def valid_slots(hands, suits, first):
+    """
+    Returns which slots of the given hands, of shape (n, slots), hold
+    a card the player is allowed to play, following
+    rules.select_valid_cards. first is the card index of the first card
+    played in the turn, -1 if none was.
+    """
+    held = hands >= 0
+    in_suit = held & (_IN_SUIT_STRENGTH[suits[:, None], hands] >= 0)
+    restricted = (_CARD_SUITS[first] == suits) & in_suit.any(axis=-1)
+    return numpy.where(restricted[:, None], in_suit, held)
+
+
+def play_card(hands, suits, trick, winning, rng, policy=RANDOM):
+    """
+    Returns the slot of the card the given hands, of shape (n, slots),
+    play. trick is the array of the cards played in the turn so far,
+    of shape (n, played), and winning the position of the card winning
+    it.
+
+    RANDOM hands play a random valid card, like Intel. GREEDY hands
+    play their strongest valid card if it wins the turn, their weakest
+    one otherwise.
+    """
+    n = len(hands)
+    rounds = numpy.arange(n)
+    leading = not trick.shape[1]
+    first = numpy.full(n, -1) if leading else trick[:, 0]
+    valid = valid_slots(hands, suits, first)
+    if policy != GREEDY:
+        return _pick(_random(rng, hands.shape), valid)
+
+    first_suits = suits if leading else _CARD_SUITS[first]
+    strength = _TRICK_STRENGTH[suits[:, None], first_suits[:, None], hands]
+    strongest = _pick(strength, valid)
+    if leading:
+        return strongest
+    highest = _TRICK_STRENGTH[suits, first_suits, trick[rounds, winning]]
+    weakest = _pick(-strength, valid)
+    return numpy.where(strength[rounds, strongest] > highest, strongest,
+                       weakest)
+
+
+def play_turns(hands, suits, leaders, rng, policy=RANDOM):
+    """
+    Plays the five turns of the given hands, of shape (n, players, 5),
+    leaders leading the first turn. hands is emptied in place. Returns
+    the points of every seat, turns and highest card in suit included,
+    and the highest card in suit won in every round, -1 for none.
+    """
+    n, players = hands.shape[:2]
+    rounds = numpy.arange(n)
+    points = numpy.zeros((n, players), dtype=numpy.int64)
+    highest = numpy.full(n, -1)
+    highest_cards = numpy.full(n, -1)
+    highest_seats = numpy.zeros(n, dtype=numpy.int64)
+    for x in range(rules.HAND_SIZE):
+        trick = numpy.zeros((n, players), dtype=hands.dtype)
+        winning = numpy.zeros(n, dtype=numpy.int64)
+        for position in range(players):
+            seats = (leaders + position) % players
+            slots = play_card(hands[rounds, seats], suits,
+                              trick[:, :position], winning, rng, policy)
+            trick[:, position] = hands[rounds, seats, slots]
+            hands[rounds, seats, slots] = -1
+            winning = batch.get_winning_positions(trick[:, :position + 1],
+                                                  suits)
+        leaders = (leaders + winning) % players
+        points[rounds, leaders] += TURN_POINTS
+
+        winning_cards = trick[rounds, winning]
+        strength = _IN_SUIT_STRENGTH[suits, winning_cards]
+        higher = strength > highest
+        highest = numpy.where(higher, strength, highest)
+        highest_cards = numpy.where(higher, winning_cards, highest_cards)
+        highest_seats = numpy.where(higher, leaders, highest_seats)
+
+    bonus = highest_cards >= 0
+    points[rounds[bonus], highest_seats[bonus]] += HIGHEST_CARD_POINTS
+    return points, highest_cards
+
+
+def play_rounds(n, rng=None, policy=RANDOM, players=4):
+    """
+    Plays n rounds at once and returns their RoundResults. rng is a
+    numpy.random.Generator or a seed for one.
+    """
+    if policy not in POLICIES:
+        raise ValueError('Unknown policy %s' % policy)
+    if not isinstance(rng, numpy.random.Generator):
+        rng = numpy.random.default_rng(rng)
+    rounds = numpy.arange(n)
+
+    hands, kiddies, stock = deal(n, rng, players)
+    bidders, bids = bid(hands, rng, policy)
+    suits = select_suit(hands[rounds, bidders], rng, policy)
+
+    # The bidding player gets the kiddie.
+    extra = numpy.full((n, players, KIDDIE_SIZE), -1, dtype=hands.dtype)
+    extra[rounds, bidders] = kiddies
+    hands, kept = discard(numpy.concatenate([hands, extra], axis=-1), suits,
+                          rng)
+    refill(hands, kept, stock, bidders)
+
+    points, highest_cards = play_turns(hands, suits, bidders, rng, policy)
+    made = points[rounds, bidders] >= bids
+    return RoundResults(bidders, bids, suits, points, made, highest_cards)
+
+
+def play_hands(hands, suits, rng=None, policy=GREEDY, players=4):
+    """
+    Plays a round for every row of hands, of shape (n, 5), the player
+    of the hand in seat 0 taking the bid with the suit index of the
+    same row of suits. The rest of the deck is dealt at random to the
+    other players and the kiddie. Returns the points seat 0 gets in
+    every round.
+    """
+    if policy not in POLICIES:
+        raise ValueError('Unknown policy %s' % policy)
+    if not isinstance(rng, numpy.random.Generator):
+        rng = numpy.random.default_rng(rng)
+    n = len(hands)
+    rounds = numpy.arange(n)
+    hands = numpy.asarray(hands, dtype=numpy.int16)
+    suits = numpy.asarray(suits, dtype=numpy.int64)
+
+    # The cards of the given hands sort last, out of the decks.
+    keys = _random(rng, (n, _CARDS))
+    keys[rounds[:, None], hands] = 2.0
+    decks = keys.argsort(axis=1).astype(numpy.int16)
+    others = rules.HAND_SIZE * (players - 1)
+    dealt = numpy.full((n, players, rules.HAND_SIZE + KIDDIE_SIZE), -1,
+                       dtype=numpy.int16)
+    dealt[:, 0, :rules.HAND_SIZE] = hands
+    dealt[:, 0, rules.HAND_SIZE:] = decks[:, others:others + KIDDIE_SIZE]
+    dealt[:, 1:, :rules.HAND_SIZE] = decks[:, :others].reshape(
+        n, players - 1, rules.HAND_SIZE)
+    stock = decks[:, others + KIDDIE_SIZE:_CARDS - rules.HAND_SIZE]
+
+    bidders = numpy.zeros(n, dtype=numpy.int64)
+    dealt, kept = discard(dealt, suits, rng)
+    refill(dealt, kept, stock, bidders)
+    points, highest_cards = play_turns(dealt, suits, bidders, rng, policy)
+    return points[:, 0]
+
+
+def simulate(n, seed=None, policy=RANDOM, players=4,
+             chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Plays n rounds, chunk_size rounds at a time, and returns their
+    RoundResults. The results only depend on the seed and chunk_size.
+    """
+    rng = numpy.random.default_rng(seed)
+    results = []
+    for start in range(0, n, chunk_size):
+        results.append(play_rounds(min(chunk_size, n - start), rng, policy,
+                                   players))
+    if not results:
+        return play_rounds(0, rng, policy, players)
+    return RoundResults.concatenate(results)
@@ -17,7 +17,17 @@ setup(
     url='https://github.com/lcarva/forte-fives',
     license=license,
     packages=find_packages(exclude=('tests', 'docs')),
+    extras_require={'numpy': ['numpy']},
+    package_data={'forte_fives': ['data/*.bin', 'data/*.map', 'data/*.npz']},
     entry_points = {
-        'console_scripts': ['forte-fives=forte_fives.cli:main']
+        'console_scripts': [
+            'forte-fives=forte_fives.cli:main',
+            'forte-fives-selfplay=forte_fives.selfplay:main',
+            'forte-fives-strength=forte_fives.strength:main',
+            'forte-fives-cfr=forte_fives.cfr:main',
+            'forte-fives-neural=forte_fives.neural:main',
+            'forte-fives-server=forte_fives.server:main',
+            'forte-fives-client=forte_fives.client:main',
+        ]
     },
 )
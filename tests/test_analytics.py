@@ -0,0 +1,57 @@
+from forte_fives import analytics
+from forte_fives import card
+from forte_fives import player
+from forte_fives import record
+from forte_fives import rules
+from forte_fives import simulation
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def make_players():
+    return [player.Player('Player %d' % i) for i in range(4)]
+
+
+class Analytics(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'rounds.rec')
+        with record.RecordWriter(self.path) as writer:
+            self.stats = simulation.simulate(4, make_players, seed=9,
+                                             writer=writer)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_totals(self):
+        aggregates = analytics.aggregate(record.read_records(self.path))
+        self.assertEqual(aggregates.rounds, self.stats.rounds)
+        self.assertEqual(sum(aggregates.bids.values()), self.stats.rounds)
+        self.assertEqual(sum(aggregates.bids_made.values()),
+                         sum(self.stats.bids_made))
+        self.assertEqual(aggregates.seat_bids,
+                         [m + s for m, s in zip(self.stats.bids_made,
+                                                self.stats.bids_set)])
+        self.assertEqual(sum(aggregates.highest_cards.values()) +
+                         aggregates.no_highest_card, self.stats.rounds)
+        for b in rules.BIDS:
+            self.assertTrue(0 <= aggregates.bid_success_rate(b) <= 1)
+        self.assertTrue(str(aggregates))
+
+    def test_parallel(self):
+        expected = analytics.aggregate(record.read_records(self.path))
+        aggregates = analytics.analyze(self.path, processes=2, chunk_size=7)
+        self.assertEqual(aggregates.__dict__, expected.__dict__)
+
+    def test_card_label(self):
+        ace = card.Card('A', card.HEARTS)
+        self.assertEqual(analytics.card_label(card.CLUBS, ace.index), 'AH')
+        self.assertEqual(analytics.card_label(card.HEARTS, ace.index), 'A')
+
+
+if __name__ == '__main__':
+    unittest.main()
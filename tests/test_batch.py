@@ -0,0 +1,79 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import hand
+from forte_fives import rules
+
+import random
+import unittest
+
+try:
+    import numpy
+    from forte_fives import batch
+except ImportError:
+    numpy = None
+
+
+def random_games(rng, games):
+    """
+    Returns random (suit, hand, trick) tuples, the trick being the
+    cards played before the hand's player.
+    """
+    result = []
+    for x in range(games):
+        cards = list(card.CARDS)
+        rng.shuffle(cards)
+        h = hand.Hand()
+        for c in cards[:rules.HAND_SIZE]:
+            h.add_card(c)
+        trick = cards[rules.HAND_SIZE:rules.HAND_SIZE + rng.randint(0, 3)]
+        result.append((rng.choice(card.SUITS), h, trick))
+    return result
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Batch_winners(unittest.TestCase):
+
+    def test_matches_rules(self):
+        rng = random.Random(1)
+        tricks = [rng.sample(card.CARDS, 4) for x in range(2000)]
+        suits = [rng.choice(card.SUITS) for x in tricks]
+        winners = batch.get_winning_cards(batch.encode_cards(tricks),
+                                          batch.encode_suits(suits))
+        for trick, suit, winner in zip(tricks, suits, winners):
+            self.assertEqual(rules.get_winnind_card(suit, trick).index,
+                             winner)
+
+    def test_single_suit(self):
+        tricks = [[card.Card('2', card.CLUBS), card.Card('3', card.CLUBS),
+                   card.Card('A', card.HEARTS)],
+                  [card.Card('2', card.CLUBS), card.Card('3', card.CLUBS),
+                   card.Card('4', card.DIAMONDS)]]
+        positions = batch.get_winning_positions(
+            batch.encode_cards(tricks), card.SUITS.index(card.DIAMONDS))
+        self.assertEqual(list(positions), [2, 2])
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Batch_valid_cards(unittest.TestCase):
+
+    def test_matches_rules(self):
+        games = random_games(random.Random(2), 2000)
+        hands = batch.masks_to_hands([h.mask for s, h, t in games])
+        first_cards = [t[0].index if t else -1 for s, h, t in games]
+        valid = batch.select_valid_cards(
+            batch.encode_suits([s for s, h, t in games]), hands, first_cards)
+        self.assertEqual(valid.shape, (len(games), len(card.CARDS)))
+        masks = batch.hands_to_masks(valid)
+        for (suit, h, trick), mask in zip(games, masks):
+            expected = rules.select_valid_cards(suit, h, trick)
+            self.assertEqual(cardset.mask_of(expected), int(mask))
+
+    def test_masks_round_trip(self):
+        masks = [0, cardset.FULL_MASK, cardset.SUIT_MASKS[card.SPADES]]
+        self.assertEqual([int(m) for m in
+                          batch.hands_to_masks(batch.masks_to_hands(masks))],
+                         masks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import runpy
+import subprocess
+import sys
+import shutil
+import tempfile
+import unittest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'benchmarks', 'run.py')
+
+
+def results(**best):
+    return {'benchmarks': dict((name, {'best': seconds})
+                               for name, seconds in best.items())}
+
+
+class Benchmarks_compare(unittest.TestCase):
+
+    def setUp(self):
+        self.run = runpy.run_path(SCRIPT)
+
+    def tearDown(self):
+        self.run = None
+
+    def test_compare(self):
+        rows, regressions = self.run['compare'](
+            results(a=1.0, b=1.0, c=1.0), results(a=1.1, b=1.5, d=2.0),
+            threshold=0.2)
+        # Benchmarks missing from either side are left out.
+        self.assertEqual([row[0] for row in rows], ['a', 'b'])
+        self.assertEqual(rows[1][1:3], (1.0, 1.5))
+        self.assertAlmostEqual(rows[1][3], 0.5)
+        self.assertEqual(regressions, ['b'])
+
+    def test_faster(self):
+        rows, regressions = self.run['compare'](results(a=2.0),
+                                                results(a=1.0))
+        self.assertAlmostEqual(rows[0][3], -0.5)
+        self.assertEqual(regressions, [])
+
+
+class Benchmarks_script(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_source_checkout(self):
+        """The script runs without the package installed.
+        """
+        env = dict(os.environ)
+        env.pop('PYTHONPATH', None)
+        output = os.path.join(self.directory, 'results.json')
+        subprocess.check_call(
+            [sys.executable, SCRIPT, 'deck_init', '-r', '1', '-o', output],
+            cwd=self.directory, env=env, stdout=subprocess.PIPE)
+        self.assertTrue(os.path.exists(output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+from forte_fives import budget
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import events
+from forte_fives import game
+from forte_fives import instrument
+from forte_fives import intel
+from forte_fives import pimc
+from forte_fives import player
+from forte_fives import rules
+from forte_fives import solver
+
+import random
+import unittest
+
+
+class FakeTimer(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TimeoutIntel(intel.Intel):
+    """
+    Never has a card ready in time.
+    """
+
+    def select_best_card(self, suit, cards_played):
+        if self.deadline is not None:
+            raise budget.DeadlineExceeded()
+        return intel.Intel.select_best_card(self, suit, cards_played)
+
+
+class DeadlineObserver(events.Observer):
+
+    def __init__(self):
+        self.exceeded = []
+
+    def deadline_exceeded(self, player, decision, fell_back):
+        self.exceeded.append((player.name, decision, fell_back))
+
+
+class Deadline(unittest.TestCase):
+
+    def test_nodes(self):
+        deadline = budget.Deadline(nodes=10)
+        deadline.check(5)
+        self.assertFalse(deadline.expired())
+        self.assertRaises(budget.DeadlineExceeded, deadline.check, 5)
+
+    def test_seconds(self):
+        timer = FakeTimer()
+        deadline = budget.Deadline(0.5, timer=timer)
+        self.assertEqual(deadline.remaining(), 0.5)
+        timer.now = 0.25
+        deadline.check()
+        timer.now = 0.5
+        self.assertTrue(deadline.expired())
+        self.assertEqual(deadline.remaining(), 0.0)
+
+    def test_unlimited(self):
+        deadline = budget.Deadline()
+        deadline.check(1 << 30)
+        self.assertEqual(deadline.remaining(), None)
+
+
+class Solver_anytime(unittest.TestCase):
+
+    def test_best_so_far(self):
+        rng = random.Random(4)
+        cards = rng.sample(range(len(card.CARDS)), 20)
+        hands = [cardset.EMPTY] * 4
+        for i, c in enumerate(cards):
+            hands[i % 4] |= 1 << c
+        s = solver.Solver(card.SPADES, 0)
+        move, points = s.solve(hands, 0,
+                               deadline=budget.Deadline(nodes=1))
+        self.assertFalse(s.complete)
+        self.assertTrue(hands[0] >> move & 1)
+
+        full = solver.Solver(card.SPADES, 0)
+        best, value = full.solve(hands, 0)
+        self.assertTrue(full.complete)
+        self.assertTrue(points <= value)
+
+
+class Game_deadlines(unittest.TestCase):
+
+    def test_fall_back(self):
+        players = [player.Player('Player 0', TimeoutIntel)] + [
+            player.Player('Player %d' % i) for i in range(1, 4)]
+        observer = DeadlineObserver()
+        g = game.Game(players, observers=[observer], rng=random.Random(2),
+                      move_time=10)
+        g.play_round()
+        self.assertEqual(observer.exceeded,
+                         [('Player 0', instrument.SELECT_BEST_CARD, True)] *
+                         rules.HAND_SIZE)
+        self.assertTrue(isinstance(players[0].intel, TimeoutIntel))
+        self.assertEqual(players[0].intel.deadline, None)
+
+    def test_overrun_reported(self):
+        observer = DeadlineObserver()
+        g = game.Game([player.Player('Player %d' % i) for i in range(4)],
+                      observers=[observer], rng=random.Random(2),
+                      move_time=0)
+        g.play_round()
+        self.assertTrue(observer.exceeded)
+        self.assertFalse([e for e in observer.exceeded if e[2]])
+
+    def test_pimc_in_time(self):
+        players = [player.Player('Player 0', pimc.PimcIntel)] + [
+            player.Player('Player %d' % i) for i in range(1, 4)]
+        g = game.Game(players, observers=[], rng=random.Random(3),
+                      move_time=0.001)
+        g.play_round()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+from forte_fives import canonical
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import rules
+from forte_fives import solver
+
+import random
+import unittest
+
+
+def deal(rng, players=4, size=rules.HAND_SIZE):
+    cards = list(range(len(card.CARDS)))
+    rng.shuffle(cards)
+    hands = [cardset.EMPTY] * players
+    for x in range(players * size):
+        hands[x % players] |= 1 << cards[x]
+    return hands
+
+
+class Canonical_permutations(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(5)
+
+    def tearDown(self):
+        self.rng = None
+
+    def test_permute(self):
+        clubs = card.Card('A', card.CLUBS)
+        spades = card.Card('A', card.SPADES)
+        self.assertEqual(canonical.permute(1 << clubs.index,
+                                           canonical.SWAP_BLACK),
+                         1 << spades.index)
+        self.assertEqual(canonical.permute_index(spades.index,
+                                                 canonical.SWAP_BLACK),
+                         clubs.index)
+        self.assertEqual(canonical.permute_suit(card.SPADES,
+                                                canonical.SWAP_BLACK),
+                         card.CLUBS)
+
+    def test_inverse(self):
+        for x in range(20):
+            perm = list(canonical.IDENTITY)
+            self.rng.shuffle(perm)
+            perm = tuple(perm)
+            back = canonical.inverse(perm)
+            mask = deal(self.rng, 1)[0]
+            self.assertEqual(canonical.permute(
+                canonical.permute(mask, perm), back), mask)
+            for index in range(len(card.CARDS)):
+                self.assertEqual(canonical.permute_index(
+                    canonical.permute_index(index, perm), back), index)
+
+    def test_canonical_suit(self):
+        self.assertEqual(canonical.canonical_suit(card.SPADES), card.CLUBS)
+        for suit in (card.HEARTS, card.DIAMONDS, card.CLUBS):
+            self.assertEqual(canonical.canonical_suit(suit), suit)
+
+
+class Canonical_canonical_hand(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(6)
+
+    def tearDown(self):
+        self.rng = None
+
+    def test_spades(self):
+        mask = deal(self.rng, 1)[0]
+        self.assertEqual(
+            canonical.canonical_hand(mask, card.SPADES),
+            (canonical.permute(mask, canonical.SWAP_BLACK), card.CLUBS,
+             canonical.SWAP_BLACK))
+
+    def test_equivalent(self):
+        # Hands with the black suits swapped share the canonical form.
+        for x in range(50):
+            mask = deal(self.rng, 1)[0]
+            swapped = canonical.permute(mask, canonical.SWAP_BLACK)
+            for suit in (card.HEARTS, card.DIAMONDS):
+                first = canonical.canonical_hand(mask, suit)
+                second = canonical.canonical_hand(swapped, suit)
+                self.assertEqual(first[:2], second[:2])
+                self.assertEqual(canonical.permute(mask, first[2]),
+                                 first[0])
+            self.assertEqual(canonical.canonical_hand(mask, card.SPADES)[:2],
+                             canonical.canonical_hand(swapped, card.CLUBS)[:2])
+
+    def test_position(self):
+        for x in range(50):
+            hands = deal(self.rng)
+            trick = [cardset.indexes_of(hands[0])[0]]
+            hands[0] ^= 1 << trick[0]
+            swap = canonical.SWAP_BLACK
+            swapped = [canonical.permute(h, swap) for h in hands]
+            swapped_trick = [canonical.permute_index(c, swap) for c in trick]
+            for suit, other in ((card.HEARTS, card.HEARTS),
+                                (card.SPADES, card.CLUBS)):
+                form = canonical.canonical_position(suit, hands, trick)
+                self.assertEqual(
+                    form[:4], canonical.canonical_position(
+                        other, swapped, swapped_trick)[:4])
+                self.assertEqual(form[0], canonical.canonical_suit(suit))
+
+
+class Canonical_solver(unittest.TestCase):
+
+    def test_solve(self):
+        # Positions with the black suits swapped are worth the same, and
+        # the best move is mapped back to the cards of the position.
+        rng = random.Random(8)
+        swap = canonical.SWAP_BLACK
+        for x in range(5):
+            hands = deal(rng, size=3)
+            swapped = [canonical.permute(h, swap) for h in hands]
+            suit = rng.choice(card.SUITS)
+            other = canonical.permute_suit(suit, swap)
+
+            move, points = solver.Solver(suit, 0).solve(hands, 0)
+            self.assertTrue(hands[0] >> move & 1)
+            s = solver.Solver(other, 0)
+            self.assertEqual(s.solve(swapped, 0)[1], points)
+            values = s.evaluate(swapped, 0)
+            self.assertEqual(set(values), set(cardset.indexes_of(swapped[0])))
+            self.assertEqual(max(values.values()), points)
+
+
+if __name__ == '__main__':
+    unittest.main()
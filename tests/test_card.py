@@ -0,0 +1,40 @@
+from forte_fives import card
+
+import pickle
+import unittest
+
+
+class Card_init(unittest.TestCase):
+
+    def test_same_instance(self):
+        self.assertTrue(card.Card('5', card.HEARTS) is
+                        card.Card('5', card.HEARTS))
+
+    def test_invalid_rank(self):
+        self.assertRaises(card.BadRankException, card.Card, '1', card.HEARTS)
+
+    def test_invalid_suit(self):
+        self.assertRaises(card.BadSuitException, card.Card, '5', 'stars')
+
+    def test_unhashable_rank(self):
+        self.assertRaises(card.BadRankException, card.Card, [], card.HEARTS)
+
+    def test_pickle(self):
+        c = card.Card('J', card.CLUBS)
+        self.assertTrue(pickle.loads(pickle.dumps(c, 2)) is c)
+
+
+class Card_index(unittest.TestCase):
+
+    def test_all_cards(self):
+        self.assertEqual(len(card.CARDS), 52)
+        for index, c in enumerate(card.CARDS):
+            self.assertEqual(c.index, index)
+
+    def test_matches_card(self):
+        c = card.Card('K', card.SPADES)
+        self.assertTrue(card.CARDS[c.index] is c)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import hand
+
+import pickle
+import unittest
+
+
+class Masks(unittest.TestCase):
+
+    def test_round_trip(self):
+        cards = [card.Card('2', card.CLUBS), card.Card('A', card.HEARTS),
+                 card.Card('K', card.SPADES)]
+        mask = cardset.mask_of(cards)
+        self.assertEqual(cardset.popcount(mask), 3)
+        self.assertEqual(sorted(cardset.cards_of(mask), key=str),
+                         sorted(cards, key=str))
+
+    def test_suit_sizes(self):
+        for suit in card.SUITS:
+            self.assertEqual(cardset.popcount(cardset.SUIT_MASKS[suit]), 13)
+
+    def test_in_suit_ace_of_hearts(self):
+        """Ace of Hearts is in suit for every suit.
+        """
+        ace = card.Card('A', card.HEARTS)
+        for suit in card.SUITS:
+            self.assertTrue(cardset.contains(cardset.IN_SUIT_MASKS[suit], ace))
+            self.assertFalse(
+                cardset.contains(cardset.OUT_SUIT_MASKS[suit], ace))
+        self.assertEqual(
+            cardset.popcount(cardset.IN_SUIT_MASKS[card.CLUBS]), 14)
+
+
+class CardList(unittest.TestCase):
+
+    def setUp(self):
+        self.cards = cardset.CardList(card.CARDS[:5])
+
+    def tearDown(self):
+        self.cards = None
+
+    def assertMaskMatches(self):
+        self.assertEqual(self.cards.mask, cardset.mask_of(list(self.cards)))
+
+    def test_pop_and_append(self):
+        c = self.cards.pop()
+        self.assertFalse(c in self.cards)
+        self.cards.append(c)
+        self.assertTrue(c in self.cards)
+        self.assertMaskMatches()
+
+    def test_remove_and_insert(self):
+        c = self.cards[2]
+        self.cards.remove(c)
+        self.assertFalse(c in self.cards)
+        self.cards.insert(0, c)
+        self.assertTrue(c in self.cards)
+        self.assertMaskMatches()
+
+    def test_item_assignment(self):
+        self.cards[0], self.cards[4] = self.cards[4], self.cards[0]
+        self.assertMaskMatches()
+        self.cards[1] = card.CARDS[20]
+        self.assertMaskMatches()
+        del self.cards[1:3]
+        self.assertMaskMatches()
+        self.cards += [card.CARDS[30]]
+        self.assertMaskMatches()
+
+    def test_slices(self):
+        self.cards[1:3] = card.CARDS[20:23]
+        self.assertMaskMatches()
+        self.cards[::2] = card.CARDS[30:33]
+        self.assertMaskMatches()
+        self.cards[-2:] = []
+        self.assertMaskMatches()
+        del self.cards[:1]
+        self.assertMaskMatches()
+        del self.cards[::2]
+        self.assertMaskMatches()
+        self.cards[:] = card.CARDS[40:42]
+        self.assertEqual(list(self.cards), list(card.CARDS[40:42]))
+        self.assertMaskMatches()
+
+    def test_duplicate(self):
+        c = self.cards[0]
+        self.cards.append(c)
+        self.cards.remove(c)
+        self.assertTrue(c in self.cards)
+        self.cards.insert(0, self.cards[1])
+        self.cards.pop(0)
+        self.assertMaskMatches()
+
+    def test_non_card(self):
+        self.assertFalse(dict() in self.cards)
+
+    def test_pickle(self):
+        cards = pickle.loads(pickle.dumps(self.cards, 2))
+        self.assertEqual(cards.mask, self.cards.mask)
+
+
+class Hand_mask(unittest.TestCase):
+
+    def test_assigned_cards(self):
+        h = hand.Hand()
+        h.cards = list(card.CARDS[:3])
+        self.assertEqual(h.mask, cardset.mask_of(card.CARDS[:3]))
+        self.assertTrue(card.CARDS[0] in h)
+        self.assertFalse(card.CARDS[3] in h)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import cfr
+from forte_fives import game
+from forte_fives import player
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+
+def make_mask(*cards):
+    return cardset.mask_of(card.Card(r, s) for r, s in cards)
+
+
+class Cfr_abstraction(unittest.TestCase):
+
+    def setUp(self):
+        self.mask = make_mask(('5', card.CLUBS), ('J', card.CLUBS),
+                              ('A', card.HEARTS), ('2', card.CLUBS),
+                              ('K', card.DIAMONDS))
+
+    def test_suit_features(self):
+        self.assertEqual(cfr.suit_features(self.mask, card.CLUBS), (4, 3))
+        self.assertEqual(cfr.suit_features(self.mask, card.DIAMONDS), (2, 1))
+        self.assertEqual(cfr.suit_features(self.mask, card.SPADES), (1, 1))
+        self.assertEqual(cfr.best_suit(self.mask), card.CLUBS)
+
+    def test_keys(self):
+        self.assertNotEqual(cfr.bid_key(self.mask, None),
+                            cfr.bid_key(self.mask, 20))
+        self.assertEqual(cfr.bid_key(self.mask, None),
+                         cfr.bid_key(self.mask, 0))
+        kiddie = make_mask(('3', card.SPADES), ('4', card.SPADES),
+                           ('6', card.SPADES))
+        self.assertNotEqual(cfr.discard_key(self.mask, card.CLUBS),
+                            cfr.discard_key(self.mask | kiddie, card.CLUBS))
+
+    def test_valid_bid_actions(self):
+        self.assertEqual(cfr.valid_bid_actions(None), [0, 1, 2, 3, 4])
+        self.assertEqual(cfr.valid_bid_actions(25), [0, 4])
+        self.assertEqual(cfr.valid_bid_actions(30), [0])
+
+    def test_kept_cards(self):
+        self.assertEqual(cfr.kept_cards(self.mask, card.CLUBS, 2),
+                         make_mask(('5', card.CLUBS), ('J', card.CLUBS)))
+        self.assertEqual(cfr.kept_cards(self.mask, card.CLUBS, 5), self.mask)
+        kept = cfr.kept_cards(self.mask, card.CLUBS, 4)
+        self.assertFalse(cardset.contains(kept, card.Card('K', card.DIAMONDS)))
+
+    def test_playout(self):
+        rng = random.Random(2)
+        for x in range(20):
+            deck = list(range(len(card.CARDS)))
+            rng.shuffle(deck)
+            hands = [cardset.mask_of(card.CARDS[i] for i in deck[s::4][:5])
+                     for s in range(4)]
+            suit = rng.choice(card.SUITS)
+            s = cfr.playout(suit, hands, x % 4)
+            self.assertTrue(s.is_over())
+            self.assertEqual(sum(s.points), 25)
+
+
+class Cfr_Trainer(unittest.TestCase):
+
+    def test_train(self):
+        trainer = cfr.Trainer()
+        trainer.train(50, random.Random(1))
+        self.assertEqual(trainer.iterations, 50)
+        policy = trainer.policy()
+        self.assertTrue(policy)
+        for key, probabilities in policy.items():
+            self.assertAlmostEqual(sum(probabilities), 1.0)
+            if key >> 16 == cfr.BID:
+                current_bid = cfr.BID_ACTIONS[key >> 8 & 0xff]
+                valid = cfr.valid_bid_actions(current_bid)
+                for action, p in enumerate(probabilities):
+                    if action not in valid:
+                        self.assertEqual(p, 0.0)
+
+    def test_reproducible(self):
+        first = cfr.Trainer()
+        first.train(20, random.Random(4))
+        second = cfr.Trainer()
+        second.train(20, random.Random(4))
+        self.assertEqual(first.regrets, second.regrets)
+        self.assertEqual(first.strategy, second.strategy)
+
+
+class Cfr_files(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cfr.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_policy_round_trip(self):
+        cfr.write_policy({1: (0.25, 0.75, 0.0, 0.0, 0.0),
+                          2: (0.0, 0.0, 1.0, 0.0)}, self.path)
+        policy = cfr.read_policy(self.path)
+        self.assertEqual(len(policy), 2)
+        self.assertEqual(policy.probabilities(3), None)
+        self.assertEqual(policy.sample(3, random.Random()), None)
+        probabilities = policy.probabilities(1)
+        self.assertAlmostEqual(probabilities[0], 0.25, 3)
+        self.assertAlmostEqual(probabilities[1], 0.75, 3)
+
+        rng = random.Random(5)
+        for x in range(100):
+            self.assertEqual(policy.sample(2, rng), 2)
+            self.assertTrue(policy.sample(1, rng) in (0, 1))
+
+    def test_not_a_policy(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a policy at all')
+        self.assertRaises(cfr.CfrException, cfr.read_policy, self.path)
+
+    def test_resume(self):
+        # An interrupted training ends up where an uninterrupted one does.
+        checkpoint = os.path.join(self.directory, 'checkpoint')
+        first = cfr.train(4, seed=3, processes=1, chunk_size=2,
+                          checkpoint=checkpoint)
+        self.assertEqual(first.iterations, 4)
+        resumed = cfr.train(6, seed=3, processes=1, chunk_size=2,
+                            checkpoint=checkpoint)
+        whole = cfr.train(6, seed=3, processes=1, chunk_size=2)
+        self.assertEqual(resumed.iterations, 6)
+        self.assertEqual(resumed.regrets, whole.regrets)
+        self.assertEqual(resumed.strategy, whole.strategy)
+        self.assertEqual(cfr.read_checkpoint(checkpoint)[0].iterations, 6)
+
+
+class Cfr_CfrIntel(unittest.TestCase):
+
+    def test_game(self):
+        trainer = cfr.Trainer()
+        trainer.train(30, random.Random(6))
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'cfr.bin')
+            cfr.write_policy(trainer.policy(), path)
+            policy = cfr.read_policy(path)
+        finally:
+            shutil.rmtree(directory)
+
+        def intel_class(p):
+            return cfr.CfrIntel(p, policy=policy)
+
+        players = [player.Player('Player %d' % x, intel_class)
+                   for x in range(4)]
+        g = game.Game(players, observers=[], rng=random.Random(3))
+        for x in range(5):
+            g.play_round()
+        for p in players:
+            self.assertEqual(len(p.hand), 0)
+
+    def test_no_policy(self):
+        p = player.Player('Player', lambda p: cfr.CfrIntel(p, policy=None))
+        p.intel.policy = None
+        g = game.Game([p] + [player.Player('Bot %d' % x) for x in range(3)],
+                      observers=[], rng=random.Random(4))
+        g.play_round()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import hand
+from forte_fives import instrument
+from forte_fives import intel
+from forte_fives import pimc
+from forte_fives import player
+from forte_fives import rules
+
+import random
+import unittest
+
+try:
+    import asyncio
+    from forte_fives import dispatch
+    from forte_fives import server
+except (ImportError, SyntaxError):
+    dispatch = None
+
+
+def deal(players, rng):
+    cards = list(card.CARDS)
+    rng.shuffle(cards)
+    for x, p in enumerate(players):
+        p.set_hand(hand.Hand())
+        for c in cards[x * rules.HAND_SIZE:(x + 1) * rules.HAND_SIZE]:
+            p.hand.add_card(c)
+
+
+@unittest.skipIf(dispatch is None, 'Requires Python 3')
+class Dispatch_decide(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(5)
+        self.players = [player.Player('Player %d' % x, pimc.PimcIntel)
+                        for x in range(4)]
+        deal(self.players, self.rng)
+
+    def tearDown(self):
+        self.rng = None
+        self.players = None
+
+    def test_should_bid(self):
+        for current_bid in (None, 15, 30):
+            decision = dispatch.Decision(intel.Intel,
+                                         self.players[0].hand.mask, None,
+                                         instrument.SHOULD_BID,
+                                         (current_bid,), 1)
+            bid = dispatch.decide(decision)
+            self.assertTrue(not bid or
+                            bid in rules.select_valid_bids(current_bid))
+
+    def test_snapshot(self):
+        me = self.players[1].intel
+        for p in self.players:
+            p.intel.cards_dealt(self.players, hand.Hand())
+            p.intel.suit_selected(self.players[0], card.SPADES)
+            p.intel.trick_started(self.players[0])
+        lead = self.players[0].play_card(card.SPADES, [])
+        me.card_played(self.players[0], lead)
+
+        restored = pimc.PimcIntel(self.players[1])
+        restored.restore(me.snapshot())
+        self.assertEqual(restored.snapshot(), me.snapshot())
+        self.assertEqual(restored.solver.suit, card.SPADES)
+
+        decision = dispatch.Decision(
+            pimc.PimcIntel, self.players[1].hand.mask, me.snapshot(),
+            instrument.SELECT_BEST_CARD, (card.SPADES, [lead.index]), 1)
+        valid = rules.select_valid_cards(card.SPADES, self.players[1].hand,
+                                         [lead])
+        self.assertIn(dispatch.decide(decision), [c.index for c in valid])
+
+    def test_decide_batch(self):
+        good = dispatch.Decision(intel.Intel, self.players[0].hand.mask,
+                                 None, instrument.SHOULD_BID, (None,), 1)
+        bad = dispatch.Decision(intel.Intel, cardset.EMPTY, None,
+                                instrument.SELECT_BEST_CARD,
+                                (card.SPADES, []), 1)
+        results = dispatch.decide_batch([good, bad])
+        self.assertTrue(results[0][0])
+        self.assertFalse(results[1][0])
+        self.assertTrue(isinstance(results[1][1], Exception))
+
+
+@unittest.skipIf(dispatch is None, 'Requires Python 3')
+class Dispatch_dispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.dispatcher = dispatch.Dispatcher(1, batch_delay=0.01)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.decision = dispatch.Decision(
+            intel.Intel, cardset.mask_of(card.CARDS[:5]), None,
+            instrument.SHOULD_BID, (None,), 1)
+
+    def tearDown(self):
+        self.dispatcher.close()
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        self.dispatcher = None
+        self.loop = None
+
+    def test_batches(self):
+        results = self.loop.run_until_complete(asyncio.gather(
+            *[self.dispatcher.submit(self.decision) for x in range(10)]))
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.dispatcher.batches, 1)
+        self.assertEqual(self.dispatcher.decisions, 10)
+
+    def test_batch_size(self):
+        self.dispatcher.batch_size = 4
+        self.loop.run_until_complete(asyncio.gather(
+            *[self.dispatcher.submit(self.decision) for x in range(10)]))
+        self.assertEqual(self.dispatcher.batches, 3)
+
+    def test_cancelled(self):
+        task = self.loop.create_task(self.dispatcher.submit(self.decision))
+        self.loop.run_until_complete(asyncio.sleep(0))
+        task.cancel()
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        self.assertEqual(self.dispatcher.decisions, 0)
+        self.assertTrue(task.cancelled())
+
+    def test_exception(self):
+        decision = dispatch.Decision(intel.Intel, cardset.EMPTY, None,
+                                     instrument.SELECT_BEST_CARD,
+                                     (card.SPADES, []), 1)
+        with self.assertRaises(IndexError):
+            self.loop.run_until_complete(self.dispatcher.submit(decision))
+
+    def test_play_tables(self):
+        def factory():
+            return [dispatch.PoolPlayer('Player %d' % x, intel.Intel,
+                                        self.dispatcher) for x in range(4)]
+        self.dispatcher.batch_delay = 0.001
+        winners = self.loop.run_until_complete(
+            server.play_tables(3, factory, seed=2))
+        self.assertEqual(len(winners), 3)
+        self.assertTrue(self.dispatcher.batches < self.dispatcher.decisions)
+
+
+@unittest.skipIf(dispatch is None, 'Requires Python 3')
+class Dispatch_batcher(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.batcher = dispatch.Batcher(self.decide, batch_delay=0.01)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.batcher.close()
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        self.batcher = None
+        self.loop = None
+
+    def decide(self, requests):
+        self.calls.append(list(requests))
+        return [r * 2 for r in requests]
+
+    def test_batches(self):
+        results = self.loop.run_until_complete(asyncio.gather(
+            *[self.batcher.submit(x) for x in range(10)]))
+        self.assertEqual(results, [x * 2 for x in range(10)])
+        self.assertEqual(self.calls, [list(range(10))])
+        self.assertEqual(self.batcher.decisions, 10)
+
+    def test_batch_size(self):
+        self.batcher.batch_size = 4
+        self.loop.run_until_complete(asyncio.gather(
+            *[self.batcher.submit(x) for x in range(10)]))
+        self.assertEqual([len(c) for c in self.calls], [4, 4, 2])
+
+    def test_cancelled(self):
+        task = self.loop.create_task(self.batcher.submit(1))
+        self.loop.run_until_complete(asyncio.sleep(0))
+        task.cancel()
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        self.assertEqual(self.calls, [])
+        self.assertTrue(task.cancelled())
+
+    def test_exception(self):
+        with self.assertRaises(TypeError):
+            self.loop.run_until_complete(self.batcher.submit(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+from forte_fives import game
+from forte_fives import instrument
+from forte_fives import player
+from forte_fives import rules
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+
+def make_players():
+    return [player.Player('Player %d' % i) for i in range(4)]
+
+
+class FakeTimer(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.001
+        return self.now
+
+
+class Game_instrumentation(unittest.TestCase):
+
+    def test_phases_and_decisions(self):
+        sink = instrument.HistogramSink()
+        g = game.Game(make_players(), observers=[], rng=random.Random(1),
+                      instrumentation=instrument.Instrumentation([sink]))
+        g.play_round()
+        g.play_round()
+        self.assertEqual(sink.get(instrument.PLAY_HAND).count,
+                         2 * rules.HAND_SIZE)
+        for phase in (instrument.DEAL_CARDS, instrument.START_BIDDING,
+                      instrument.IMPROVE_CARDS, instrument.SCORING):
+            self.assertEqual(sink.get(phase).count, 2)
+        # Every phase is measured, decisions are measured per player.
+        for name in instrument.PHASES:
+            self.assertTrue(sink.get(name) is not None)
+        for name in instrument.DECISIONS:
+            self.assertEqual(sink.get(name), None)
+        for p in g.players:
+            self.assertEqual(sink.get(instrument.SHOULD_BID, p.name).count, 2)
+            self.assertEqual(
+                sink.get(instrument.SELECT_BEST_CARD, p.name).count,
+                2 * rules.HAND_SIZE)
+        self.assertTrue(sink.summary())
+
+
+class Sinks(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_histogram(self):
+        h = instrument.Histogram()
+        for seconds in (1e-6, 3e-6, 1e-3):
+            h.add(seconds)
+        self.assertEqual(h.count, 3)
+        self.assertEqual(h.maximum, 1e-3)
+        self.assertEqual(h.percentile(50), 4e-6)
+        self.assertEqual(h.percentile(100), 1e-3)
+
+    def test_json_lines(self):
+        path = os.path.join(self.directory, 'timings.jsonl')
+        sink = instrument.JsonLinesSink(path)
+        timing = instrument.Instrumentation([sink], timer=FakeTimer())
+        self.assertEqual(timing.call('work', 'Player 0', max, 1, 2), 2)
+        timing.close()
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['name'], 'work')
+        self.assertEqual(lines[0]['player'], 'Player 0')
+        self.assertAlmostEqual(lines[0]['seconds'], 0.001)
+
+    def test_prometheus(self):
+        path = os.path.join(self.directory, 'metrics.prom')
+        sink = instrument.PrometheusSink(path)
+        sink.record('play_hand', None, 0.5)
+        sink.record('should_bid', 'Player "0"', 1e-5)
+        sink.close()
+        with open(path) as f:
+            text = f.read()
+        self.assertTrue('forte_fives_duration_seconds_count'
+                        '{name="play_hand"} 1' in text)
+        self.assertTrue('player="Player \\"0\\""' in text)
+        self.assertTrue('le="+Inf"} 1' in text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import game
+from forte_fives import hand
+from forte_fives import knowledge
+from forte_fives import player
+
+import random
+import unittest
+
+
+def make_hand(*cards):
+    h = hand.Hand()
+    for r, s in cards:
+        h.add_card(card.Card(r, s))
+    return h
+
+
+class CheckedKnowledge(knowledge.Knowledge):
+    """
+    Checks that the hand of every player is among the cards it may hold.
+    """
+
+    def check(self):
+        for seat, p in enumerate(self.players):
+            if seat != self.seat:
+                assert p.hand.mask & ~self.possible[seat] == cardset.EMPTY
+        assert self.possible[self.seat] == self.player.hand.mask
+        self.checks += 1
+
+    def trick_started(self, player):
+        knowledge.Knowledge.trick_started(self, player)
+        self.check()
+
+    def card_played(self, player, played_card):
+        knowledge.Knowledge.card_played(self, player, played_card)
+        self.check()
+
+
+class Knowledge_game(unittest.TestCase):
+
+    def test_rounds(self):
+        players = [player.Player('Player %d' % x) for x in range(4)]
+        tracker = CheckedKnowledge(players[2])
+        tracker.checks = 0
+        g = game.Game(players, observers=[tracker], rng=random.Random(1))
+        voids = 0
+        for x in range(20):
+            g.play_round()
+            self.assertEqual(tracker.played, [5] * 4)
+            self.assertEqual(tracker.bids[tracker.bidder] or 15,
+                             tracker.bid)
+            self.assertTrue(None not in tracker.discarded)
+            voids += sum(tracker.void)
+        self.assertEqual(tracker.checks, 20 * 5 * 5)
+        self.assertTrue(voids)
+
+    def test_snapshot(self):
+        players = [player.Player('Player %d' % x) for x in range(4)]
+        tracker = knowledge.Knowledge(players[0])
+        self.assertEqual(tracker.snapshot(), None)
+        g = game.Game(players, observers=[tracker], rng=random.Random(2))
+        g.play_round()
+        restored = knowledge.Knowledge(players[0])
+        restored.restore(tracker.snapshot())
+        self.assertEqual(restored.snapshot(), tracker.snapshot())
+        self.assertEqual(restored.players, None)
+
+
+class Knowledge_events(unittest.TestCase):
+
+    def setUp(self):
+        self.players = [player.Player('Player %d' % x) for x in range(4)]
+        for p in self.players:
+            p.set_hand(hand.Hand())
+        self.players[0].set_hand(make_hand(
+            ('5', card.CLUBS), ('J', card.CLUBS), ('2', card.HEARTS),
+            ('3', card.HEARTS), ('4', card.HEARTS)))
+        self.tracker = knowledge.Knowledge(self.players[0])
+        self.kiddie = make_hand(('6', card.CLUBS), ('7', card.CLUBS),
+                                ('8', card.CLUBS))
+
+    def tearDown(self):
+        self.tracker = None
+        self.players = None
+
+    def start(self, bidder):
+        self.tracker.cards_dealt(self.players, self.kiddie)
+        for p in self.players:
+            self.tracker.bid_placed(p, 20 if p is bidder else 0)
+        self.tracker.bidding_finished(bidder, 20)
+        self.tracker.suit_selected(bidder, card.CLUBS)
+
+    def play(self, seat, r, s):
+        self.tracker.card_played(self.players[seat], card.Card(r, s))
+
+    def test_own_discards(self):
+        self.start(self.players[0])
+        me = self.players[0]
+        for c in self.kiddie:
+            me.hand.add_card(c)
+        hearts = [c for c in me.hand if c.suit == card.HEARTS]
+        for c in hearts:
+            me.hand.remove_card(c)
+        self.tracker.cards_discarded(me, 3)
+        self.assertEqual(self.tracker.gone, cardset.mask_of(hearts))
+        self.assertEqual(self.tracker.discarded, [3, None, None, None])
+
+        me.hand.add_card(card.Card('9', card.CLUBS))
+        self.tracker.cards_discarded(self.players[1], 2)
+        nine = cardset.CARD_MASKS[card.Card('9', card.CLUBS).index]
+        for seat in range(1, 4):
+            self.assertFalse(self.tracker.possible[seat] & nine)
+            self.assertFalse(self.tracker.possible[seat] &
+                             self.kiddie.mask)
+        self.assertEqual(self.tracker.unknown(),
+                         cardset.FULL_MASK & ~me.hand.mask &
+                         ~cardset.mask_of(hearts))
+
+    def test_kiddie_unknown(self):
+        # Only the bidder learns the kiddie.
+        self.start(self.players[1])
+        self.tracker.cards_discarded(self.players[0], 0)
+        self.assertEqual(self.tracker.gone, cardset.EMPTY)
+        self.assertEqual(self.tracker.possible[1] & self.kiddie.mask,
+                         self.kiddie.mask)
+
+    def test_void(self):
+        self.start(self.players[1])
+        self.tracker.trick_started(self.players[1])
+        self.play(1, 'K', card.CLUBS)
+        # The Ace of Hearts follows suit.
+        self.play(2, 'A', card.HEARTS)
+        self.play(3, '2', card.DIAMONDS)
+        self.assertEqual(self.tracker.void, [False, False, False, True])
+        in_suit = cardset.IN_SUIT_MASKS[card.CLUBS]
+        self.assertFalse(self.tracker.possible[3] & in_suit)
+        self.assertTrue(self.tracker.possible[2] & in_suit)
+        self.assertEqual(self.tracker.played, [0, 1, 1, 1])
+        self.assertEqual(self.tracker.hand_sizes(), [5, 4, 4, 4])
+
+    def test_no_void(self):
+        self.start(self.players[1])
+        self.tracker.trick_started(self.players[1])
+        # The Ace of Hearts led is not in suit, anything may follow.
+        self.play(1, 'A', card.HEARTS)
+        self.play(2, '2', card.DIAMONDS)
+        self.tracker.trick_started(self.players[2])
+        self.play(2, '3', card.DIAMONDS)
+        self.play(3, 'K', card.SPADES)
+        self.assertEqual(self.tracker.void, [False] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
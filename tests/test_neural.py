@@ -0,0 +1,245 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import features
+from forte_fives import game
+from forte_fives import player
+from forte_fives import record
+from forte_fives import rules
+from forte_fives import selfplay
+from forte_fives import simulation
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+    from forte_fives import neural
+except ImportError:
+    numpy = None
+
+try:
+    import asyncio
+    from forte_fives import dispatch
+    from forte_fives import server
+except (ImportError, SyntaxError):
+    dispatch = None
+
+
+def make_mask(*cards):
+    return cardset.mask_of(card.Card(r, s) for r, s in cards)
+
+
+def play_records(path, n_games, seed):
+    with record.RecordWriter(path) as writer:
+        simulation.simulate(
+            n_games, lambda: [player.Player('Player %d' % x)
+                              for x in range(4)],
+            seed=seed, writer=writer)
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Neural_encode(unittest.TestCase):
+
+    def test_encode(self):
+        hand = make_mask(('5', card.CLUBS), ('A', card.HEARTS))
+        table = make_mask(('2', card.CLUBS))
+        o = features.observation(hand, card.CLUBS, table, 2, 60, 90, hand)
+        rows = neural.encode([o, o])
+        self.assertEqual(rows.shape, (2, neural.FEATURES))
+        row = rows[0]
+        self.assertEqual(row[neural.HAND:neural.SUIT].sum(), 2)
+        self.assertEqual(row[neural.HAND + card.Card('5', card.CLUBS).index],
+                         1)
+        self.assertEqual(row[neural.SUIT + card.SUITS.index(card.CLUBS)], 1)
+        self.assertEqual(row[neural.SUIT:neural.TABLE].sum(), 1)
+        self.assertEqual(row[neural.TABLE + card.Card('2', card.CLUBS).index],
+                         1)
+        self.assertAlmostEqual(row[neural.TRICKS], 0.4)
+        self.assertAlmostEqual(row[neural.SCORE], 0.5)
+        self.assertAlmostEqual(row[neural.OTHER_SCORE], 0.75)
+        self.assertEqual(neural.valid_mask([o]).sum(), 2)
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Neural_Network(unittest.TestCase):
+
+    def setUp(self):
+        self.network = neural.Network.create((16,),
+                                             numpy.random.default_rng(1))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        self.network = None
+
+    def test_decide(self):
+        rng = random.Random(2)
+        observations = []
+        for x in range(20):
+            h = cardset.mask_of(rng.sample(card.CARDS, 5))
+            valid = cardset.mask_of(
+                rng.sample(cardset.cards_of(h), rng.randint(1, 5)))
+            observations.append(features.observation(h, card.HEARTS,
+                                                     valid=valid))
+        choices = self.network.decide(observations)
+        self.assertEqual(len(choices), 20)
+        for o, c in zip(observations, choices):
+            self.assertTrue(o[6] >> c & 1)
+        # A batch decides like every observation on its own.
+        self.assertEqual(choices,
+                         [self.network.decide([o])[0] for o in observations])
+
+    def test_save_load(self):
+        path = os.path.join(self.directory, 'network.npz')
+        self.network.save(path)
+        loaded = neural.Network.load(path)
+        o = features.observation(cardset.mask_of(card.CARDS[:5]), card.CLUBS)
+        self.assertAlmostEqual(loaded.values([o])[0],
+                               self.network.values([o])[0], 5)
+
+        with open(path, 'wb') as f:
+            f.write(b'not a network at all')
+        self.assertRaises(neural.NeuralException, neural.Network.load, path)
+
+    def test_bad_shape(self):
+        self.assertRaises(neural.NeuralException, neural.Network,
+                          [numpy.zeros((3, neural.OUTPUTS))],
+                          [numpy.zeros(neural.OUTPUTS)])
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Neural_train(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'records.bin')
+        play_records(self.path, 2, 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_examples(self):
+        records = list(record.read_records(self.path))
+        examples = list(neural.examples(features.decisions(records)))
+        played = [e for e in examples if e[1] >= 0]
+        self.assertEqual(len(played), len(records) * 4 * rules.HAND_SIZE)
+        self.assertEqual(len(examples) - len(played), len(records) * 5)
+        for o, c, points in played:
+            # The card played was in hand and valid.
+            self.assertTrue(o[0] >> c & 1)
+            self.assertTrue(o[6] >> c & 1)
+        for o, c, points in [e for e in examples if e[1] < 0]:
+            # Hands are bid with or kept: the kiddie of the bidder is
+            # not part of them.
+            self.assertTrue(rules.MINIMUM_KEEP <= cardset.popcount(o[0]) <=
+                            rules.HAND_SIZE)
+
+    def test_train(self):
+        examples = list(neural.examples(
+            features.decisions(record.read_records(self.path))))
+        rng = numpy.random.default_rng(4)
+        network = neural.Network.create((32,), rng)
+        losses = neural.train(network, examples, epochs=5, batch_size=64,
+                              learning_rate=0.01, rng=rng)
+        self.assertEqual(len(losses), 5)
+        self.assertTrue(losses[-1] < losses[0])
+
+    def record_array(self):
+        decisions = features.decisions(record.read_records(self.path))
+        return numpy.frombuffer(b''.join(selfplay.pack(d) for d in decisions),
+                                dtype=selfplay.record_dtype())
+
+    def test_record_batch(self):
+        records = self.record_array()
+        keep = ((records['kind'] != features.BID) |
+                (records['seat'] == records['bidder']))
+        inputs, valid, cards, values = neural._record_batch(records[keep])
+        examples = list(neural.examples(
+            features.decisions(record.read_records(self.path))))
+        observations = [e[0] for e in examples]
+        self.assertTrue((inputs == neural.encode(observations)).all())
+        self.assertTrue((valid == neural.valid_mask(observations)).all())
+        self.assertEqual(list(cards), [e[1] for e in examples])
+        self.assertEqual(list(values), [e[2] for e in examples])
+
+    def test_train_records(self):
+        # From a memory mapped shard, and an array in memory.
+        path = os.path.join(self.directory, 'shard-000000.ffsp')
+        records = self.record_array()
+        selfplay.write_shard(path, records.tobytes(), compress=False)
+        shard = selfplay.load_shard(path)
+        rng = numpy.random.default_rng(5)
+        network = neural.Network.create((32,), rng)
+        losses = neural.train_records(network, [shard, records[:100]],
+                                      epochs=5, batch_size=64,
+                                      learning_rate=0.01, rng=rng)
+        self.assertEqual(len(losses), 5)
+        self.assertTrue(losses[-1] < losses[0])
+        del shard
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Neural_NeuralIntel(unittest.TestCase):
+
+    def setUp(self):
+        self.network = neural.Network.create((16,),
+                                             numpy.random.default_rng(5))
+
+    def tearDown(self):
+        self.network = None
+
+    def intel_class(self, p):
+        return neural.NeuralIntel(p, network=self.network)
+
+    def test_game(self):
+        players = [player.Player('Player %d' % x, self.intel_class)
+                   for x in range(4)]
+        g = game.Game(players, observers=[], rng=random.Random(6))
+        for x in range(3):
+            g.play_round()
+        self.assertEqual(players[0].intel._others,
+                         ['Player 1', 'Player 2', 'Player 3'])
+        self.assertTrue(players[0].intel.score_board is g.score_board)
+
+    def test_no_network(self):
+        p = player.Player('Player', neural.NeuralIntel)
+        p.intel.network = None
+        g = game.Game([p] + [player.Player('Bot %d' % x) for x in range(3)],
+                      observers=[], rng=random.Random(7))
+        g.play_round()
+
+
+@unittest.skipIf(numpy is None or dispatch is None,
+                 'Requires Python 3 and NumPy')
+class Neural_batches(unittest.TestCase):
+
+    def test_play_tables(self):
+        network = neural.Network.create((16,), numpy.random.default_rng(8))
+        batcher = dispatch.Batcher(network.decide)
+
+        def intel_class(p):
+            return neural.NeuralIntel(p, network=network)
+
+        def factory():
+            return [dispatch.BatchPlayer('Player %d' % x, intel_class,
+                                         batcher) for x in range(4)]
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            winners = loop.run_until_complete(
+                server.play_tables(4, factory, seed=9))
+        finally:
+            batcher.close()
+            asyncio.set_event_loop(None)
+            loop.close()
+        self.assertEqual(len(winners), 4)
+        # Card plays of the tables were evaluated together.
+        self.assertTrue(batcher.decisions >= 2 * batcher.batches)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+from forte_fives import card
+from forte_fives import game
+from forte_fives import hand
+from forte_fives import pimc
+from forte_fives import player
+from forte_fives import rules
+
+import random
+import timeit
+import unittest
+
+
+def make_players():
+    return ([player.Player('Player 0', pimc.PimcIntel)] +
+            [player.Player('Player %d' % i) for i in range(1, 4)])
+
+
+class PimcIntel_game(unittest.TestCase):
+
+    def test_play_rounds(self):
+        players = make_players()
+        g = game.Game(players, observers=[], rng=random.Random(3))
+        for x in range(3):
+            g.play_round()
+        self.assertTrue(players[0].intel.solver is not None)
+
+    def test_samples(self):
+        """Without a time budget, every sample is solved.
+        """
+        solves = []
+
+        class Counting(pimc.PimcIntel):
+
+            def suit_selected(self, player, suit):
+                pimc.PimcIntel.suit_selected(self, player, suit)
+                if self.solver is not None:
+                    solve = self.solver.solve
+
+                    def counted(*args):
+                        solves[-1] += 1
+                        return solve(*args)
+                    self.solver.solve = counted
+
+            def select_best_card(self, suit, cards_played):
+                solves.append(0)
+                return pimc.PimcIntel.select_best_card(self, suit,
+                                                       cards_played)
+
+        players = make_players()
+        players[0].intel = Counting(players[0], samples=3, time_budget=None)
+        g = game.Game(players, observers=[], rng=random.Random(4))
+        g.play_round()
+        self.assertEqual(len(solves), rules.HAND_SIZE)
+        self.assertTrue(set(solves) <= set([0, 3]))
+        self.assertTrue(3 in solves)
+
+    def test_time_budget(self):
+        """A game against Intel players is quick with the default budget.
+        """
+        players = make_players()
+        g = game.Game(players, observers=[], rng=random.Random(5))
+        start = timeit.default_timer()
+        g.start()
+        # About half a second, with room for slower machines.
+        self.assertTrue(timeit.default_timer() - start < 3.0)
+
+    def test_not_following_game(self):
+        """Without game events, a random valid card is played.
+        """
+        p = make_players()[0]
+        p.set_hand(hand.Hand())
+        for c in card.CARDS[:5]:
+            p.hand.add_card(c)
+        selected = p.intel.select_best_card(card.CLUBS, [])
+        self.assertTrue(selected in p.hand)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+from forte_fives import cardset
+from forte_fives import player
+from forte_fives import record
+from forte_fives import rules
+from forte_fives import simulation
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def make_players():
+    return [player.Player('Player %d' % i) for i in range(4)]
+
+
+class Records(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'rounds.rec')
+        with record.RecordWriter(self.path) as writer:
+            self.stats = simulation.simulate(3, make_players, seed=5,
+                                             writer=writer)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_one_record_per_round(self):
+        reader = record.RecordReader(self.path)
+        self.assertEqual(len(reader), self.stats.rounds)
+        self.assertEqual(len(list(reader)), self.stats.rounds)
+        records = list(reader)
+        self.assertEqual(records[0].round, 0)
+        self.assertEqual(sum(r.made for r in records),
+                         sum(self.stats.bids_made))
+
+    def test_scores(self):
+        """The points of the rounds add up to the final scores.
+        """
+        scores = {}
+        for r in record.read_records(self.path):
+            total = scores.setdefault(r.seed, [0] * r.players)
+            for seat, points in enumerate(r.points):
+                total[seat] += points
+        totals = [sum(s[seat] for s in scores.values()) for seat in range(4)]
+        self.assertEqual(totals, self.stats.total_scores)
+
+    def test_pack_round_trip(self):
+        r = next(record.read_records(self.path))
+        self.assertEqual(record.RoundRecord.unpack(r.pack(), 4), r)
+
+    def test_slice(self):
+        records = list(record.read_records(self.path))
+        self.assertEqual(list(record.read_records(self.path, 2, 4)),
+                         records[2:4])
+
+    def test_append(self):
+        with record.RecordWriter(self.path) as writer:
+            simulation.simulate(1, make_players, seed=6, writer=writer)
+        self.assertTrue(len(record.RecordReader(self.path)) >
+                        self.stats.rounds)
+
+    def test_append_torn(self):
+        """A record cut short by a crash is dropped when appending.
+        """
+        records = list(record.read_records(self.path))
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 50)
+        with record.RecordWriter(self.path) as writer:
+            stats = simulation.simulate(1, make_players, seed=6,
+                                        writer=writer)
+        appended = list(record.read_records(self.path))
+        self.assertEqual(len(appended), len(records) - 1 + stats.rounds)
+        self.assertEqual(appended[:len(records) - 1], records[:-1])
+        self.assertEqual(appended[-1].seed, simulation.game_seeds(1, 6)[0])
+
+    def test_other_players(self):
+        self.assertRaises(record.RecordException, record.RecordWriter,
+                          self.path, 3)
+
+    def test_replay(self):
+        for r in record.read_records(self.path):
+            states = list(record.Replay(r).states())
+            phases = [s.phase for s in states]
+            self.assertEqual(phases.count(record.CARD_PLAYED),
+                             r.players * rules.HAND_SIZE)
+            discarded = states[phases.index(record.CARDS_DISCARDED)]
+            for hand in discarded.hands:
+                self.assertEqual(cardset.popcount(hand), rules.HAND_SIZE)
+            self.assertEqual(tuple(states[-1].points), r.points)
+            self.assertEqual(states[-1].hands, [0] * r.players)
+
+    def test_bad_record(self):
+        r = next(record.read_records(self.path))
+        r.tricks = (r.tricks[1],) + r.tricks[1:]
+        self.assertRaises(record.RecordException, list,
+                          record.Replay(r).states())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import events
+from forte_fives import game
+from forte_fives import knowledge
+from forte_fives import player
+from forte_fives import sampler
+
+import itertools
+import random
+import unittest
+
+
+def deals(unknown, possible, sizes, seat):
+    """
+    Enumerates the consistent deals, the slow way.
+    """
+    cards = cardset.indexes_of(unknown)
+    seats = [s for s in range(len(sizes)) if s != seat]
+    found = []
+
+    def deal(s, left, hands):
+        if s == len(seats):
+            found.append(tuple(hands))
+            return
+        for picked in itertools.combinations(left, sizes[seats[s]]):
+            mask = cardset.EMPTY
+            for index in picked:
+                mask |= 1 << index
+            if mask & ~possible[seats[s]]:
+                continue
+            hands[seats[s]] = mask
+            deal(s + 1, [c for c in left if c not in picked], hands)
+        hands[seats[s]] = cardset.EMPTY
+
+    deal(0, cards, [cardset.EMPTY] * len(sizes))
+    return found
+
+
+class Sampler_Sampler(unittest.TestCase):
+
+    def setUp(self):
+        self.unknown = cardset.mask_of(card.CARDS[:7])
+        # Seat 1 may only hold the first 4 cards, seat 3 the last 5.
+        self.possible = [cardset.EMPTY, cardset.mask_of(card.CARDS[:4]),
+                         cardset.FULL_MASK, cardset.mask_of(card.CARDS[2:7])]
+        self.sizes = [2, 2, 2, 2]
+
+    def test_count(self):
+        s = sampler.Sampler(self.unknown, self.possible, self.sizes, 0)
+        self.assertEqual(s.count, len(deals(self.unknown, self.possible,
+                                            self.sizes, 0)))
+
+    def test_uniform(self):
+        s = sampler.Sampler(self.unknown, self.possible, self.sizes, 0)
+        expected = deals(self.unknown, self.possible, self.sizes, 0)
+        rng = random.Random(1)
+        counts = dict((d, 0) for d in expected)
+        n = 200 * len(expected)
+        for x in range(n):
+            hands = tuple(s.sample(rng))
+            self.assertTrue(hands in counts)
+            counts[hands] += 1
+        # Every deal comes up about 200 times, give or take five
+        # standard deviations.
+        for d, count in counts.items():
+            self.assertTrue(abs(count - 200) < 5 * 200 ** 0.5)
+
+    def test_impossible(self):
+        possible = list(self.possible)
+        possible[3] = possible[1]
+        sizes = [0, 3, 0, 2]
+        s = sampler.Sampler(self.unknown, possible, sizes, 0)
+        self.assertEqual(s.count, 0)
+        self.assertEqual(s.sample(random.Random(2)), None)
+
+
+class Sampler_constraints(unittest.TestCase):
+
+    def setUp(self):
+        players = [player.Player('Player %d' % x) for x in range(4)]
+        self.tracker = knowledge.Knowledge(players[0])
+        self.tracker.cards_dealt(players, None)
+        self.tracker.suit_selected(players[1], card.SPADES)
+        self.rng = random.Random(5)
+
+    def tearDown(self):
+        self.tracker = None
+
+    def sample(self, unknown, sizes):
+        return sampler.Sampler(unknown, self.tracker.possible, sizes,
+                               self.tracker.seat).sample(self.rng)
+
+    def test_sizes(self):
+        unknown = cardset.mask_of(card.CARDS[10:40])
+        hands = self.sample(unknown, [5, 5, 4, 3])
+        self.assertEqual(hands[0], cardset.EMPTY)
+        self.assertEqual([cardset.popcount(h) for h in hands[1:]], [5, 4, 3])
+        self.assertEqual(hands[1] & hands[2], cardset.EMPTY)
+        self.assertEqual((hands[1] | hands[2] | hands[3]) & ~unknown,
+                         cardset.EMPTY)
+
+    def test_void(self):
+        self.tracker.set_void(2)
+        in_suit = cardset.IN_SUIT_MASKS[card.SPADES]
+        for x in range(20):
+            hands = self.sample(cardset.FULL_MASK, [5] * 4)
+            self.assertEqual(hands[2] & in_suit, cardset.EMPTY)
+
+    def test_void_impossible(self):
+        self.tracker.set_void(2)
+        unknown = cardset.SUIT_MASKS[card.SPADES]
+        self.assertTrue(self.sample(unknown, [5] * 4) is None)
+
+
+class Sampler_knowledge(unittest.TestCase):
+
+    def test_rounds(self):
+        """Samples of a game in progress hold the right cards.
+        """
+        players = [player.Player('Player %d' % x) for x in range(4)]
+        tracker = knowledge.Knowledge(players[1])
+        checked = []
+        rng = random.Random(3)
+
+        class Checker(events.Observer):
+
+            def card_played(self, p, played_card):
+                s = sampler.knowledge_sampler(tracker)
+                for x in range(5):
+                    hands = s.sample(rng)
+                    self.check(hands)
+                checked.append(s.count)
+
+            def check(self, hands):
+                sizes = tracker.hand_sizes()
+                for seat, p in enumerate(players):
+                    if seat == tracker.seat:
+                        assert hands[seat] == cardset.EMPTY
+                        continue
+                    assert cardset.popcount(hands[seat]) == sizes[seat]
+                    assert hands[seat] & ~tracker.possible[seat] == 0
+
+        g = game.Game(players, observers=[tracker, Checker()],
+                      rng=random.Random(4))
+        for x in range(5):
+            g.play_round()
+        self.assertEqual(len(checked), 5 * 5 * 4)
+        self.assertTrue(all(checked))
+
+
+class Table(object):
+    """
+    Strength table expecting 5 points of every card in suit.
+    """
+
+    def points(self, mask, suit):
+        return 5.0 * cardset.popcount(mask & cardset.IN_SUIT_MASKS[suit])
+
+    def best_suit(self, mask):
+        return max(((s, self.points(mask, s)) for s in card.SUITS),
+                   key=lambda best: best[1])
+
+
+class Sampler_bid_weights(unittest.TestCase):
+
+    def setUp(self):
+        self.players = [player.Player('Player %d' % x) for x in range(4)]
+        self.tracker = knowledge.Knowledge(self.players[0])
+        self.tracker.cards_dealt(self.players, None)
+        for p, bid in zip(self.players, (0, 0, 25, 0)):
+            self.tracker.bid_placed(p, bid)
+        self.tracker.bidding_finished(self.players[2], 25)
+        self.tracker.suit_selected(self.players[2], card.CLUBS)
+        self.clubs = cardset.mask_of(card.Card(r, card.CLUBS)
+                                     for r in ('5', 'J', 'K', 'Q', '2'))
+        self.hearts = cardset.mask_of(card.Card(r, card.HEARTS)
+                                      for r in ('3', '4', '6', '7', '8'))
+        self.weak = cardset.mask_of(card.Card(r, s) for r, s in (
+            ('2', card.SPADES), ('3', card.DIAMONDS), ('4', card.SPADES),
+            ('6', card.DIAMONDS), ('9', card.SPADES)))
+
+    def tearDown(self):
+        self.tracker = None
+        self.players = None
+
+    def discard(self, amounts):
+        for seat, amount in amounts:
+            self.tracker.cards_discarded(self.players[seat], amount)
+
+    def test_passed(self):
+        # A player who passed and kept its cards is more likely to hold
+        # a weak hand.
+        self.discard([(2, 3), (3, 0), (1, 0)])
+        weight = sampler.bid_weights(self.tracker, Table())
+        self.assertTrue(weight([0, self.weak, self.clubs, 0]) >
+                        weight([0, self.hearts, self.clubs, 0]))
+
+    def test_not_weighed(self):
+        # The hand of the bidder holds the kiddie, and the one of a
+        # player who threw out cards new cards: neither is weighed.
+        self.discard([(2, 3), (3, 2), (1, 0)])
+        weight = sampler.bid_weights(self.tracker, Table())
+        self.assertEqual(weight([0, self.weak, self.clubs, self.hearts]),
+                         weight([0, self.weak, self.hearts, self.weak]))
+        self.assertEqual(weight([0, self.weak, 0, 0]),
+                         weight([0, self.weak, self.hearts, self.clubs]))
+
+    def test_no_table(self):
+        if sampler.strength.load_default_table() is None:
+            self.assertEqual(sampler.bid_weights(self.tracker), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import features
+from forte_fives import player
+from forte_fives import rules
+from forte_fives import selfplay
+from forte_fives import simulation
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def make_mask(*cards):
+    return cardset.mask_of(card.Card(r, s) for r, s in cards)
+
+
+class Features_valid_moves(unittest.TestCase):
+
+    def test_valid_moves(self):
+        hand = make_mask(('5', card.CLUBS), ('A', card.HEARTS))
+        two = card.Card('2', card.CLUBS).index
+        three = card.Card('3', card.DIAMONDS).index
+        self.assertEqual(features.valid_moves(hand, card.CLUBS, []), hand)
+        self.assertEqual(features.valid_moves(hand, card.CLUBS, [two]),
+                         make_mask(('5', card.CLUBS), ('A', card.HEARTS)))
+        self.assertEqual(features.valid_moves(hand, card.CLUBS, [three]),
+                         hand)
+        self.assertEqual(features.valid_moves(hand, card.DIAMONDS, [two]),
+                         hand)
+
+
+class Features_decisions(unittest.TestCase):
+
+    def test_decisions(self):
+        rounds = []
+
+        class Collector(object):
+            write = rounds.append
+
+        simulation.simulate(2, lambda: [player.Player('Player %d' % x)
+                                        for x in range(4)],
+                            seed=1, writer=Collector())
+        decisions = list(features.decisions(rounds))
+        kinds = [d[0] for d in decisions]
+        self.assertEqual(kinds.count(features.BID), len(rounds) * 4)
+        self.assertEqual(kinds.count(features.DISCARD), len(rounds) * 4)
+        self.assertEqual(kinds.count(features.CARD),
+                         len(rounds) * 4 * rules.HAND_SIZE)
+        for kind, seat, bidder, o, action, outcome in decisions:
+            if kind == features.CARD:
+                self.assertTrue(o[6] >> action & 1)
+            elif kind == features.DISCARD:
+                self.assertEqual(action & o[0], action)
+
+
+class SelfPlay_records(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'shard-000000.ffsp')
+        o = features.observation(make_mask(('5', card.CLUBS)), card.CLUBS,
+                                 make_mask(('2', card.CLUBS)), 3, -25, 110,
+                                 make_mask(('5', card.CLUBS)))
+        self.decisions = [(features.CARD, 1, 2, o,
+                           card.Card('5', card.CLUBS).index, -15),
+                          (features.BID, 0, 2, o, 25, 10)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        data = b''.join(selfplay.pack(d) for d in self.decisions)
+        for compress in (True, False):
+            selfplay.write_shard(self.path, data, compress)
+            self.assertEqual(list(selfplay.shard_decisions(self.path)),
+                             self.decisions)
+            self.assertEqual(selfplay.shard_paths(self.directory),
+                             [self.path])
+
+    def test_not_a_shard(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a shard at all')
+        self.assertRaises(selfplay.SelfPlayException, selfplay.read_shard,
+                          self.path)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_load_shard(self):
+        data = b''.join(selfplay.pack(d) for d in self.decisions)
+        for compress in (True, False):
+            selfplay.write_shard(self.path, data, compress)
+            records = selfplay.load_shard(self.path)
+            self.assertEqual(len(records), 2)
+            self.assertEqual(list(records['action']),
+                             [card.Card('5', card.CLUBS).index, 25])
+            self.assertEqual(list(records['score']), [-25, -25])
+            self.assertEqual(list(records['outcome']), [-15, 10])
+            del records
+
+
+class SelfPlay_generate(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.intels = ['random', 'strength', 'random', 'random']
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, directory):
+        return [list(selfplay.shard_decisions(path))
+                for path in selfplay.shard_paths(directory)]
+
+    def test_generate(self):
+        written, records, dropped = selfplay.generate(
+            self.directory, 3, self.intels, seed=1, processes=1,
+            shard_size=2)
+        self.assertEqual((written, dropped), (2, 0))
+        shards = self.read(self.directory)
+        self.assertEqual(sum(len(s) for s in shards), records)
+
+        # The records are the decisions of the rounds of the games.
+        factory = selfplay.PlayersFactory(self.intels)
+        collector = selfplay._Collector()
+        simulation.play_games(factory, simulation.game_seeds(3, 1),
+                              collector)
+        self.assertEqual([d for s in shards for d in s],
+                         list(features.decisions(collector)))
+
+    def test_resume(self):
+        selfplay.generate(self.directory, 3, self.intels, seed=2,
+                          processes=1, shard_size=1)
+        whole = self.read(self.directory)
+        os.remove(selfplay.shard_path(self.directory, 1))
+        written, records, dropped = selfplay.generate(
+            self.directory, 3, self.intels, seed=2, processes=1,
+            shard_size=1)
+        self.assertEqual(written, 1)
+        self.assertEqual(self.read(self.directory), whole)
+
+        self.assertRaises(selfplay.SelfPlayException, selfplay.generate,
+                          self.directory, 3, self.intels, seed=3,
+                          processes=1, shard_size=1)
+        self.assertRaises(selfplay.SelfPlayException, selfplay.generate,
+                          self.directory, 3, self.intels, seed=2,
+                          processes=1, shard_size=1, compress=False)
+        self.assertRaises(selfplay.SelfPlayException, selfplay.generate,
+                          self.directory, 3, self.intels, seed=2,
+                          processes=1, shard_size=1, dedup=True)
+
+    def test_dedup(self):
+        first = os.path.join(self.directory, 'first')
+        selfplay.generate(first, 2, self.intels, seed=4, processes=1,
+                          shard_size=1)
+        data = selfplay.read_shard(selfplay.shard_path(first, 1))
+
+        # A generation already holding the records of the second game
+        # drops them all when playing it.
+        second = os.path.join(self.directory, 'second')
+        os.makedirs(second)
+        selfplay.write_shard(selfplay.shard_path(second, 0), data)
+        written, records, dropped = selfplay.generate(
+            second, 2, self.intels, seed=4, processes=1, shard_size=1,
+            dedup=True)
+        self.assertEqual((written, records), (1, 0))
+        self.assertEqual(dropped, len(data) // selfplay.RECORD.size)
+
+    def test_unknown_intel(self):
+        self.assertRaises(selfplay.SelfPlayException, selfplay.generate,
+                          self.directory, 1, ['random', 'nope'])
+        self.assertRaises(selfplay.SelfPlayException, selfplay.generate,
+                          self.directory, 1, ['forte_fives.intel:Nope'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+from forte_fives import game
+from forte_fives import instrument
+from forte_fives import intel
+from forte_fives import player
+from forte_fives import rules
+
+import random
+import unittest
+
+try:
+    import asyncio
+    from forte_fives import client
+    from forte_fives import server
+except (ImportError, SyntaxError):
+    server = None
+
+
+class RecordingAgent(object):
+    """
+    Answers at random, and keeps every message received. The answers
+    to the requests in delays are sent that many seconds late, those
+    in bad get a bad answer first.
+    """
+
+    def __init__(self, delays=None, bad=()):
+        self.agent = client.RandomAgent(random.Random(1))
+        self.delays = delays or {}
+        self.bad = set(bad)
+        self.messages = []
+
+    def event(self, message):
+        self.messages.append(message)
+
+    def decide(self, request):
+        self.messages.append(request)
+        if request['id'] in self.bad:
+            self.bad.discard(request['id'])
+            return 'bogus'
+        answer = self.agent.decide(request)
+        if request['id'] in self.delays:
+            return asyncio.sleep(self.delays[request['id']], result=answer)
+        return answer
+
+    def events(self, name):
+        return [m for m in self.messages if m.get('event') == name]
+
+
+class NamingIntel(intel.Intel):
+    """
+    Keeps the names of the players it played cards for.
+    """
+
+    names = []
+
+    def select_best_card(self, suit, cards_played):
+        NamingIntel.names.append(self.player.name)
+        return intel.Intel.select_best_card(self, suit, cards_played)
+
+
+def play_remote(agent, **kwargs):
+    """
+    Plays a game against bots on a new server and returns the winner
+    and the server.
+    """
+    loop = asyncio.new_event_loop()
+    game_server = server.GameServer(seed=1, **kwargs)
+    try:
+        loop.run_until_complete(game_server.start(port=0))
+        winner = loop.run_until_complete(
+            client.play(agent, 'tester', port=game_server.port))
+        loop.run_until_complete(game_server.close())
+    finally:
+        loop.close()
+    return winner, game_server
+
+
+@unittest.skipIf(server is None, 'Requires Python 3')
+class Server_play_tables(unittest.TestCase):
+
+    def factory(self):
+        return [player.Player('Player %d' % x) for x in range(4)]
+
+    def test_play_tables(self):
+        winners = asyncio.run(server.play_tables(20, self.factory, seed=3))
+        self.assertEqual(len(winners), 20)
+        for winner in winners:
+            self.assertTrue(winner.startswith('Player '))
+
+    def test_reproducible(self):
+        self.assertEqual(
+            asyncio.run(server.play_tables(5, self.factory, seed=3)),
+            asyncio.run(server.play_tables(5, self.factory, seed=3)))
+
+
+@unittest.skipIf(server is None, 'Requires Python 3')
+class Server_AsyncGame(unittest.TestCase):
+
+    def test_instrumentation(self):
+        """The decisions of AsyncPlayers are timed, like in a Game.
+        """
+        sink = instrument.HistogramSink()
+        players = [server.AsyncPlayer('Player %d' % x) for x in range(4)]
+        g = server.AsyncGame(
+            players, observers=[], rng=random.Random(1),
+            instrumentation=instrument.Instrumentation([sink]),
+            move_time=60.0)
+        asyncio.run(g.play_round())
+        self.assertEqual(sink.get(instrument.PLAY_HAND).count,
+                         rules.HAND_SIZE)
+        for phase in (instrument.DEAL_CARDS, instrument.START_BIDDING,
+                      instrument.IMPROVE_CARDS, instrument.SCORING):
+            self.assertEqual(sink.get(phase).count, 1)
+        for p in players:
+            self.assertEqual(sink.get(instrument.SHOULD_BID, p.name).count, 1)
+            self.assertEqual(
+                sink.get(instrument.SELECT_BEST_CARD, p.name).count,
+                rules.HAND_SIZE)
+        self.assertTrue(g.state.is_over())
+
+    def test_same_as_game(self):
+        """Rounds of Game and AsyncGame seeded alike play out the same.
+        """
+        scores = []
+        for table_class, player_class in ((game.Game, player.Player),
+                                          (server.AsyncGame,
+                                           server.AsyncPlayer)):
+            players = [player_class('Player %d' % x) for x in range(4)]
+            g = table_class(players, observers=[], rng=random.Random(2))
+            for x in range(3):
+                if table_class is game.Game:
+                    g.play_round()
+                else:
+                    asyncio.run(g.play_round())
+            scores.append([g.score_board.get_score(p.name) for p in players])
+        self.assertEqual(scores[0], scores[1])
+
+
+@unittest.skipIf(server is None, 'Requires Python 3')
+class Server_remote(unittest.TestCase):
+
+    def test_play(self):
+        agent = RecordingAgent()
+        winner, game_server = play_remote(agent)
+        self.assertEqual(game_server.games_played, 1)
+        started = agent.events('game_started')
+        self.assertEqual(len(started), 1)
+        self.assertIn('tester', started[0]['players'])
+        self.assertIn(winner, started[0]['players'])
+        self.assertEqual(agent.events('game_finished')[0]['winner'], winner)
+        decisions = set(m['decision'] for m in agent.messages
+                        if m['type'] == 'request')
+        self.assertTrue(instrument.SHOULD_BID in decisions)
+        self.assertTrue(instrument.SELECT_BEST_CARD in decisions)
+
+    def test_bad_answer(self):
+        agent = RecordingAgent(bad=[1])
+        winner, game_server = play_remote(agent)
+        errors = [m for m in agent.messages if m['type'] == 'error']
+        self.assertEqual(len(errors), 1)
+        requests = [m for m in agent.messages if m['type'] == 'request']
+        self.assertEqual(requests[0]['decision'], requests[1]['decision'])
+        self.assertEqual(game_server.games_played, 1)
+
+    def test_move_time(self):
+        agent = RecordingAgent(delays={1: 0.3})
+        winner, game_server = play_remote(agent, move_time=0.05)
+        exceeded = agent.events('deadline_exceeded')
+        self.assertTrue(exceeded)
+        for message in exceeded:
+            self.assertEqual(message['player'], 'tester')
+            self.assertTrue(message['fell_back'])
+        self.assertEqual(game_server.games_played, 1)
+
+    def test_disconnect(self):
+        """The intel of the bots takes over players that are gone.
+        """
+        NamingIntel.names = []
+        loop = asyncio.new_event_loop()
+        game_server = server.GameServer(seed=1, intel_class=NamingIntel)
+        try:
+            loop.run_until_complete(game_server.start(port=0))
+            reader, writer = loop.run_until_complete(
+                asyncio.open_connection('127.0.0.1', game_server.port))
+            writer.write(b'{"type": "hello", "name": "gone"}\n')
+            writer.close()
+            for x in range(100):
+                loop.run_until_complete(asyncio.sleep(0.01))
+                if game_server.games_played:
+                    break
+            loop.run_until_complete(game_server.close())
+        finally:
+            loop.close()
+        self.assertEqual(game_server.games_played, 1)
+        self.assertTrue('gone' in NamingIntel.names)
+
+    def test_disconnect_waiting(self):
+        """Players gone before their table opens are not seated.
+        """
+        agents = [RecordingAgent(), RecordingAgent()]
+        loop = asyncio.new_event_loop()
+        game_server = server.GameServer(remote_players=2, seed=1)
+        try:
+            loop.run_until_complete(game_server.start(port=0))
+            reader, writer = loop.run_until_complete(
+                asyncio.open_connection('127.0.0.1', game_server.port))
+            writer.write(b'{"type": "hello", "name": "gone"}\n')
+            writer.close()
+            for x in range(100):
+                loop.run_until_complete(asyncio.sleep(0.01))
+                if (game_server.waiting and
+                        game_server.waiting[0].reader.at_eof()):
+                    break
+            tables = asyncio.gather(*[
+                loop.create_task(client.play(a, 'tester',
+                                             port=game_server.port))
+                for a in agents])
+            winners = loop.run_until_complete(asyncio.wait_for(tables, 30))
+            loop.run_until_complete(game_server.close())
+        finally:
+            loop.close()
+        self.assertEqual(game_server.games_played, 1)
+        self.assertEqual(winners[0], winners[1])
+        for agent in agents:
+            players = agent.events('game_started')[0]['players']
+            self.assertFalse('gone' in players)
+            self.assertTrue('tester' in players)
+
+
+if __name__ == '__main__':
+    unittest.main()
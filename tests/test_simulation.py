@@ -0,0 +1,108 @@
+from forte_fives import card
+from forte_fives import events
+from forte_fives import game
+from forte_fives import hand
+from forte_fives import player
+from forte_fives import rules
+from forte_fives import simulation
+from forte_fives import tournament
+
+import unittest
+
+
+def make_players():
+    return [player.Player('Player %d' % i) for i in range(4)]
+
+
+class RecordingObserver(events.Observer):
+
+    def __init__(self):
+        self.events = []
+
+    def bid_placed(self, player, bid):
+        self.events.append('bid')
+
+    def card_played(self, player, played_card):
+        self.events.append('card')
+
+    def round_finished(self, bidding_player, bid, made):
+        self.events.append('round')
+
+
+class GameObservers(unittest.TestCase):
+
+    def test_events_forwarded(self):
+        observer = RecordingObserver()
+        g = game.Game(make_players(), observers=[observer])
+        g.play_round()
+        self.assertEqual(observer.events.count('bid'), 4)
+        self.assertEqual(observer.events.count('card'), 4 * rules.HAND_SIZE)
+        self.assertEqual(observer.events[-1], 'round')
+
+    def test_hands_refilled(self):
+        g = game.Game(make_players(), observers=[])
+
+        class CheckObserver(events.Observer):
+            def trick_started(self, player):
+                self.sizes = [len(p.hand) for p in g.players]
+
+        observer = CheckObserver()
+        g.observers.append(observer)
+        g.play_round()
+        # Checked at the start of the last trick.
+        self.assertEqual(observer.sizes, [1, 1, 1, 1])
+
+
+class DiscardCards(unittest.TestCase):
+
+    def test_too_many_in_suit(self):
+        """Weakest cards in suit are discarded to get back to hand size.
+        """
+        p = player.Player('myself')
+        p.set_hand(hand.Hand())
+        for rank in ('J', '5', 'A', 'K', 'Q', '2', '3'):
+            p.hand.add_card(card.Card(rank, card.CLUBS))
+        p.hand.add_card(card.Card('4', card.DIAMONDS))
+
+        discards = p.intel.select_discard_cards(card.CLUBS)
+        self.assertEqual(sorted(str(c) for c in discards),
+                         ['2 of Clubs', '3 of Clubs', '4 of Diamonds'])
+
+
+class Simulate(unittest.TestCase):
+
+    def test_aggregates(self):
+        stats = simulation.simulate(5, make_players, seed=7)
+        self.assertEqual(stats.games, 5)
+        self.assertEqual(sum(stats.wins), 5)
+        self.assertEqual(sum(stats.bids_made) + sum(stats.bids_set),
+                         stats.rounds)
+
+    def test_reproducible(self):
+        stats1 = simulation.simulate(3, make_players, seed=42)
+        stats2 = simulation.simulate(3, make_players, seed=42)
+        self.assertEqual(str(stats1), str(stats2))
+
+
+    def test_merge(self):
+        stats1 = simulation.simulate(2, make_players, seed=1)
+        stats2 = simulation.simulate(3, make_players, seed=2)
+        rounds = stats1.rounds + stats2.rounds
+        stats1.merge(stats2)
+        self.assertEqual(stats1.games, 5)
+        self.assertEqual(stats1.rounds, rounds)
+
+
+class RunTournament(unittest.TestCase):
+
+    def test_same_as_simulate(self):
+        """Results only depend on the seed, not on the sharding.
+        """
+        stats1 = tournament.run_tournament(6, make_players, seed=3,
+                                           processes=2, shard_size=2)
+        stats2 = simulation.simulate(6, make_players, seed=3)
+        self.assertEqual(str(stats1), str(stats2))
+
+
+if __name__ == '__main__':
+    unittest.main()
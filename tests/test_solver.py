@@ -0,0 +1,128 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import hand
+from forte_fives import rules
+from forte_fives import solver
+
+import random
+import unittest
+
+
+def minimax(suit, hands, leader, seat, trick, highest):
+    """Plain minimax over the rules functions, used as a reference.
+    """
+    turn = (leader + len(trick)) % len(hands)
+    if not trick and not hands[turn]:
+        if highest is not None and highest[1] == seat:
+            return solver.HIGHEST_CARD_POINTS
+        return 0
+
+    h = hand.Hand()
+    for c in hands[turn]:
+        h.add_card(c)
+
+    values = []
+    for c in list(rules.select_valid_cards(suit, h, trick)):
+        hands[turn].remove(c)
+        played = trick + [c]
+        if len(played) < len(hands):
+            value = minimax(suit, hands, leader, seat, played, highest)
+        else:
+            winning_card = rules.get_winnind_card(suit, played)
+            winner = (leader + played.index(winning_card)) % len(hands)
+            points = 0
+            if winner == seat:
+                points = solver.TURN_POINTS
+            new_highest = highest
+            strength = rules.get_in_suit_rank(suit, winning_card)
+            if strength >= 0 and (
+                    highest is None or
+                    strength > rules.get_in_suit_rank(suit, highest[0])):
+                new_highest = (winning_card, winner)
+            value = points + minimax(suit, hands, winner, seat, [],
+                                     new_highest)
+        hands[turn].append(c)
+        values.append(value)
+
+    if turn == seat:
+        return max(values)
+    return min(values)
+
+
+class Solve(unittest.TestCase):
+
+    def test_matches_minimax(self):
+        rng = random.Random(5)
+        for x in range(20):
+            cards = rng.sample(card.CARDS, 12)
+            hands = [cards[i * 3:(i + 1) * 3] for i in range(4)]
+            suit = rng.choice(card.SUITS)
+            expected = minimax(suit, [list(h) for h in hands], 0, 0, [], None)
+            best_card, points = solver.solve(suit, hands, 0, 0)
+            self.assertEqual(points, expected)
+            self.assertTrue(best_card in hands[0])
+
+    def test_mid_turn(self):
+        rng = random.Random(6)
+        for x in range(10):
+            cards = rng.sample(card.CARDS, 8)
+            # Seat 3 led, seat 0 plays next.
+            trick = [cards[0]]
+            hands = [cards[1:3], cards[3:5], cards[5:7], cards[7:8]]
+            suit = rng.choice(card.SUITS)
+            expected = minimax(suit, [list(h) for h in hands], 3, 0, trick,
+                               None)
+            best_card, points = solver.solve(suit, hands, 3, 0, trick)
+            self.assertEqual(points, expected)
+
+    def test_highest_card(self):
+        """The highest card in suit is worth extra points.
+        """
+        jack = card.Card('J', card.CLUBS)
+        hands = [[jack], [card.Card('2', card.CLUBS)],
+                 [card.Card('3', card.CLUBS)], [card.Card('4', card.CLUBS)]]
+        best_card, points = solver.solve(card.CLUBS, hands, 0, 0)
+        self.assertTrue(best_card is jack)
+        self.assertEqual(points, solver.TURN_POINTS +
+                         solver.HIGHEST_CARD_POINTS)
+
+    def test_bounded_cache(self):
+        """Distinct moves are only kept for the current search.
+        """
+        rng = random.Random(8)
+        deals = []
+        for x in range(2):
+            cards = rng.sample(card.CARDS, 16)
+            deals.append([cardset.mask_of(cards[i * 4:(i + 1) * 4])
+                          for i in range(4)])
+        s = solver.Solver(card.SPADES, 0)
+        s.solve(deals[0], 0)
+        self.assertTrue(s._distinct)
+        s.solve(deals[1], 0)
+        fresh = solver.Solver(card.SPADES, 0)
+        fresh.solve(deals[1], 0)
+        self.assertEqual(s._distinct, fresh._distinct)
+
+    def test_not_playing_next(self):
+        s = solver.Solver(card.CLUBS, 1)
+        self.assertRaises(solver.SolverException, s.solve,
+                          [cardset.mask_of(card.CARDS[i:i + 1])
+                           for i in range(4)], 0)
+
+
+class Evaluate(unittest.TestCase):
+
+    def test_all_valid_cards(self):
+        rng = random.Random(7)
+        cards = rng.sample(card.CARDS, 12)
+        hands = [cardset.mask_of(cards[i * 3:(i + 1) * 3]) for i in range(4)]
+        s = solver.Solver(card.SPADES, 0)
+        values = s.evaluate(hands, 0)
+        self.assertEqual(sorted(values), cardset.indexes_of(hands[0]))
+        best_index, points = s.solve(hands, 0)
+        self.assertEqual(max(values.values()), points)
+        self.assertEqual(values[best_index], points)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import game
+from forte_fives import hand
+from forte_fives import intel
+from forte_fives import player
+from forte_fives import rules
+from forte_fives import state
+
+import random
+import unittest
+
+
+def deal(rng, players=4):
+    cards = list(range(len(card.CARDS)))
+    rng.shuffle(cards)
+    hands = [cardset.EMPTY] * players
+    for x in range(players * rules.HAND_SIZE):
+        hands[x % players] |= 1 << cards[x]
+    return hands
+
+
+def fields(s):
+    return (list(s.hands), s.leader, s.turn, s.trick[:s.trick_size],
+            list(s.points), s.highest_card, s.highest_seat, s.ply,
+            s.tricks_played, s.hash)
+
+
+class State_GameState(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(7)
+
+    def tearDown(self):
+        self.rng = None
+
+    def playout(self, s):
+        """
+        Plays random valid moves to the end, and returns the moves and
+        the fields of the state before each of them.
+        """
+        moves = []
+        before = []
+        while not s.is_over():
+            move = self.rng.choice(cardset.indexes_of(s.valid_moves()))
+            before.append(fields(s))
+            s.apply(move)
+            self.assertEqual(s.hash, s.compute_hash())
+            moves.append(move)
+        return moves, before
+
+    def test_apply_undo(self):
+        for suit in card.SUITS:
+            s = state.GameState(suit, deal(self.rng), self.rng.randrange(4))
+            moves, before = self.playout(s)
+            self.assertEqual(len(moves), 4 * rules.HAND_SIZE)
+            for move, expected in reversed(list(zip(moves, before))):
+                s.undo(move)
+                self.assertEqual(fields(s), expected)
+                self.assertEqual(s.hash, s.compute_hash())
+
+    def test_points(self):
+        for x in range(20):
+            suit = self.rng.choice(card.SUITS)
+            s = state.GameState(suit, deal(self.rng), 0)
+            self.playout(s)
+            total = sum(s.score(seat) for seat in range(4))
+            bonus = state.HIGHEST_CARD_POINTS if s.highest_card >= 0 else 0
+            self.assertEqual(total, rules.HAND_SIZE * state.TURN_POINTS +
+                             bonus)
+
+    def test_winner(self):
+        for x in range(50):
+            suit = self.rng.choice(card.SUITS)
+            leader = self.rng.randrange(4)
+            s = state.GameState(suit, deal(self.rng), leader)
+            for y in range(4):
+                moves = cardset.indexes_of(s.valid_moves())
+                s.apply(self.rng.choice(moves))
+            trick, winner = s.last_trick()
+            winning = rules.get_winnind_card(
+                suit, [card.CARDS[c] for c in trick])
+            self.assertEqual(winner,
+                             (leader + trick.index(winning.index)) % 4)
+            self.assertEqual(s.turn, winner)
+
+    def test_valid_moves(self):
+        for x in range(50):
+            suit = self.rng.choice(card.SUITS)
+            s = state.GameState(suit, deal(self.rng), 0)
+            s.apply(self.rng.choice(cardset.indexes_of(s.hands[0])))
+            h = hand.Hand()
+            h.cards = cardset.cards_of(s.hands[1])
+            valid = rules.select_valid_cards(suit, h,
+                                             [card.CARDS[s.trick[0]]])
+            self.assertEqual(s.valid_moves(), cardset.mask_of(valid))
+
+    def test_hash(self):
+        # The hash depends on the position only.
+        hands = deal(self.rng)
+        first = state.GameState(card.HEARTS, hands, 0)
+        second = state.GameState(card.HEARTS, hands, 0)
+        self.assertEqual(first.hash, second.hash)
+        move = cardset.indexes_of(hands[0])[0]
+        first.apply(move)
+        self.assertNotEqual(first.hash, second.hash)
+        first.undo(move)
+        self.assertEqual(first.hash, second.hash)
+
+    def test_bad_moves(self):
+        hands = deal(self.rng)
+        s = state.GameState(card.CLUBS, hands, 0)
+        other = cardset.indexes_of(hands[1])[0]
+        self.assertRaises(state.StateException, s.apply, other)
+        move = cardset.indexes_of(hands[0])[0]
+        s.apply(move)
+        self.assertRaises(state.StateException, s.undo, other)
+        self.assertRaises(state.StateException, s.last_trick)
+
+    def test_follow_suit(self):
+        # Seat 1 holds a club and has to follow the club led.
+        hands = [cardset.mask_of([card.Card('2', card.CLUBS)]),
+                 cardset.mask_of([card.Card('3', card.CLUBS),
+                                  card.Card('4', card.SPADES)])]
+        s = state.GameState(card.CLUBS, hands, 0)
+        s.apply(card.Card('2', card.CLUBS).index)
+        self.assertRaises(state.StateException, s.apply,
+                          card.Card('4', card.SPADES).index)
+        s.apply(card.Card('3', card.CLUBS).index)
+
+
+class State_game(unittest.TestCase):
+
+    def test_game(self):
+        players = [player.Player('Player %d' % x) for x in range(4)]
+        g = game.Game(players, observers=[], rng=random.Random(3))
+        g.play_round()
+        self.assertTrue(g.state.is_over())
+        for seat, p in enumerate(players):
+            self.assertEqual(g.state.hands[seat], p.hand.mask)
+            # Only a bidding player that did not make the bid differs.
+            score = g.score_board.get_score(p.name)
+            self.assertTrue(score == g.state.score(seat) or score < 0)
+
+    def test_invalid_card(self):
+        class Reneging(intel.Intel):
+            """
+            Plays its first card, valid or not.
+            """
+
+            def select_best_card(self, suit, cards_played):
+                return self.player.hand.cards[0]
+
+        players = [player.Player('Player %d' % x, Reneging)
+                   for x in range(4)]
+        g = game.Game(players, observers=[], rng=random.Random(4))
+
+        def play():
+            for x in range(20):
+                g.play_round()
+        self.assertRaises(state.StateException, play)
+
+
+if __name__ == '__main__':
+    unittest.main()
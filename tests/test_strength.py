@@ -0,0 +1,276 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import hand
+from forte_fives import player
+from forte_fives import strength
+
+import itertools
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def make_mask(*cards):
+    return cardset.mask_of(card.Card(r, s) for r, s in cards)
+
+
+class Canonical(unittest.TestCase):
+
+    def test_black_suits_swapped(self):
+        a = make_mask(('5', card.HEARTS), ('2', card.CLUBS),
+                      ('K', card.SPADES), ('J', card.SPADES))
+        b = make_mask(('5', card.HEARTS), ('2', card.SPADES),
+                      ('K', card.CLUBS), ('J', card.CLUBS))
+        self.assertEqual(strength.table_key(a, card.HEARTS),
+                         strength.table_key(b, card.HEARTS))
+        self.assertEqual(strength.table_key(a, card.SPADES),
+                         strength.table_key(b, card.CLUBS))
+        self.assertNotEqual(strength.table_key(a, card.CLUBS),
+                            strength.table_key(b, card.CLUBS))
+
+    def test_red_suits_not_swapped(self):
+        a = make_mask(('5', card.HEARTS), ('2', card.DIAMONDS))
+        b = make_mask(('5', card.DIAMONDS), ('2', card.HEARTS))
+        self.assertNotEqual(strength.table_key(a, card.CLUBS),
+                            strength.table_key(b, card.CLUBS))
+
+    def test_canonical_keys(self):
+        # Single cards: black cards are all clubs with a red suit.
+        keys = list(strength.canonical_keys(1))
+        self.assertEqual(len(keys), 39 + 39 + 52)
+        self.assertEqual(len(set(keys)), len(keys))
+        for key in keys:
+            mask = key & cardset.FULL_MASK
+            suit = card.SUITS[key >> len(card.CARDS)]
+            self.assertEqual(strength.table_key(mask, suit), key)
+
+
+class Table(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'strength.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        mask = make_mask(('5', card.HEARTS), ('J', card.HEARTS),
+                         ('A', card.HEARTS), ('K', card.HEARTS),
+                         ('Q', card.HEARTS))
+        key = strength.table_key(mask, card.HEARTS)
+        strength.write_table({key: 27.5}, self.path)
+        table = strength.read_table(self.path)
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.points(mask, card.HEARTS), 27.5)
+        self.assertEqual(table.points(mask, card.CLUBS), None)
+        self.assertEqual(table.best_suit(mask), (card.HEARTS, 27.5))
+
+    def test_not_a_table(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a table at all')
+        self.assertRaises(strength.StrengthTableException,
+                          strength.read_table, self.path)
+
+    def test_evaluate_hand_reproducible(self):
+        key = next(strength.canonical_keys())
+        points = strength.evaluate_hand(key, 3, seed=1)
+        self.assertEqual(points, strength.evaluate_hand(key, 3, seed=1))
+        self.assertTrue(0 <= points <= 30)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_playout_hands(self):
+        keys = list(itertools.islice(strength.canonical_keys(), 20))
+        points = strength.playout_hands(keys, 10, seed=1)
+        self.assertEqual(len(points), 20)
+        self.assertEqual(points, strength.playout_hands(keys, 10, seed=1))
+        for p in points:
+            self.assertTrue(0 <= p <= 30)
+        self.assertEqual(strength.playout_hands([], 10), [])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_build_table(self):
+        keys = list(itertools.islice(strength.canonical_keys(), 10))
+        table = strength.build_table(3, seed=1, processes=1, keys=keys,
+                                     chunk_size=4)
+        self.assertEqual(sorted(table), keys)
+        self.assertRaises(ValueError, strength.build_table, 3, keys=keys,
+                          method='guess')
+
+    def test_keep(self):
+        # Three cards in suit are kept, without the others.
+        hearts = make_mask(('2', card.HEARTS), ('4', card.HEARTS),
+                           ('J', card.HEARTS))
+        others = make_mask(('6', card.DIAMONDS), ('7', card.DIAMONDS),
+                           ('2', card.CLUBS), ('9', card.CLUBS),
+                           ('Q', card.SPADES))
+        self.assertEqual(strength._keep(hearts | others, card.HEARTS, 5),
+                         hearts)
+        # Other cards make up for the missing ones in suit.
+        one = make_mask(('2', card.HEARTS))
+        kept = strength._keep(one | others, card.HEARTS, 5)
+        self.assertEqual(cardset.popcount(kept), 2)
+        self.assertTrue(kept & one)
+
+    def test_evaluate_deal_hand_size(self):
+        # Deals of a hand with many cards in suit solve with 5 cards in
+        # every hand.
+        mask = make_mask(('2', card.HEARTS), ('4', card.HEARTS),
+                         ('J', card.HEARTS), ('6', card.DIAMONDS),
+                         ('7', card.DIAMONDS))
+        rng = random.Random(2)
+        for x in range(5):
+            points = strength.evaluate_deal(mask, card.HEARTS, rng)
+            self.assertTrue(0 <= points <= 30)
+
+
+class HandRank(unittest.TestCase):
+
+    def test_dense(self):
+        ranks = [strength.hand_rank(cardset.mask_of(c))
+                 for c in itertools.combinations(card.CARDS, 2)]
+        self.assertEqual(sorted(ranks), list(range(len(ranks))))
+
+
+class MappedTable(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'strength.map')
+        self.mask = make_mask(('5', card.HEARTS), ('K', card.SPADES))
+        self.other = make_mask(('5', card.HEARTS), ('K', card.CLUBS))
+        strength.write_mapped_table(
+            {strength.table_key(self.mask, card.SPADES): 12.25,
+             strength.table_key(self.mask, card.HEARTS): 9.5},
+            self.path, hand_size=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lookup(self):
+        table = strength.open_table(self.path)
+        self.assertTrue(isinstance(table, strength.MappedStrengthTable))
+        self.assertEqual(table.points(self.mask, card.SPADES), 12.25)
+        self.assertEqual(table.points(self.other, card.CLUBS), 12.25)
+        self.assertEqual(table.points(self.other, card.HEARTS), 9.5)
+        self.assertEqual(table.points(self.mask, card.DIAMONDS), None)
+        self.assertEqual(table.best_suit(self.mask), (card.SPADES, 12.25))
+        table.close()
+
+    def test_other_hand_size(self):
+        table = strength.MappedStrengthTable(self.path)
+        self.assertEqual(table.points(make_mask(('5', card.HEARTS)),
+                                      card.HEARTS), None)
+
+    def test_pickle(self):
+        table = strength.MappedStrengthTable(self.path)
+        table.points(self.mask, card.SPADES)
+        table = pickle.loads(pickle.dumps(table, 2))
+        self.assertEqual(table.points(self.mask, card.SPADES), 12.25)
+
+    def test_rewrite(self):
+        """A mapped table keeps reading the file it opened.
+        """
+        table = strength.MappedStrengthTable(self.path)
+        self.assertEqual(table.points(self.mask, card.SPADES), 12.25)
+        strength.write_mapped_table(
+            {strength.table_key(self.mask, card.SPADES): 20.0},
+            self.path, hand_size=2)
+        self.assertEqual(os.listdir(self.directory), ['strength.map'])
+        self.assertEqual(table.points(self.mask, card.HEARTS), 9.5)
+        table.close()
+        table = strength.MappedStrengthTable(self.path)
+        self.assertEqual(table.points(self.mask, card.SPADES), 20.0)
+        self.assertEqual(table.points(self.mask, card.HEARTS), None)
+        table.close()
+
+    def test_truncated(self):
+        with open(self.path, 'r+b') as f:
+            f.truncate(100)
+        table = strength.MappedStrengthTable(self.path)
+        self.assertRaises(strength.StrengthTableException,
+                          table.points, self.mask, card.SPADES)
+
+
+class DefaultTable(unittest.TestCase):
+
+    def test_shipped(self):
+        table = strength.load_default_table()
+        self.assertTrue(isinstance(table, strength.MappedStrengthTable))
+        top = make_mask(('5', card.HEARTS), ('J', card.HEARTS),
+                        ('A', card.HEARTS), ('K', card.HEARTS),
+                        ('Q', card.HEARTS))
+        suit, points = table.best_suit(top)
+        self.assertEqual(suit, card.HEARTS)
+        self.assertTrue(points >= 25)
+        # Every hand is in it.
+        rng = random.Random(3)
+        for x in range(100):
+            mask = cardset.mask_of(rng.sample(card.CARDS, 5))
+            for suit in card.SUITS:
+                self.assertTrue(table.points(mask, suit) is not None)
+
+
+class StrengthIntel(unittest.TestCase):
+
+    def setUp(self):
+        self.player = player.Player('Player 0', strength.StrengthIntel)
+        self.player.set_hand(hand.Hand())
+        for c in card.CARDS[14:19]:
+            self.player.hand.add_card(c)
+        mask = self.player.hand.mask
+        self.player.intel.table = strength.StrengthTable(dict(
+            (strength.table_key(mask, s), p * strength.SCALE)
+            for s, p in zip(card.SUITS, (10, 22, 12, 12))))
+
+    def tearDown(self):
+        self.player = None
+
+    def test_select_suit(self):
+        self.assertEqual(self.player.select_suit(), card.DIAMONDS)
+
+    def test_should_bid(self):
+        self.assertEqual(self.player.place_bid(None), 15)
+        self.assertEqual(self.player.place_bid(15), 20)
+        self.assertEqual(self.player.place_bid(20), 0)
+
+    def test_margin(self):
+        self.player.intel.margin = 5
+        self.assertEqual(self.player.place_bid(15), 0)
+
+    def test_unknown_hand(self):
+        self.player.intel.table = strength.StrengthTable({})
+        self.player.set_rng(random.Random(1))
+        self.assertTrue(self.player.select_suit() in card.SUITS)
+
+    def test_no_table(self):
+        directory = tempfile.mkdtemp()
+        saved = (strength.DEFAULT_PATH, strength.DEFAULT_MAPPED_PATH,
+                 strength._default_table)
+        try:
+            strength.DEFAULT_PATH = os.path.join(directory, 'missing.pickle')
+            strength.DEFAULT_MAPPED_PATH = os.path.join(directory,
+                                                        'missing.bin')
+            strength._default_table = None
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                intel = strength.StrengthIntel(self.player)
+            self.assertEqual(intel.table, None)
+            self.assertEqual([w.category for w in caught], [RuntimeWarning])
+        finally:
+            (strength.DEFAULT_PATH, strength.DEFAULT_MAPPED_PATH,
+             strength._default_table) = saved
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+from forte_fives import card
+from forte_fives import cardset
+from forte_fives import solver
+from forte_fives import state
+from forte_fives import transposition
+
+import random
+import unittest
+
+
+class Transposition_TranspositionTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = transposition.TranspositionTable(16)
+
+    def tearDown(self):
+        self.table = None
+
+    def test_size(self):
+        self.assertRaises(ValueError, transposition.TranspositionTable, 12)
+        self.assertRaises(ValueError, transposition.TranspositionTable, 0)
+
+    def test_get_put(self):
+        self.assertEqual(self.table.get(3), None)
+        self.table.put(3, 2, 'entry')
+        self.assertEqual(self.table.get(3), 'entry')
+        self.assertEqual(self.table.get(3 + 16), None)
+        self.assertEqual(len(self.table), 1)
+        self.assertEqual((self.table.hits, self.table.misses), (1, 2))
+
+    def test_depth_preferred(self):
+        self.table.put(3, 4, 'deep')
+        self.table.put(3 + 16, 2, 'shallow')
+        self.assertEqual(self.table.get(3), 'deep')
+        self.table.put(3 + 32, 4, 'as deep')
+        self.assertEqual(self.table.get(3), None)
+        self.assertEqual(self.table.get(3 + 32), 'as deep')
+
+    def test_stale(self):
+        self.table.put(3, 4, 'deep')
+        self.table.new_search()
+        self.table.put(5, 4, 'used')
+        self.table.new_search()
+        self.assertEqual(self.table.get(5), 'used')
+        # Entries not used by the current search are replaced.
+        self.table.put(3 + 16, 2, 'shallow')
+        self.table.put(5 + 16, 2, 'shallow')
+        self.assertEqual(self.table.get(3 + 16), 'shallow')
+        self.assertEqual(self.table.get(5), 'used')
+
+    def test_clear(self):
+        self.table.put(3, 4, 'entry')
+        self.table.clear()
+        self.assertEqual(len(self.table), 0)
+
+    def test_shared(self):
+        self.assertTrue(transposition.shared(16) is transposition.shared(16))
+        self.assertFalse(transposition.shared(16) is transposition.shared())
+
+
+class Transposition_solver(unittest.TestCase):
+
+    def test_next_turn(self):
+        # Solving a later turn with the table of the first one gives the
+        # same points, searching fewer positions.
+        rng = random.Random(1)
+        for x in range(5):
+            cards = list(range(len(card.CARDS)))
+            rng.shuffle(cards)
+            hands = [cardset.EMPTY] * 4
+            for i in range(20):
+                hands[i % 4] |= 1 << cards[i]
+            suit = rng.choice(card.SUITS)
+            first = solver.Solver(suit, 0)
+            move, points = first.solve(hands, 0)
+
+            s = state.GameState(suit, hands, 0)
+            s.apply(move)
+            while not s.tricks_played or s.turn != 0:
+                s.apply(cardset.indexes_of(s.valid_moves())[0])
+            trick = s.trick[:s.trick_size]
+            highest = None
+            if s.highest_card >= 0:
+                highest = (s.highest_card, s.highest_seat)
+
+            shared = solver.Solver(suit, 0, table=first.table)
+            fresh = solver.Solver(suit, 0)
+            self.assertEqual(
+                shared.solve(s.hands, s.leader, trick, highest)[1],
+                fresh.solve(s.hands, s.leader, trick, highest)[1])
+            self.assertTrue(shared.nodes <= fresh.nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
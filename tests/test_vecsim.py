@@ -0,0 +1,139 @@
+from forte_fives import card
+from forte_fives import hand
+from forte_fives import rules
+
+import random
+import unittest
+
+try:
+    import numpy
+    from forte_fives import vecsim
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Vecsim_deal(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = numpy.random.default_rng(1)
+
+    def tearDown(self):
+        self.rng = None
+
+    def test_deal(self):
+        hands, kiddies, stock = vecsim.deal(100, self.rng)
+        self.assertEqual(hands.shape, (100, 4, rules.HAND_SIZE))
+        self.assertEqual(kiddies.shape, (100, vecsim.KIDDIE_SIZE))
+        cards = numpy.concatenate([hands.reshape(100, -1), kiddies, stock],
+                                  axis=1)
+        self.assertTrue((numpy.sort(cards, axis=1) ==
+                         numpy.arange(len(card.CARDS))).all())
+
+    def test_discard_and_refill(self):
+        hands, kiddies, stock = vecsim.deal(100, self.rng)
+        bidders = numpy.zeros(100, dtype=numpy.int64)
+        suits = numpy.full(100, card.SUITS.index(card.CLUBS))
+        extra = numpy.full((100, 4, 3), -1, dtype=hands.dtype)
+        extra[:, 0] = kiddies
+        before = numpy.concatenate([hands, extra], axis=-1)
+        kept, amount = vecsim.discard(before, suits, self.rng)
+        for r in range(100):
+            for p in range(4):
+                cards = set(kept[r, p]) - set([-1])
+                self.assertEqual(len(cards), amount[r, p])
+                self.assertTrue(cards <= set(before[r, p]))
+        vecsim.refill(kept, amount, stock, bidders)
+        for r in range(100):
+            cards = kept[r].ravel()
+            self.assertTrue((cards >= 0).all())
+            self.assertEqual(len(set(cards)), 4 * rules.HAND_SIZE)
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Vecsim_valid_slots(unittest.TestCase):
+
+    def test_matches_rules(self):
+        rng = random.Random(3)
+        games = []
+        for x in range(1000):
+            cards = rng.sample(card.CARDS, 6)
+            first = cards[5] if rng.random() < 0.8 else None
+            games.append((rng.choice(card.SUITS), cards[:5], first))
+        hands = numpy.array([[c.index for c in h] for s, h, f in games])
+        hands[:, 4] = -1
+        suits = numpy.array([card.SUITS.index(s) for s, h, f in games])
+        first = numpy.array([f.index if f else -1 for s, h, f in games])
+        valid = vecsim.valid_slots(hands, suits, first)
+        for (suit, cards, f), slots in zip(games, valid):
+            h = hand.Hand()
+            for c in cards[:4]:
+                h.add_card(c)
+            expected = rules.select_valid_cards(suit, h, [f] if f else [])
+            self.assertEqual(set(c for c, v in zip(cards, slots) if v),
+                             set(expected))
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Vecsim_simulate(unittest.TestCase):
+
+    def test_rounds(self):
+        for policy in vecsim.POLICIES:
+            results = vecsim.simulate(1000, seed=1, policy=policy,
+                                      chunk_size=300)
+            self.assertEqual(len(results), 1000)
+            totals = results.points.sum(axis=1)
+            bonus = (results.highest_cards >= 0) * vecsim.HIGHEST_CARD_POINTS
+            self.assertTrue((totals == 25 + bonus).all())
+            self.assertTrue(numpy.isin(results.bids, rules.BIDS).all())
+            rounds = numpy.arange(1000)
+            bidder_points = results.points[rounds, results.bidders]
+            self.assertTrue((results.made ==
+                             (bidder_points >= results.bids)).all())
+            self.assertTrue((results.scores[rounds, results.bidders] ==
+                             numpy.where(results.made, bidder_points,
+                                         -results.bids)).all())
+
+    def test_reproducible(self):
+        a = vecsim.simulate(500, seed=7)
+        b = vecsim.simulate(500, seed=7)
+        self.assertTrue((a.scores == b.scores).all())
+
+    def test_unknown_policy(self):
+        self.assertRaises(ValueError, vecsim.play_rounds, 10, 1, 'smart')
+
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Vecsim_play_hands(unittest.TestCase):
+
+    def indexes(self, *cards):
+        return [card.Card(r, s).index for r, s in cards]
+
+    def test_points(self):
+        top = self.indexes(('5', card.HEARTS), ('J', card.HEARTS),
+                           ('A', card.HEARTS), ('K', card.HEARTS),
+                           ('Q', card.HEARTS))
+        weak = self.indexes(('2', card.CLUBS), ('3', card.SPADES),
+                            ('4', card.CLUBS), ('6', card.SPADES),
+                            ('7', card.CLUBS))
+        hearts = card.SUITS.index(card.HEARTS)
+        points = vecsim.play_hands([top] * 200 + [weak] * 200,
+                                   [hearts] * 400, 3)
+        self.assertEqual(points.shape, (400,))
+        self.assertTrue((points % vecsim.TURN_POINTS == 0).all())
+        # The five strongest cards in suit win every turn, and the
+        # highest card.
+        self.assertTrue((points[:200] == 30).all())
+        self.assertTrue(points[200:].mean() < 15)
+        self.assertTrue((points[200:] >= 0).all())
+
+    def test_reproducible(self):
+        hands = [list(range(x, x + 5)) for x in range(0, 40, 5)]
+        suits = [x % 4 for x in range(8)]
+        self.assertTrue((vecsim.play_hands(hands, suits, 4) ==
+                         vecsim.play_hands(hands, suits, 4)).all())
+
+
+if __name__ == '__main__':
+    unittest.main()